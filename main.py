@@ -1,6 +1,11 @@
-import asyncio
-import os
-import sys
+import time
+
+_started = time.perf_counter()  # 启动时间线的起点，在其他导入之前记录
+
+# 以下导入在记录起点之后，计入启动时间线
+import asyncio  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
 
 # Change the working directory to the directory containing this script
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -8,7 +13,13 @@ os.chdir(os.path.dirname(os.path.abspath(__file__)))
 # Add the current directory to the path so imports work correctly
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.flappy import Flappy
+# 需要先把脚本目录加入 sys.path
+from src.startup import timeline  # noqa: E402
+
+timeline.start(_started)  # FLAPPY_STARTUP_REPORT=1 时输出启动时间线
+
+with timeline.phase("import src.flappy"):
+    from src.flappy import Flappy
 
 if __name__ == "__main__":
     asyncio.run(Flappy().start())
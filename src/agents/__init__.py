@@ -0,0 +1,5 @@
+from .autoplayer import AutoPlayer
+
+__all__ = [
+    "AutoPlayer",  # 自动玩家控制器
+]
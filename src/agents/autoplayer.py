@@ -0,0 +1,372 @@
+import math
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..utils.reachability import FlightModel
+
+# 从玩家和管道状态构造飞行模型时使用的参数，作为模型缓存的键
+ModelKey = Tuple[float, float, float, float, float, float, int, int, int, int]
+# 一帧的状态集合：每个速度一个位集
+Rows = Tuple[int, ...]
+
+
+def _depth(row: int, y: int, limit: int = 32) -> int:
+    """位集 row 中第y位到最近的0位的距离（上下取较小值），最多 limit"""
+    depth = 0
+    while depth < limit and y > depth and row >> (y - depth - 1) & 1 and row >> (y + depth + 1) & 1:
+        depth += 1
+    return depth
+
+
+class _GapLanes:
+    """
+    把下一根未生成管道的所有可能间隙打包到同一组位集中一起反向规划
+
+    每个间隙占一段 width 位的通道，通道内与 FlightModel 的位集相同（第i位表示 y=min_y+i）。
+    通道之间的空位比最大位移更宽，移位越过通道边界的位都落在空位中，随后与可存在位置按位与时
+    清除，因此一次 step_back 同时推进所有间隙，耗时只是单个间隙的几倍。
+    """
+
+    def __init__(self, model: FlightModel) -> None:
+        """
+        :param model: 飞行模型，间隙取 model.gap_range 中的所有值
+        """
+        lo, hi = model.gap_range
+        self.model = model
+        self.count = hi - lo + 1
+        shifts = [abs(offset) for _, _, offset in model.gravity] + [abs(model.flap_offset)]
+        self.width = model.alive_mask.bit_length() + max(shifts) + 1
+        self.lowest = sum(1 << (self.width * i) for i in range(self.count))  # 每个通道的第0位
+        self.flap_mask = model.flap_mask * self.lowest
+        self.gap_mask = sum(model.gap_mask(lo + i) << (self.width * i) for i in range(self.count))
+
+    def _unshift(self, row: int, offset: int) -> int:
+        """逐通道的 _unshift：停在顶部的状态可能来自顶部附近的任意位置"""
+        if offset >= 0:
+            return row >> offset
+        offset = -offset
+        return (row << offset) | (row & self.lowest) * ((1 << (offset + 1)) - 1)
+
+    def step_back(self, viable: Sequence[int], mask: int) -> List[int]:
+        """与 FlightModel.step_back 相同，mask 也按通道打包"""
+        m = self.model
+        flap_from = self._unshift(viable[m.flap_idx], m.flap_offset) & self.flap_mask
+        return [(self._unshift(viable[ni], offset) | flap_from) & mask for _, ni, offset in m.gravity]
+
+    def common(self, row: int) -> int:
+        """所有通道的交集，按 FlightModel 的位集返回"""
+        lanes, width = self.count, self.width
+        while lanes > 1:
+            half = (lanes + 1) // 2
+            upper = row >> (width * half)
+            if lanes % 2:
+                upper |= ((1 << width) - 1) << (width * (half - 1))  # 没有对应通道的一半与全1相交
+            row &= upper & ((1 << (width * half)) - 1)
+            lanes = half
+        return row
+
+    def viable_gaps(self, row: int, y: int) -> int:
+        """状态y在多少个间隙的通道中可行"""
+        return bin(row >> y & self.lowest).count("1")
+
+
+class _Plan:
+    """
+    一次规划的结果
+
+    viable[k] 为规划后第k+1帧结束时、能够通过视野内所有已知管道的状态位集（每个速度一个）。
+    unknown[k] 对下一根尚未生成的管道的每个可能间隙求出同样对齐的可行集合（按 _GapLanes 打包），
+    只覆盖新管道生成之前的帧，在后续帧中利用剩余的时间预算逐步计算。robust[k] 是对所有间隙
+    都可行的状态：新管道生成前一帧取各间隙可行集合的交集，再按已知管道反推到之前的帧。
+
+    每帧的状态存为元组：跨帧保留的大量列表会占用列表的空闲链表，使 make allocations
+    统计到的游戏循环的gc计数出现偏差。
+    """
+
+    def __init__(self, gaps: Tuple[int, ...], x_ref: float, viable: List[Rows], masks: List[int],
+                 complete: bool) -> None:
+        """
+        :param gaps: 规划覆盖的管道间隙（按x排序）
+        :param x_ref: 规划时最后一根管道的x坐标
+        :param viable: 每帧的可行状态
+        :param masks: 每帧按已知管道计算的可存在位置，与 viable 对齐
+        :param complete: 是否覆盖到最后一根管道出口（受时间预算限制可能被截断）
+        """
+        self.gaps = gaps
+        self.x_ref = x_ref
+        self.viable = viable
+        self.masks = masks
+        self.complete = complete
+        self.lanes: Optional[_GapLanes] = None  # unknown 的打包方式
+        self.unknown: List[Optional[Rows]] = []  # 每帧各个可能间隙的可行状态（打包）
+        self.robust: List[Optional[Rows]] = []  # 对所有可能间隙都可行的状态
+        self.pending: List[Iterator[None]] = []  # 尚未算完的完整规划、unknown 和 robust
+
+    def discard(self) -> None:
+        """不再使用时丢弃尚未算完的部分，它们引用着规划本身，不丢弃会留下引用环"""
+        self.pending.clear()
+
+
+class AutoPlayer:
+    """
+    自动玩家控制器，每帧决定是否拍打
+
+    对前方的管道用与 Player/Pipes 相同的确定性物理反向动态规划出每帧的可行状态集合
+    （位集表示，见 FlightModel），只在能保持在可行集合中的动作里选择。下一根管道的生成时机
+    是确定的，但间隙未知，因此再对所有可能的间隙一起规划（见 _GapLanes）：新管道生成之前，
+    两个动作都可行时优先保持在对所有间隙都可行的集合中（管道生成后按真实的间隙重新规划），
+    其次选择对更多间隙可行的动作，再其次选择离可行集合边界更远的动作。
+
+    规划结果按管道序列缓存：管道没有变化时后续帧直接查表，只有新管道出现时才重新规划；
+    多只小鸟共用同一个 AutoPlayer 时也共享规划结果。每帧的规划受时间预算限制：
+    已知管道的规划超出预算时缩短视野，完整的规划和未知间隙的规划分摊到之后的多帧中完成。
+    """
+
+    def __init__(self, budget_ms: float = 1.0, horizon_pipes: int = 3, unknown_gaps: bool = True,
+                 margin: int = -1) -> None:
+        """
+        :param budget_ms: 每帧规划的时间预算（毫秒）
+        :param horizon_pipes: 向前规划的已知管道数
+        :param unknown_gaps: 是否对下一根未生成管道的所有可能间隙规划
+        :param margin: 碰撞判定的宽容像素，默认收紧1像素以抵消y坐标的小数部分
+        """
+        self.budget = budget_ms / 1000
+        self.horizon_pipes = horizon_pipes
+        self.unknown_gaps = unknown_gaps
+        self.margin = margin
+        self.frame_cost = 2e-5  # 每帧反向规划的耗时估计（秒），运行中按实测更新
+        self._models: Dict[ModelKey, FlightModel] = {}
+        self._plans: Dict[FlightModel, _Plan] = {}  # 每种飞行模型最近一次的规划
+        self._lanes: Dict[FlightModel, _GapLanes] = {}
+        self.replans = 0  # 重新规划次数
+        self.decisions = 0  # 决策次数
+
+    def reset(self) -> None:
+        """清空规划缓存（新的一局）"""
+        for plan in self._plans.values():
+            plan.discard()
+        self._plans.clear()
+
+    def model_for(self, player, pipes) -> FlightModel:
+        """按玩家当前的物理参数和管道速度获取飞行模型（带缓存）"""
+        modifier = player.speed_boost if player.is_speed_mode else player.speed_modifier
+        pipe = pipes.upper[0] if pipes.upper else None
+        key = (
+            player.flap_acc, player.acc_y, player.max_vel_y, player.min_vel_y, modifier,
+            pipes.pipe_vel_x, pipes.pipe_gap, int(player.w), int(player.h), int(pipe.w) if pipe else 52,
+        )
+        model = self._models.get(key)
+        if model is None:
+            config = player.config
+            model = self._models[key] = FlightModel(
+                flap_acc=int(player.flap_acc), acc_y=int(player.acc_y), max_vel_y=int(player.max_vel_y),
+                min_vel_y=int(player.min_vel_y), y_scale=modifier, pipe_vel_x=pipes.pipe_vel_x,
+                pipe_gap=pipes.pipe_gap, pipe_w=key[9], bird_w=key[7], bird_h=key[8],
+                window_w=config.window.width, window_h=config.window.height, margin=self.margin,
+            )
+        return model
+
+    def upcoming(self, model: FlightModel, pipes) -> List[Tuple[float, int]]:
+        """还没有通过的管道 (x, 间隙上沿y坐标)，最多 horizon_pipes 根"""
+        result = []
+        for pipe in pipes.upper:
+            if pipe.x > model.low_edge and not pipe.destroyed:
+                result.append((pipe.x, int(pipe.y + pipe.h)))
+                if len(result) == self.horizon_pipes:
+                    break
+        return result
+
+    @staticmethod
+    def _exit_frame(model: FlightModel, x: float) -> int:
+        """x处的管道在第几帧之后离开小鸟（该帧仍重叠）"""
+        return max(1, int(math.floor((x - model.low_edge) / -model.pipe_vel_x)) + 1)
+
+    def plan(self, model: FlightModel, upcoming: List[Tuple[float, int]]) -> _Plan:
+        """
+        对当前管道反向规划，从最后一根管道出口推回下一帧
+
+        超出时间预算时先按预算截断视野（末帧只要求存活），完整的规划分摊到之后的帧中计算，
+        算完后替换截断的结果
+        """
+        vel = model.pipe_vel_x
+        frames = self._exit_frame(model, upcoming[-1][0]) if upcoming and vel < 0 else 1
+        limit = max(1, int(self.budget / self.frame_cost))
+        plan = _Plan(tuple(gap for _, gap in upcoming), upcoming[-1][0] if upcoming else 0, [], [], False)
+
+        started = time.perf_counter()
+        if frames <= limit:
+            for _ in self._backward(model, plan, upcoming, frames):
+                pass
+        else:
+            for _ in self._backward(model, plan, upcoming, limit, truncated=True):
+                pass
+            plan.pending.append(self._backward(model, plan, upcoming, frames))
+        elapsed = time.perf_counter() - started
+        self.frame_cost = 0.8 * self.frame_cost + 0.2 * elapsed / min(frames, limit)
+        self.replans += 1
+        return plan
+
+    def _backward(self, model: FlightModel, plan: _Plan, upcoming: List[Tuple[float, int]], frames: int,
+                  truncated: bool = False) -> Iterator[None]:
+        """
+        反向计算 frames 帧的可行集合并写入规划，每算完一段让出一次；完整的规划算完后准备未知间隙
+        """
+        vel = model.pipe_vel_x
+        masks = [model.frame_mask([(x + vel * k, gap) for x, gap in upcoming]) for k in range(1, frames + 1)]
+        viable: List[Rows] = [()] * frames
+        viable[-1] = (masks[-1],) * model.n_vels
+        for k in range(frames - 2, -1, -1):
+            if k % 16 == 0:
+                yield
+            viable[k] = tuple(model.step_back(viable[k + 1], masks[k]))
+        plan.viable, plan.masks, plan.complete = viable, masks, not truncated
+        if not truncated and upcoming and vel < 0 and len(upcoming) < self.horizon_pipes and self.unknown_gaps:
+            self._add_unknown(model, plan, upcoming)
+
+    def _add_unknown(self, model: FlightModel, plan: _Plan, upcoming: List[Tuple[float, int]]) -> None:
+        """为下一根未生成的管道的所有可能间隙准备规划（延迟计算）"""
+        vel = model.pipe_vel_x
+        # 与 Pipes.tick 相同：最后一根管道越过生成位置后的那一帧生成新管道，同一帧内移动
+        last_x = upcoming[-1][0]
+        spawn = 1
+        while last_x + vel * (spawn - 1) >= model.spawn_before:
+            spawn += 1
+        if not 1 < spawn <= len(plan.masks):
+            return
+        lanes = self._lanes.get(model)
+        if lanes is None:
+            lanes = self._lanes[model] = _GapLanes(model)
+        plan.lanes = lanes
+        plan.unknown = [None] * (spawn - 1)
+        plan.robust = [None] * (spawn - 1)
+        spawn_x = model.spawn_x - vel * (spawn - 1)  # 换算成第0帧的位置
+        plan.pending.append(self._unknown(model, plan, upcoming, spawn, spawn_x))
+        plan.pending.append(self._robust(model, plan))
+
+    def _unknown(self, model: FlightModel, plan: _Plan, upcoming: List[Tuple[float, int]], spawn: int,
+                 spawn_x: float) -> Iterator[None]:
+        """逐帧反向计算所有可能间隙的可行集合，每算完一帧让出一次"""
+        lanes = plan.lanes
+        vel = model.pipe_vel_x
+        current = None
+        for k in range(self._exit_frame(model, spawn_x), 0, -1):
+            mask = model.frame_mask([(x + vel * k, gap) for x, gap in upcoming]) * lanes.lowest
+            if k >= spawn and model.low_edge < spawn_x + vel * k < model.high_edge:
+                mask &= lanes.gap_mask
+            current = (mask,) * model.n_vels if current is None else tuple(lanes.step_back(current, mask))
+            if k < spawn:
+                plan.unknown[k - 1] = current
+            yield
+
+    @staticmethod
+    def _robust(model: FlightModel, plan: _Plan) -> Iterator[None]:
+        """新管道生成前一帧取所有可能间隙可行集合的交集，再按已知管道逐帧反推"""
+        robust = plan.robust
+        last = len(robust) - 1
+        current = tuple(plan.lanes.common(row) for row in plan.unknown[last])
+        robust[last] = current
+        for k in range(last - 1, -1, -1):
+            yield
+            current = model.step_back(current, plan.masks[k])
+            robust[k] = tuple(current)
+
+    def _refine(self, plan: _Plan, deadline: float) -> None:
+        """在时间预算内继续计算完整的规划和未知间隙的规划"""
+        while plan.pending and time.perf_counter() < deadline:
+            if next(plan.pending[0], StopIteration) is StopIteration:
+                plan.pending.pop(0)
+
+    def lookup(self, model: FlightModel, upcoming: List[Tuple[float, int]]) -> Tuple[Optional[_Plan], int]:
+        """查找缓存的规划，返回 (规划, 下一帧在规划中的下标)；管道变化或规划用完时返回 (None, 0)"""
+        plan = self._plans.get(model)
+        if plan is None or not upcoming:
+            return None, 0
+        gaps = tuple(gap for _, gap in upcoming)
+        # 已通过的管道从前面移除不影响之后的可行集合，新管道出现时需要重新规划
+        if gaps != plan.gaps[len(plan.gaps) - len(gaps):]:
+            return None, 0
+        step = (plan.x_ref - upcoming[-1][0]) / -model.pipe_vel_x
+        k = int(round(step))
+        if abs(step - k) > 1e-6 or k < 0 or k >= len(plan.viable):
+            return None, 0
+        if not plan.complete and k > len(plan.viable) // 2:
+            return None, 0  # 截断的规划只使用前一半，之后向前延伸
+        return plan, k
+
+    @staticmethod
+    def _choose(plan: _Plan, k: int, fall: Tuple[int, int], flap: Tuple[int, int]) -> Optional[bool]:
+        """
+        两个动作都可行时的选择
+
+        :param fall: 不拍打时的 (速度下标, y下标)
+        :param flap: 拍打时的 (速度下标, y下标)
+        :return: True 表示拍打，无法区分时返回 None
+        """
+        (fall_v, fall_y), (flap_v, flap_y) = fall, flap
+        viable = plan.viable[k]
+        # 优先保持在对所有可能间隙都可行的集合中
+        robust = plan.robust[k] if k < len(plan.robust) else None
+        if robust is not None:
+            fall_robust = robust[fall_v] >> fall_y & 1
+            flap_robust = robust[flap_v] >> flap_y & 1
+            if fall_robust != flap_robust:
+                return bool(flap_robust)
+            if fall_robust:
+                viable = robust  # 都在其中时比较离这个集合边界的距离
+        # 其次选择对更多可能间隙仍然可行的动作
+        rows = plan.unknown[k] if k < len(plan.unknown) else None
+        if rows is not None:
+            fall_score = plan.lanes.viable_gaps(rows[fall_v], fall_y)
+            flap_score = plan.lanes.viable_gaps(rows[flap_v], flap_y)
+            if fall_score != flap_score:
+                return flap_score > fall_score
+        # 再其次选择离可行集合边界更远的动作，对y坐标的小数部分和之后的管道更宽容
+        fall_depth = _depth(viable[fall_v], fall_y)
+        flap_depth = _depth(viable[flap_v], flap_y)
+        if fall_depth != flap_depth:
+            return flap_depth > fall_depth
+        return None
+
+    async def request(self, player, pipes) -> bool:
+        """与 PolicyController 相同的异步接口，规划在当前线程内完成"""
+        return self.decide(player, pipes)
+
+    def decide(self, player, pipes) -> bool:
+        """
+        决定本帧是否拍打（在玩家更新之前调用）
+
+        :param player: Player 实体
+        :param pipes: Pipes 实体
+        :return: True 表示拍打
+        """
+        started = time.perf_counter()
+        self.decisions += 1
+        model = self.model_for(player, pipes)
+        upcoming = self.upcoming(model, pipes)
+        plan, k = self.lookup(model, upcoming)
+        if plan is None:
+            if model in self._plans:
+                self._plans[model].discard()
+            plan = self._plans[model] = self.plan(model, upcoming)
+            k = 0
+        self._refine(plan, started + self.budget)
+
+        (fall_v, fall_y), (flap_v, flap_y) = model.successors(int(math.floor(player.y)), int(player.vel_y))
+        can_flap = player.y > player.min_y if model.flap_acc < 0 else player.y < player.max_y
+        viable = plan.viable[k]
+        fall_ok = bool(viable[fall_v] >> fall_y & 1)
+        flap_ok = can_flap and bool(viable[flap_v] >> flap_y & 1)
+        if fall_ok != flap_ok:
+            return flap_ok  # 只有一个动作可行
+
+        if fall_ok:
+            choice = self._choose(plan, k, (fall_v, fall_y), (flap_v, flap_y))
+            if choice is not None:
+                return choice
+
+        # 无法区分时朝下一个间隙的中心飞
+        if upcoming:
+            target = upcoming[0][1] + (model.pipe_gap - model.bird_h) / 2
+        else:
+            target = model.viewport_height / 2
+        return player.y > target if model.flap_acc < 0 else player.y < target
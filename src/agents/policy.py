@@ -0,0 +1,360 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 神经网络策略需要NumPy，游戏本身不依赖
+    np = None
+
+OBSERVATION_SIZE = 9  # 每只小鸟的观测维度，见 observe
+
+
+def observe(player, pipes) -> Tuple[float, ...]:
+    """
+    把玩家和前方两根管道的状态编码为策略网络的输入
+
+    坐标按窗口大小归一化：小鸟y、y速度、前两根管道的相对x和间隙上下沿、
+    速度倍数、重力方向。已经通过或被摧毁的管道不计入。
+
+    :param player: Player 实体
+    :param pipes: Pipes 实体
+    """
+    config = player.config
+    width = config.window.width
+    height = config.window.viewport_height
+    ahead = [pipe for pipe in pipes.upper if pipe.x + pipe.w > player.x and not pipe.destroyed]
+    features = [player.y / height, player.vel_y / 10]
+    for i in range(2):
+        if i < len(ahead):
+            pipe = ahead[i]
+            gap_top = pipe.y + pipe.h
+            features += [(pipe.x - player.x) / width, gap_top / height, (gap_top + pipes.pipe_gap) / height]
+        else:  # 还没有生成的管道视为在屏幕外、间隙居中
+            features += [1.0, 0.4 - pipes.pipe_gap / height / 2, 0.4 + pipes.pipe_gap / height / 2]
+    modifier = player.speed_boost if player.is_speed_mode else player.speed_modifier
+    features.append(modifier if player.acc_y >= 0 else -modifier)
+    return tuple(features)
+
+
+def flap_decisions(output) -> "np.ndarray":
+    """
+    把策略输出转换为是否拍打
+
+    输出形状为 (n,) 或 (n, 1) 时大于0表示拍打；(n, 2) 时按 [不拍打, 拍打] 取较大者。
+    """
+    output = np.asarray(output)
+    if output.ndim == 2 and output.shape[1] == 2:
+        return output[:, 1] > output[:, 0]
+    return output.reshape(len(output)) > 0
+
+
+class MLPPolicy:
+    """
+    纯NumPy实现的多层感知机策略，隐藏层使用tanh激活，输出层为线性
+    """
+
+    def __init__(self, layers: Sequence[Tuple["np.ndarray", "np.ndarray"]]) -> None:
+        """
+        :param layers: 每层的 (权重 (输入维度, 输出维度), 偏置) 列表
+        """
+        if np is None:
+            raise RuntimeError("MLPPolicy 需要安装 numpy")
+        self.layers = [(np.asarray(w, np.float32), np.asarray(b, np.float32)) for w, b in layers]
+
+    @classmethod
+    def load(cls, path: str) -> "MLPPolicy":
+        """从 .npz 文件加载，权重和偏置依次保存为 w0, b0, w1, b1, ..."""
+        with np.load(path) as data:
+            count = len([name for name in data.files if name.startswith("w")])
+            return cls([(data[f"w{i}"], data[f"b{i}"]) for i in range(count)])
+
+    @classmethod
+    def random(cls, hidden: Sequence[int] = (16,), seed: int = 0) -> "MLPPolicy":
+        """随机初始化的策略，用于测试推理流程的吞吐量"""
+        if np is None:
+            raise RuntimeError("MLPPolicy 需要安装 numpy")
+        rng = np.random.default_rng(seed)
+        sizes = [OBSERVATION_SIZE, *hidden, 1]
+        return cls([(rng.normal(0, 1 / np.sqrt(a), (a, b)), np.zeros(b)) for a, b in zip(sizes, sizes[1:])])
+
+    def save(self, path: str) -> None:
+        """保存为 .npz 文件"""
+        arrays = {}
+        for i, (w, b) in enumerate(self.layers):
+            arrays[f"w{i}"], arrays[f"b{i}"] = w, b
+        np.savez(path, **arrays)
+
+    def __call__(self, batch: "np.ndarray") -> "np.ndarray":
+        """
+        :param batch: (n, OBSERVATION_SIZE) 的观测
+        :return: (n, 输出维度) 的输出
+        """
+        x = batch
+        last = len(self.layers) - 1
+        for i, (w, b) in enumerate(self.layers):
+            x = x @ w
+            x += b
+            if i < last:
+                np.tanh(x, out=x)
+        return x
+
+
+class OnnxPolicy:
+    """
+    ONNX模型策略，使用onnxruntime在CPU上推理；模型输入为 (n, OBSERVATION_SIZE) 的float32
+    """
+
+    def __init__(self, path: str, threads: int = 1) -> None:
+        """
+        :param path: .onnx 模型文件
+        :param threads: 推理线程数；批量推理在后台线程进行，默认不再额外并行
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("OnnxPolicy 需要安装 onnxruntime") from None
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: "np.ndarray") -> "np.ndarray":
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def load_policy(path: str):
+    """
+    按文件扩展名加载策略：.onnx 使用 OnnxPolicy，.npz 使用 MLPPolicy；"random" 为随机初始化的MLP
+    """
+    if path == "random":
+        return MLPPolicy.random()
+    if path.endswith(".onnx"):
+        return OnnxPolicy(path)
+    return MLPPolicy.load(path)
+
+
+class PolicyRunner:
+    """
+    批量策略推理
+
+    同一事件循环中并发运行的多局游戏各自提交观测，本轮事件循环中的所有请求合并为一个
+    NumPy批次，由后台线程一次推理，结果通过 asyncio.Future 返回。游戏循环最多等待
+    deadline_ms，超时的请求按不拍打处理，推理再慢也不会拖住渲染。
+    """
+
+    def __init__(self, policy, capacity: int = 1024, deadline_ms: float = 5.0) -> None:
+        """
+        :param policy: 可调用对象，输入 (n, OBSERVATION_SIZE) 的float32数组，输出见 flap_decisions
+        :param capacity: 单个批次的最大观测数，超出时提前提交
+        :param deadline_ms: 等待推理结果的最长时间（毫秒）
+        """
+        if np is None:
+            raise RuntimeError("PolicyRunner 需要安装 numpy")
+        self.policy = policy
+        self.capacity = capacity
+        self.deadline = deadline_ms / 1000
+        self._free: List["np.ndarray"] = []  # 空闲的批次缓冲区，推理完成后归还
+        self._batch = self._buffer()
+        self._futures: List[asyncio.Future] = []  # 当前批次每行对应的请求
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        # 统计
+        self.batches = 0  # 推理批次数
+        self.requests = 0  # 请求数
+        self.timeouts = 0  # 超时按不拍打处理的请求数
+        self.infer_time = 0.0  # 推理总耗时（秒）
+
+    def _buffer(self) -> "np.ndarray":
+        return self._free.pop() if self._free else np.zeros((self.capacity, OBSERVATION_SIZE), np.float32)
+
+    def infer(self, batch: "np.ndarray") -> "np.ndarray":
+        """同步推理一个批次，返回是否拍打的布尔数组"""
+        started = time.perf_counter()
+        flaps = flap_decisions(self.policy(batch))
+        self.infer_time += time.perf_counter() - started
+        self.batches += 1
+        return flaps
+
+    def request(self, observation: Sequence[float]) -> "asyncio.Future":
+        """
+        提交一个观测，返回结果为是否拍打的 Future；本轮事件循环结束时合并提交
+        """
+        loop = asyncio.get_running_loop()
+        if len(self._futures) == self.capacity:
+            self.flush()
+        row = len(self._futures)
+        self._batch[row] = observation
+        future = loop.create_future()
+        self._futures.append(future)
+        self.requests += 1
+        if row == 0:
+            # 排在本轮已就绪的协程之后执行，同一帧内其他游戏的请求都能进入这个批次
+            loop.call_soon(self.flush)
+        return future
+
+    async def decide(self, observation: Sequence[float]) -> bool:
+        """提交观测并等待结果，超时返回 False（不拍打）"""
+        return await self.request(observation)
+
+    def flush(self) -> None:
+        """把当前批次交给后台线程推理"""
+        if not self._futures:
+            return
+        loop = asyncio.get_running_loop()
+        futures, batch = self._futures, self._batch
+        self._futures, self._batch = [], self._buffer()
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="policy-inference", daemon=True)
+            self._worker.start()
+        self._jobs.put((loop, batch, futures))
+        loop.call_later(self.deadline, self._expire, futures)
+
+    def _run(self) -> None:
+        """后台线程：依次推理提交的批次"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            loop, batch, futures = job
+            try:
+                flaps = self.infer(batch[:len(futures)]).tolist()
+            except Exception:  # 推理出错时本批次按不拍打处理，不影响游戏
+                flaps = [False] * len(futures)
+            self._free.append(batch)
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._resolve, futures, flaps)
+
+    @staticmethod
+    def _resolve(futures: List["asyncio.Future"], flaps: List[bool]) -> None:
+        for future, flap in zip(futures, flaps):
+            if not future.done():
+                future.set_result(flap)
+
+    def _expire(self, futures: List["asyncio.Future"]) -> None:
+        """截止时间到达时，尚未返回的请求按不拍打处理"""
+        for future in futures:
+            if not future.done():
+                future.set_result(False)
+                self.timeouts += 1
+
+    def close(self) -> None:
+        """停止后台线程"""
+        if self._worker is not None:
+            self._jobs.put(None)
+            self._worker.join()
+            self._worker = None
+
+
+class PolicyController:
+    """
+    用策略网络控制一只小鸟，接口与 AutoPlayer 相同
+    """
+
+    def __init__(self, runner: PolicyRunner) -> None:
+        """
+        :param runner: 批量推理器，多只小鸟可以共用
+        """
+        self.runner = runner
+        self._row = np.zeros((1, OBSERVATION_SIZE), np.float32)
+
+    def reset(self) -> None:
+        """新的一局（策略无状态）"""
+
+    def decide(self, player, pipes) -> bool:
+        """同步推理，不经过批次合并"""
+        self._row[0] = observe(player, pipes)
+        return bool(self.runner.infer(self._row)[0])
+
+    async def request(self, player, pipes) -> bool:
+        """经批量推理决定是否拍打，超时不拍打"""
+        return await self.runner.decide(observe(player, pipes))
+
+
+class _HeadlessGame:
+    """批量评测用的无界面对局：只有玩家、管道和地面，提供模式钩子需要的属性"""
+
+    def __init__(self, config, mode, stream) -> None:
+        from ..entities import Floor, Pipes, Player
+
+        self.config = config
+        self.player = Player(config)
+        self.pipes = Pipes(config, stream)
+        self.floor = Floor(config)
+        self.score = 0
+        mode.setup(self)
+
+
+async def _play_headless(config, mode, runner: PolicyRunner, frames: int, results: List[int], stream_for) -> None:
+    """运行一局接一局的无界面对局，直到用完帧数"""
+    queue_ = config.render_queue
+    game = _HeadlessGame(config, mode, stream_for())
+    for _ in range(frames):
+        player, pipes = game.player, game.pipes
+        if await runner.decide(observe(player, pipes)):
+            player.flap()
+        for pipe in pipes.upper:
+            if player.pass_pipe(pipe):
+                game.score += 1
+        game.floor.tick()
+        pipes.tick()
+        player.tick()
+        queue_.clear()  # 不输出画面
+        if player.collided(pipes, game.floor):
+            results.append(game.score)
+            game = _HeadlessGame(config, mode, stream_for())
+    results.append(game.score)
+
+
+def main() -> None:
+    """
+    批量评测策略：make evaluate POLICY=policy.npz GAMES=256
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="无界面批量评测策略网络")
+    parser.add_argument("policy", help='.npz 或 .onnx 策略文件，"random" 为随机初始化的MLP')
+    parser.add_argument("--games", type=int, default=64, help="并发对局数")
+    parser.add_argument("--frames", type=int, default=1000, help="每个对局槽位运行的帧数")
+    parser.add_argument("--mode", default="CLASSIC", help="游戏模式")
+    parser.add_argument("--seed", default=None, help='关卡种子，"daily" 为每日挑战；默认随机')
+    parser.add_argument("--deadline-ms", type=float, default=5.0, help="等待推理结果的最长时间")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+
+    from ..modes import get_mode
+    from ..utils import GameConfig, Images, LevelStream, Sounds, Window, parse_seed
+
+    pygame.init()
+    window = Window(288, 512)
+    screen = pygame.display.set_mode((window.width, window.height))
+    config = GameConfig(screen=screen, clock=pygame.time.Clock(), fps=0, window=window,
+                        images=Images(), sounds=Sounds())
+    mode = get_mode(args.mode.upper())
+    seed = parse_seed(args.seed)
+    level = LevelStream(seed, window.viewport_height, window.height) if seed is not None else None
+    runner = PolicyRunner(load_policy(args.policy), capacity=max(1, args.games), deadline_ms=args.deadline_ms)
+
+    async def run() -> List[int]:
+        results: List[int] = []
+        await asyncio.gather(*(
+            _play_headless(config, mode, runner, args.frames, results, lambda: level and level.pipes())
+            for _ in range(args.games)
+        ))
+        return results
+
+    started = time.perf_counter()
+    scores = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    runner.close()
+    print(f"rounds: {len(scores)}  mean score: {sum(scores) / len(scores):.2f}  best: {max(scores)}")
+    print(f"frames/s: {args.games * args.frames / elapsed:.0f}  batches: {runner.batches}  "
+          f"mean batch: {runner.requests / max(1, runner.batches):.1f}  "
+          f"inference: {runner.infer_time / max(1, runner.batches) * 1e6:.0f}us/batch  timeouts: {runner.timeouts}")
@@ -0,0 +1,239 @@
+"""
+稳态分配检查
+
+make allocations 在SDL的dummy驱动下由自动玩家在固定关卡上运行每个游戏模式的 Flappy.play，
+跳过开头的若干帧后逐帧统计（自动玩家自身的分配不计入）：
+
+- 净对象数：gc 第0代计数的增量，即受垃圾回收跟踪的对象（元组、列表、实例等）的分配数减去
+  释放数。稳态下每帧创建的临时对象在帧内释放，净增长为0；持续的净增长会不断触发垃圾回收
+- 净字节数：tracemalloc 统计的已分配内存的增量
+
+只统计相邻两帧都在 play 中的帧间隔，两局之间重建实体、每局第一帧创建HUD等不计入。生成新
+管道、道具会分配对象，旧的移除后才释放，因此按完整的管道生成周期统计：周期从生成新管道的
+一帧开始，到之后某次生成新管道、且场上的管道数和道具数与周期开始时相同的一帧结束，这时
+新生成和已移除的实体一样多。每局结束时未完成的周期不计入。旋转精灵缓存（有上限）填满之前
+新增的条目同样扣除，每个条目的键是一个元组。
+
+稳态下完整周期的净对象数应不大于0；净字节数包含元组、浮点数空闲链表的填充，只作参考。
+净对象数大于0时列出增长最多的代码行，并以状态码1退出。
+"""
+import asyncio
+import gc
+import sys
+import tracemalloc
+from typing import Dict, List
+
+from .bench import BENCH_SEED, _environment, _Finished
+
+OBJECT_TOLERANCE = 0.0  # 平均每帧允许的净对象数：完整的周期内不应有净增长
+
+
+class _Uncounted:
+    """
+    包装自动玩家，把它在 request 中的分配从统计中扣除
+
+    AutoPlayer 的规划结果按管道缓存，重新规划时整体替换，这些分配属于测试用的控制器，
+    不属于游戏循环。
+    """
+
+    def __init__(self, controller, excluded: List[int]) -> None:
+        """
+        :param controller: 自动玩家
+        :param excluded: [净对象数, 净字节数]，累加控制器的分配
+        """
+        self.controller = controller
+        self.excluded = excluded
+
+    def reset(self) -> None:
+        self.controller.reset()
+
+    async def request(self, player, pipes) -> bool:
+        excluded = self.excluded
+        excluded[0] -= gc.get_count()[0]
+        excluded[1] -= tracemalloc.get_traced_memory()[0]
+        flap = await self.controller.request(player, pipes)
+        excluded[0] += gc.get_count()[0]
+        excluded[1] += tracemalloc.get_traced_memory()[0]
+        return flap
+
+
+class _Meter:
+    """
+    替换 Flappy.play 和 config.present，按完整的管道生成周期累计 play 中每帧的净分配
+
+    计数都是创建时就有的属性，统计本身不产生净分配。
+    """
+
+    def __init__(self, game, excluded: List[int], frames: int, warmup: int) -> None:
+        """
+        :param game: Flappy 实例
+        :param excluded: 控制器的 [净对象数, 净字节数]，见 _Uncounted
+        :param frames: 至少统计的帧数，在达到之后的第一个周期结束时停止
+        :param warmup: 开始统计前跳过的帧数
+        """
+        from .entities.player import rotated_sprites
+
+        self.game = game
+        self.excluded = excluded
+        self.frames = frames
+        self.sprites = rotated_sprites
+        self.play = game.play
+        self.present = game.config.present
+        self.playing = False
+        self.remaining = warmup  # 还要跳过的帧数
+        self.counting = False  # 上一帧是否在统计中
+        self.count = self.traced = self.cached = 0  # 上一帧的gc计数、已分配字节、旋转精灵缓存的条目数
+        self.total_frames = self.total_objects = self.total_bytes = 0  # 只包含完整的周期
+        self.rounds = 0
+        self.cycle_frames = self.cycle_objects = self.cycle_bytes = 0  # 当前周期
+        self.cycle_pipes = self.cycle_powerups = None  # 当前周期开始时的管道数、道具数
+        self.last_pipe = None  # 最近生成的管道
+        self.snapshot = None  # 统计开始时的快照，用于定位增长
+
+    async def measured_play(self) -> None:
+        self.playing, self.counting = True, False
+        self.cycle_pipes = self.cycle_powerups = self.last_pipe = None  # 丢弃上一局未完成的周期
+        self.rounds += 1
+        try:
+            await self.play()
+        finally:
+            self.playing = self.counting = False
+            self.last_pipe = None
+
+    def end_of_cycle(self) -> bool:
+        """本帧生成了新管道，并且场上的管道数和道具数与周期开始时相同"""
+        upper = self.game.pipes.upper
+        if not upper or upper[-1] is self.last_pipe:
+            return False
+        first = self.last_pipe is None
+        self.last_pipe = upper[-1]
+        if first:
+            return False  # 每局开始统计的第一帧只记下最后一根管道，之后真正生成新管道时周期才开始
+        powerups = len(self.game.powerup_manager.powerups)
+        if self.cycle_pipes is None:  # 第一次生成管道，周期从这里开始
+            self.cycle_pipes, self.cycle_powerups = len(upper), powerups
+            self.cycle_frames = self.cycle_objects = self.cycle_bytes = 0
+            return False
+        return self.cycle_pipes == len(upper) and self.cycle_powerups == powerups
+
+    def measured_present(self) -> None:
+        self.present()
+        if not self.playing:
+            return
+        if self.remaining:
+            self.remaining -= 1
+        elif not self.counting:
+            if self.snapshot is None:
+                self.snapshot = tracemalloc.take_snapshot()
+            self.counting = True
+        else:
+            self.add_frame()
+            return
+        self.read()
+
+    def read(self) -> None:
+        """记下本帧的计数"""
+        excluded = self.excluded
+        self.count = gc.get_count()[0] - excluded[0]
+        self.traced = tracemalloc.get_traced_memory()[0] - excluded[1]
+        self.cached = len(self.sprites)
+
+    def add_frame(self) -> None:
+        """累计本帧的增量，周期结束时计入总数"""
+        count, traced, cached = self.count, self.traced, self.cached
+        self.read()
+        self.cycle_frames += 1
+        self.cycle_objects += self.count - count - (self.cached - cached)
+        self.cycle_bytes += self.traced - traced
+        if self.end_of_cycle():
+            self.total_frames += self.cycle_frames
+            self.total_objects += self.cycle_objects
+            self.total_bytes += self.cycle_bytes
+            self.cycle_frames = self.cycle_objects = self.cycle_bytes = 0
+            if self.total_frames >= self.frames:
+                raise _Finished
+
+
+def _growth(before, after) -> List[str]:
+    """两次 tracemalloc 快照之间增长最多的代码行"""
+    growth = []
+    if before is not None:
+        for stat in after.compare_to(before, "lineno")[:5]:
+            if stat.size_diff > 0:
+                frame = stat.traceback[0]
+                growth.append(f"{frame.filename}:{frame.lineno} {stat.size_diff:+d}B {stat.count_diff:+d}")
+    return growth
+
+
+def steady_state(mode: str, frames: int, warmup: int = 300) -> Dict[str, object]:
+    """
+    运行一个游戏模式，按完整的管道生成周期统计 play 中平均每帧的净分配
+
+    :param mode: 游戏模式名
+    :param frames: 至少统计的帧数，在达到之后的第一个周期结束时停止
+    :param warmup: 开始统计前跳过的帧数（可以跨越多局），期间填满旋转精灵等有上限的缓存
+    :return: {"frames", "rounds", "objects": 平均每帧净对象数, "bytes": 平均每帧净字节数, "growth": 增长最多的代码行}
+    """
+    from .flappy import Flappy
+
+    game = Flappy(seed=BENCH_SEED, autoplay=mode)
+    game.config.fps = 0  # 不限帧率
+    game.run_warmup(everything=True)
+    excluded = [0, 0]  # 控制器的净对象数、净字节数
+    game.autoplayer = _Uncounted(game.autoplayer, excluded)
+    meter = _Meter(game, excluded, frames, warmup)
+    game.play = meter.measured_play
+    game.config.present = meter.measured_present
+    gc.collect()
+    gc.disable()  # 不回收时第0代计数只反映分配与释放之差
+    tracemalloc.start()
+    try:
+        asyncio.run(game.start())
+    except _Finished:
+        pass
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        gc.enable()
+
+    count = max(meter.total_frames, 1)
+    return {
+        "frames": meter.total_frames,
+        "rounds": meter.rounds,
+        "objects": meter.total_objects / count,
+        "bytes": meter.total_bytes / count,
+        "growth": _growth(meter.snapshot, snapshot),
+    }
+
+
+def main() -> None:
+    """
+    make allocations
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="检查游戏进行中每帧的净分配")
+    parser.add_argument("--frames", type=int, default=1500, help="每个模式至少统计的帧数（完整的管道生成周期）")
+    parser.add_argument("--only", default=None, help="只检查名称包含该字符串的模式")
+    parser.add_argument("--objects", type=float, default=OBJECT_TOLERANCE, help="平均每帧允许的净对象数")
+    args = parser.parse_args()
+
+    _environment()
+    from .modes import all_modes
+
+    failures = []
+    print(f"{'mode':10} {'frames':>7} {'rounds':>7} {'objects/frame':>14} {'bytes/frame':>12}")
+    for spec in all_modes():
+        if args.only and args.only not in spec.name:
+            continue
+        result = steady_state(spec.name, args.frames)
+        failed = result["objects"] > args.objects
+        print(f"{spec.name:10} {result['frames']:7d} {result['rounds']:7d} {result['objects']:14.3f} "
+              f"{result['bytes']:12.1f}{'  FAIL' if failed else ''}")
+        if failed:
+            failures.append(spec.name)
+            for line in result["growth"]:
+                print(f"    {line}")
+    if failures:
+        print(f"net allocations per frame above {args.objects}: {', '.join(failures)}")
+        sys.exit(1)
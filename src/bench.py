@@ -0,0 +1,359 @@
+"""
+性能基准
+
+make bench 在SDL的dummy驱动下运行两类基准：
+
+- 微基准：get_hit_mask、pixel_collision、各玩家模式下的 Player.draw_player、Pipes.tick 和
+  remove_old_pipes，每项用 timeit 重复多轮，记录每次调用的最短和中位耗时（微秒）
+- 整局基准：每个游戏模式由自动玩家在固定种子的关卡上无界面运行 play()，记录每帧耗时（毫秒），
+  包括夜间、极速等模式的覆盖层；另有 FLOCK_BOTS 只AI小鸟同场的经典模式（观战场景）和回放
+  GHOST_RUNS 条轨迹的经典模式（幽灵赛跑）。只计 play() 中的帧，计时期间一局结束（自动玩家
+  撞毁）时命令以状态码1退出
+
+结果写入JSON；存在基线文件时逐项比较中位耗时，变慢超过阈值的项目视为退步，命令以状态码1退出。
+make bench-baseline 把当前结果保存为基线。
+
+另外检查自动玩家在极速模式下能否在基准关卡上存活 SURVIVAL_FRAMES 帧，提前撞毁时同样以状态码1退出。
+"""
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_RESULTS = "bench-results.json"  # 本次结果
+DEFAULT_BASELINE = "bench-baseline.json"  # 基线
+REGRESSION_THRESHOLD = 0.15  # 中位耗时比基线慢超过这个比例视为退步（整局基准的波动约10%）
+BENCH_SEED = 20240501  # 整局基准使用的关卡种子
+FLOCK_BOTS = 300  # 观战场景的AI小鸟数
+SURVIVAL_FRAMES = 3000  # 极速模式下自动玩家在基准关卡上至少存活的帧数
+
+
+class _Finished(Exception):
+    """整局基准达到帧数"""
+
+
+class _Crashed(Exception):
+    """整局基准的计时区间内一局结束（自动玩家撞毁）"""
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> Dict[str, object]:
+    """
+    测量一个函数每次调用的耗时：自动选择每轮次数（每轮至少0.2秒），重复 repeat 轮
+
+    :return: {"unit": "us", "min": 最短, "median": 中位, "number": 每轮次数}
+    """
+    timer = timeit.Timer(func)  # timeit 计时期间关闭垃圾回收
+    number, _ = timer.autorange()
+    runs = [total / number * 1e6 for total in timer.repeat(repeat, number)]
+    return {"unit": "us", "min": min(runs), "median": statistics.median(runs), "number": number}
+
+
+def _frame_stats(times: List[float]) -> Dict[str, object]:
+    """每帧耗时（秒）的统计，单位毫秒"""
+    values = sorted(t * 1000 for t in times)
+    return {
+        "unit": "ms",
+        "frames": len(values),
+        "median": statistics.median(values),
+        "mean": statistics.fmean(values),
+        "p95": values[int(len(values) * 0.95)],
+        "max": values[-1],
+    }
+
+
+def _environment() -> None:
+    """无界面、无声音，统计数据和轨迹写入临时目录，不影响玩家的成绩"""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    os.environ["FLAPPY_AUDIO"] = "off"
+    os.environ.setdefault("FLAPPY_STATS_DB", os.path.join(tempfile.mkdtemp(prefix="flappy-bench-"), "stats.db"))
+    for name in ("FLAPPY_AUTOPLAY", "FLAPPY_POLICY", "FLAPPY_SEED", "FLAPPY_DISPLAY", "FLAPPY_FULLSCREEN",
+                 "FLAPPY_RENDERER", "FLAPPY_STARTUP_REPORT", "FLAPPY_STARTUP_BUDGET_MS", "FLAPPY_MEMORY",
+                 "FLAPPY_FPS", "FLAPPY_CAPTURE", "FLAPPY_FIXED_STEP", "FLAPPY_PLAYERS", "FLAPPY_BOTS",
+                 "FLAPPY_RACE", "FLAPPY_RACERS", "FLAPPY_RACE_MODE", "FLAPPY_GHOSTS", "DEBUG"):
+        os.environ.pop(name, None)
+    os.environ["FLAPPY_GHOST_DIR"] = tempfile.mkdtemp(prefix="flappy-bench-ghosts-")  # 不回放、不保存玩家的轨迹
+
+
+def micro_benchmarks() -> Dict[str, Dict[str, object]]:
+    """运行所有微基准"""
+    import pygame
+
+    from .entities import Pipes, Player
+    from .entities.player import PlayerMode
+    from .utils import GameConfig, Images, LevelStream, Sounds, Window, get_hit_mask, pixel_collision
+
+    pygame.display.init()
+    window = Window(288, 512)
+    screen = pygame.display.set_mode((window.width, window.height))
+    config = GameConfig(screen=screen, clock=pygame.time.Clock(), fps=0, window=window,
+                        images=Images(), sounds=Sounds(enabled=False))
+    queue = config.render_queue
+    results = {}
+
+    # 碰撞掩码：绕过缓存，测量实际计算
+    compute_mask = get_hit_mask.__wrapped__
+    for name, image in (("player", config.images.player[0]), ("pipe", config.images.pipe[1])):
+        results[f"get_hit_mask[{name}]"] = measure(lambda image=image: compute_mask(image))
+
+    # 逐像素碰撞：小鸟与管道重叠（命中）和只有矩形重叠（小鸟透明的角落擦过管道，扫描整个交集）
+    bird, pipe = config.images.player[0], config.images.pipe[1]
+    bird_mask, pipe_mask = get_hit_mask(bird), get_hit_mask(pipe)
+    pipe_rect = pipe.get_rect(topleft=(100, 200))
+    for name, bird_rect in (("hit", bird.get_rect(center=pipe_rect.midleft)),
+                            ("corner", bird.get_rect(bottomright=(pipe_rect.x + 3, pipe_rect.y + 3)))):
+        results[f"pixel_collision[{name}]"] = measure(
+            lambda bird_rect=bird_rect: pixel_collision(bird_rect, pipe_rect, bird_mask, pipe_mask))
+
+    # 绘制玩家：角度在飞行范围内循环，包含旋转精灵缓存的命中和淘汰
+    angles = list(range(-90, 46, 3))
+    for mode in (PlayerMode.NORMAL, PlayerMode.REVERSE, PlayerMode.GHOST, PlayerMode.NIGHT, PlayerMode.SPEED):
+        for invincible in (False, True):
+            player = Player(config)
+            player.set_mode(mode)
+            player.invincible = invincible
+
+            def draw(player=player, step=itertools.count()):
+                player.rot = angles[next(step) % len(angles)]
+                player.draw_player(queue)
+                queue.clear()
+
+            label = mode.name.lower() + ("+invincible" if invincible else "")
+            results[f"draw_player[{label}]"] = measure(draw)
+
+    # 管道：固定关卡，包含生成和移除
+    level = LevelStream(BENCH_SEED, window.viewport_height, window.height)
+    pipes = Pipes(config, level.pipes())
+
+    def tick():
+        pipes.tick()
+        queue.clear()
+
+    results["Pipes.tick"] = measure(tick)
+    results["Pipes.remove_old_pipes"] = measure(pipes.remove_old_pipes)
+    pygame.display.quit()
+    return results
+
+
+def _save_ghosts(mode: str, count: int, frames: int) -> None:
+    """
+    在基准关卡上保存 count 条合成的轨迹（上下起伏，角度在飞行范围内变化），覆盖整个计时区间
+    """
+    from .utils import GhostRecorder, GhostStore, LevelStream, Window
+
+    window = Window(288, 512)
+    level = LevelStream(BENCH_SEED, window.viewport_height, window.height)
+    store = GhostStore()
+    for i in range(count):
+        recorder = GhostRecorder()
+        for frame in range(frames):
+            recorder.ys.append(int((200 + 100 * math.sin((frame + 37 * i) / 15)) * 4))
+            recorder.rots.append(20 - (frame * 3 + i * 11) % 111)
+        store.save(level, mode, i, recorder)
+
+
+def play_benchmark(mode: str, frames: int, warmup: int = 30, bots: int = 0, ghosts: int = 0) -> Dict[str, object]:
+    """
+    由自动玩家在固定关卡上运行一个游戏模式，返回每帧耗时的统计
+
+    只统计 play() 中相邻两帧的间隔，游戏结束和欢迎界面的帧不计入；计时区间内一局结束时
+    抛出 _Crashed。
+
+    :param mode: 游戏模式名
+    :param frames: 计时的帧数
+    :param warmup: 开始计时前跳过的帧数
+    :param bots: 同场的AI小鸟数
+    :param ghosts: 回放的轨迹数
+    """
+    from .flappy import Flappy
+
+    # 每次使用空的轨迹目录，前面的基准保存的轨迹不影响本次
+    os.environ["FLAPPY_GHOST_DIR"] = tempfile.mkdtemp(prefix="flappy-bench-ghosts-")
+    if ghosts:
+        _save_ghosts(mode, ghosts, warmup + frames + 10)
+    game = Flappy(seed=BENCH_SEED, autoplay=mode, bots=bots)
+    game.config.fps = 0  # 不限帧率
+    game.run_warmup(everything=True)
+    play = game.play
+    present = game.config.present
+    times: List[float] = []
+    last = [0.0]
+    playing = [False]
+
+    async def timed_play():
+        playing[0], last[0] = True, 0.0
+        try:
+            await play()
+        finally:
+            playing[0] = False
+        raise _Crashed(f"{mode}: round ended after {len(times)} of {warmup + frames} frames")
+
+    def timed_present():
+        present()
+        if not playing[0]:
+            return
+        now = time.perf_counter()
+        if last[0]:
+            times.append(now - last[0])
+        last[0] = now
+        if len(times) >= warmup + frames:
+            raise _Finished
+
+    game.play = timed_play
+    game.config.present = timed_present
+    try:
+        asyncio.run(game.start())
+    except _Finished:
+        pass
+    return _frame_stats(times[warmup:])
+
+
+def survival(mode: str, frames: int) -> int:
+    """
+    由自动玩家在固定关卡上运行一个游戏模式的第一局
+
+    :return: 撞毁前的帧数，存活到 frames 帧时返回 frames
+    """
+    from .flappy import Flappy
+
+    game = Flappy(seed=BENCH_SEED, autoplay=mode)
+    game.config.fps = 0  # 不限帧率
+    game.run_warmup(everything=True)
+    autoplayer = game.autoplayer
+    play = game.play
+    present = game.config.present
+
+    async def first_round():
+        await play()
+        raise _Finished  # 撞毁
+
+    def counted_present():
+        present()
+        if autoplayer.decisions >= frames:
+            raise _Finished
+
+    game.play = first_round
+    game.config.present = counted_present
+    try:
+        asyncio.run(game.start())
+    except _Finished:
+        pass
+    return min(autoplayer.decisions, frames)
+
+
+def run(frames: int = 600, only: Optional[str] = None) -> Dict[str, object]:
+    """
+    运行全部基准
+
+    :param frames: 整局基准每个模式计时的帧数
+    :param only: 只运行名称包含该字符串的基准
+    """
+    _environment()
+    import pygame
+
+    from .modes import all_modes
+    from .utils.ghosts import GHOST_RUNS
+
+    results = {}
+    for name, result in micro_benchmarks().items():
+        if not only or only in name:
+            results[name] = result
+    for spec in all_modes():
+        name = f"play[{spec.name}]"
+        if not only or only in name:
+            results[name] = play_benchmark(spec.name, frames)
+    name = f"play[CLASSIC+{FLOCK_BOTS}bots]"
+    if not only or only in name:
+        results[name] = play_benchmark("CLASSIC", frames, bots=FLOCK_BOTS)
+    name = f"play[CLASSIC+{GHOST_RUNS}ghosts]"
+    if not only or only in name:
+        results[name] = play_benchmark("CLASSIC", frames, ghosts=GHOST_RUNS)
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object],
+            threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    与基线比较中位耗时
+
+    :return: 变慢超过阈值的基准名
+    """
+    regressions = []
+    print(f"{'benchmark':40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        unit = result["unit"]
+        if base is None or base["unit"] != unit:
+            print(f"{name:40} {'-':>12} {result['median']:10.2f}{unit} {'new':>8}")
+            continue
+        change = result["median"] / base["median"] - 1
+        mark = ""
+        if change > threshold:
+            regressions.append(name)
+            mark = "  REGRESSION"
+        print(f"{name:40} {base['median']:10.2f}{unit} {result['median']:10.2f}{unit} {change:+8.1%}{mark}")
+    return regressions
+
+
+def main() -> None:
+    """
+    make bench / make bench-baseline
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="运行性能基准并与基线比较")
+    parser.add_argument("--output", default=DEFAULT_RESULTS, help="结果JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线JSON，存在时与之比较")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--frames", type=int, default=600, help="整局基准每个模式计时的帧数")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="视为退步的变慢比例")
+    parser.add_argument("--only", default=None, help="只运行名称包含该字符串的基准")
+    parser.add_argument("--survival", type=int, default=SURVIVAL_FRAMES,
+                        help="极速模式下自动玩家至少存活的帧数，0表示不检查")
+    args = parser.parse_args()
+
+    try:
+        current = run(args.frames, args.only)
+    except _Crashed as e:
+        print(f"autoplay crashed during a timed benchmark: {e}")
+        sys.exit(1)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {"results": {}}
+    regressions = compare(current, baseline, args.threshold)
+    failed = False
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        failed = True
+    if args.survival:
+        survived = survival("SPEED", args.survival)
+        print(f"SPEED autoplay survived {survived}/{args.survival} frames on seed {BENCH_SEED}")
+        failed = failed or survived < args.survival
+    if failed:
+        sys.exit(1)
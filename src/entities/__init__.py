@@ -1,7 +1,11 @@
 from .background import Background
 from .entity import Entity
+from .flock import Flock
 from .floor import Floor
 from .game_over import GameOver
+from .ghost_race import GhostRace
+from .hud import EffectTimersWidget, Hud, HudWidget, ScoreWidget, TextWidget
+from .particles import ParticleSystem
 from .pipe import Pipe, Pipes
 from .player import Player, PlayerMode
 from .score import Score
@@ -9,7 +13,15 @@ from .welcome_message import WelcomeMessage
 
 __all__ = [
     "Background",  # 游戏背景
+    "Flock",  # 同场的多只小鸟
     "Floor",  # 游戏地面
+    "GhostRace",  # 回放的轨迹（幽灵赛跑）
+    "Hud",  # HUD合成层
+    "HudWidget",  # HUD控件基类
+    "TextWidget",  # 文本控件
+    "EffectTimersWidget",  # 道具效果计时控件
+    "ScoreWidget",  # 分数控件
+    "ParticleSystem",  # 粒子系统
     "Pipe",  # 管道
     "Pipes",  # 管道组
     "Player",  # 玩家鸟
@@ -1,8 +1,11 @@
 from ..utils import GameConfig  # 导入游戏配置类，用于获取游戏设置
+from ..utils.render_queue import LAYER_BACKGROUND
 from .entity import Entity  # 导入实体基类，Background 类继承自该类
 
 
 class Background(Entity):  # 定义背景类，负责管理游戏背景
+    layer = LAYER_BACKGROUND  # 绘制层级
+
     def __init__(self, config: GameConfig) -> None:  # 初始化背景类，接收游戏配置作为参数
         super().__init__(  # 调用父类构造函数
             config,
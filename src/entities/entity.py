@@ -3,6 +3,7 @@ from typing import Optional  # 可选类型导入，用于类型注解
 import pygame  # 导入 Pygame 库，处理游戏图形和声音
 
 from ..utils import GameConfig, get_hit_mask, pixel_collision  # 导入游戏配置和碰撞检测工具
+from ..utils.render_queue import LAYER_BACKGROUND, LAYER_DEBUG  # 绘制层级
 
 
 class Entity:  # 定义实体基类，所有游戏实体的父类
@@ -10,6 +11,8 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
     实体基类，所有游戏实体的父类。
     """
 
+    layer = LAYER_BACKGROUND  # 绘制层级，子类覆盖
+
     def __init__(self, config: GameConfig, image: Optional[pygame.Surface] = None, x=0, y=0, w: int = None, h: int = None, **kwargs) -> None:  # 构造函数，初始化实体
         """
         构造函数，初始化实体。
@@ -34,7 +37,11 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
             self.w = image.get_width() if image else 0  # 获取图像宽度
             self.h = image.get_height() if image else 0  # 获取图像高度
 
-        self.hit_mask = get_hit_mask(image) if image else None  # 获取碰撞掩码
+        # 碰撞掩码在第一次碰撞检测时才计算，背景等不参与碰撞的实体不必逐像素计算
+        self._hit_mask = None
+        self._mask_image = image
+        self.blend = config.images.blend_flags(image) if image else 0  # 绘制时的混合标志（图集中预乘透明度的精灵）
+        self._rect = pygame.Rect(0, 0, 0, 0)  # rect 属性复用的矩形，每帧的碰撞检测不再创建新矩形
         self.__dict__.update(kwargs)  # 更新其他属性
 
     def update_image(self, image: pygame.Surface, w: int = None, h: int = None) -> None:  # 更新实体图像
@@ -46,10 +53,26 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
         :param h: 新高度
         """
         self.image = image  # 设置新图像
-        self.hit_mask = get_hit_mask(image)  # 更新碰撞掩码
+        self._hit_mask = None  # 碰撞掩码在下次碰撞检测时重新计算
+        self._mask_image = image
+        self.blend = self.config.images.blend_flags(image) if image else 0
         self.w = w or (image.get_width() if image else 0)  # 更新宽度
         self.h = h or (image.get_height() if image else 0)  # 更新高度
 
+    @property
+    def hit_mask(self):
+        """
+        碰撞掩码，第一次访问时根据图像计算
+        """
+        if self._hit_mask is None and self._mask_image:
+            self._hit_mask = get_hit_mask(self._mask_image)
+        return self._hit_mask
+
+    @hit_mask.setter
+    def hit_mask(self, value) -> None:
+        self._hit_mask = value
+        self._mask_image = None
+
     @property  # 属性装饰器，计算中心 x 坐标
     def cx(self) -> float:
         """
@@ -71,11 +94,13 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
     @property  # 属性装饰器，返回实体的矩形区域
     def rect(self) -> pygame.Rect:
         """
-        返回实体的矩形区域。
+        返回实体的矩形区域。每次访问返回同一个矩形并原地更新，需要保留时请 copy()。
         
         :return: 矩形区域
         """
-        return pygame.Rect(self.x, self.y, self.w, self.h)  # 返回矩形区域
+        rect = self._rect
+        rect.update(self.x, self.y, self.w, self.h)  # 与 pygame.Rect(...) 相同，坐标向零取整
+        return rect  # 返回矩形区域
 
     def collide(self, other) -> bool:  # 碰撞检测
         """
@@ -92,17 +117,21 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
         """
         更新实体状态。
         """
-        self.draw(self.config.screen)  # 绘制实体，传递screen参数
-        rect = self.rect  # 获取矩形区域
+        queue = self.config.render_queue  # 帧渲染队列
+        queue.layer = self.layer
+        self.draw(queue)  # 绘制实体，提交到渲染队列
         if self.config.debug:  # 如果调试模式开启
-            pygame.draw.rect(self.config.screen, (255, 0, 0), rect, 1)  # 绘制红色矩形框
+            rect = self.rect  # 获取矩形区域
+            frame = pygame.Surface(rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(frame, (255, 0, 0), frame.get_rect(), 1)  # 绘制红色矩形框
+            queue.submit(frame, rect.topleft, LAYER_DEBUG)
             # 在矩形顶部写入 x 和 y 坐标
             font = pygame.font.SysFont("Arial", 13, True)  # 创建字体对象
             text = font.render(f"{self.x:.1f}, {self.y:.1f}, {self.w:.1f}, {self.h:.1f}", True, (255, 255, 255))  # 渲染文本
-            self.config.screen.blit(text, (
+            queue.submit(text, (
                 rect.x + rect.w / 2 - text.get_width() / 2,
                 rect.y - text.get_height(),
-            ))  # 在屏幕上绘制文本
+            ), LAYER_DEBUG)  # 在屏幕上绘制文本
 
     def draw(self, surface) -> None:  # 绘制实体
         """
@@ -111,4 +140,5 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
         :param surface: 绘制的目标表面
         """
         if self.image:  # 如果有图像
-            surface.blit(self.image, self.rect)  # 在指定表面上绘制图像
+            # 以坐标而不是 rect 绘制：渲染队列保留位置直到帧末，复用的矩形可能在那之前被更新
+            surface.blit(self.image, (self.x, self.y), None, self.blend)  # 在指定表面上绘制图像
@@ -0,0 +1,349 @@
+"""
+多只小鸟同场
+
+本地多人（分键位或手柄，最多 MAX_SEATS 人）和观战用的大量AI小鸟在同一组管道和道具中飞行，
+每位玩家有自己的分数和道具效果。所有小鸟的x坐标相同，每帧先找出与小鸟所在的一列重叠的管道和
+道具（共用的粗检测），再只对这些候选逐只小鸟做精确检测；绘制全部提交到渲染队列的玩家层，
+与其他实体一起由一次 blits 输出。
+
+AI小鸟共用一个 AutoPlayer 的规划结果，各自按固定种子的随机数偶尔做出相反的决定，在不同的位置
+出错；它们半透明、不拾取道具、不播放音效，撞毁落地后不再绘制。
+"""
+import random
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+from pygame.locals import JOYBUTTONDOWN, JOYDEVICEADDED, JOYDEVICEREMOVED, KEYDOWN
+
+from ..utils import GameConfig
+from ..utils.render_queue import LAYER_PLAYER
+from ..utils.scheduler import EffectScheduler
+from .floor import Floor
+from .pipe import Pipe, Pipes
+from .player import PhysicsParams, Player, PlayerMode
+from .powerup import PowerUpManager
+from .score import Score
+
+SEAT_KEYS = (pygame.K_w, pygame.K_RETURN, pygame.K_KP0)  # 第2~4位玩家的拍打键，第1位使用空格、上箭头、鼠标
+MAX_SEATS = len(SEAT_KEYS) + 1  # 本地玩家数上限
+SEAT_SPACING = 24  # 各位玩家起始高度的间隔（像素），避免完全重叠
+BOT_ALPHA = 110  # AI小鸟的透明度
+BOT_SLIP = 0.004  # AI小鸟每帧做出相反决定的概率
+
+
+class BotPilot:
+    """
+    AI小鸟的控制器：使用共用的自动玩家的决定，按自己的随机数偶尔做出相反的决定
+    """
+
+    def __init__(self, autoplayer, rng: random.Random, slip: float) -> None:
+        """
+        :param autoplayer: 所有AI小鸟共用的 AutoPlayer，飞行模型相同的小鸟共用规划结果
+        :param rng: 这只小鸟的随机数
+        :param slip: 每帧做出相反决定的概率
+        """
+        self.autoplayer = autoplayer
+        self.rng = rng
+        self.slip = slip
+
+    def decide(self, player: Player, pipes: Pipes) -> bool:
+        flap = self.autoplayer.decide(player, pipes)
+        if self.rng.random() < self.slip:
+            return not flap
+        return flap
+
+
+class Contestant:
+    """
+    同场的一只小鸟：小鸟实体、得分和道具效果
+    """
+
+    def __init__(self, player: Player, name: Optional[str] = None, effects: Optional[EffectScheduler] = None,
+                 score: Optional[Score] = None, pilot: Optional[BotPilot] = None) -> None:
+        """
+        :param player: 小鸟实体
+        :param name: 显示的名称（P1、P2……），AI小鸟为 None
+        :param effects: 道具效果计时，回调到这只小鸟；None 表示不拾取道具
+        :param score: 显示得分的 Score，None 时只计数
+        :param pilot: AI小鸟的控制器，None 表示由玩家操作
+        """
+        self.player = player
+        self.name = name
+        self.effects = effects
+        self.score = score
+        self.pilot = pilot
+        self.points = 0  # 得分
+        self.visible = True  # AI小鸟撞毁落地后不再绘制
+
+    @property
+    def alive(self) -> bool:
+        return not self.player.crashed
+
+    def add_point(self) -> None:
+        self.points += 1
+        if self.score is not None:
+            self.score.add()  # 同时播放得分音效
+
+
+class _Column:
+    """本帧与小鸟所在列重叠的管道，提供 Player.collided 需要的 upper/lower"""
+
+    def __init__(self) -> None:
+        self.upper: List[Pipe] = []
+        self.lower: List[Pipe] = []
+        # 这些管道的间隙的交集（像素行），矩形完全在其中的小鸟不可能碰到管道
+        self.gap_top = float("-inf")
+        self.gap_bottom = float("inf")
+
+
+class Flock:
+    """
+    同场的所有小鸟：第1位玩家是游戏原有的小鸟（模式钩子、HUD和成绩仍使用 game.player），
+    其余玩家和AI小鸟每局按当前模式新建
+    """
+
+    layer = LAYER_PLAYER  # 绘制层级
+
+    def __init__(self, config: GameConfig, seats: int = 1, bots: int = 0, slip: float = BOT_SLIP,
+                 seed: Optional[int] = None) -> None:
+        """
+        :param config: 游戏配置
+        :param seats: 本地玩家数（1~MAX_SEATS）
+        :param bots: AI小鸟数
+        :param slip: AI小鸟每帧做出相反决定的概率
+        :param seed: AI小鸟的起始位置和失误使用的种子，固定关卡时每次运行相同
+        """
+        if not 1 <= seats <= MAX_SEATS:
+            raise ValueError(f"本地玩家数应为1~{MAX_SEATS}: {seats}")
+        self.config = config
+        self.seats = seats
+        self.bots = bots
+        self.slip = slip
+        self.rng = random.Random(seed)
+        self.contestants: List[Contestant] = []  # 玩家在前（按座位），AI小鸟在后
+        self.autoplayer = None  # AI小鸟共用的自动玩家，第一局时创建
+        self.column = _Column()
+        self._clear = _Column()  # 在间隙中的小鸟只需检测地面
+        self.pads: Dict[int, Tuple[pygame.joystick.JoystickType, int]] = {}  # 手柄 instance id -> (手柄, 座位)
+        if seats > 1:
+            pygame.joystick.init()
+            # 启动前已连接的手柄：它们的 JOYDEVICEADDED 事件会被欢迎界面取走，这里直接分配座位
+            for device_index in range(pygame.joystick.get_count()):
+                self.add_pad(device_index)
+
+    def reset(self, lead: Player, score: Score, effects: EffectScheduler, player_mode: PlayerMode,
+              physics: Optional[PhysicsParams] = None) -> None:
+        """
+        新的一局（在游戏模式的 setup 之后调用）
+
+        :param lead: 第1位玩家的小鸟，已由游戏模式设置好
+        :param score: 第1位玩家的得分
+        :param effects: 第1位玩家的道具效果（PowerUpManager.effects）
+        :param player_mode: 当前游戏模式的玩家模式
+        :param physics: 当前游戏模式覆盖的物理参数
+        """
+        config, images = self.config, self.config.images
+        contestants = [Contestant(lead, "P1", effects, score)]
+        for seat in range(1, self.seats):
+            player = Player(config, images.player_frames(images.player_index + seat))
+            player.set_mode(player_mode, physics)
+            player.y = lead.y + SEAT_SPACING * ((seat + 1) // 2) * (1 if seat % 2 else -1)
+            contestants.append(Contestant(
+                player, f"P{seat + 1}", EffectScheduler(player.apply_powerup_effect, player.remove_powerup_effect)))
+
+        if self.bots and self.autoplayer is None:
+            from ..agents import AutoPlayer  # 只在有AI小鸟时导入
+
+            self.autoplayer = AutoPlayer()
+        if self.autoplayer is not None:
+            self.autoplayer.reset()
+        height = config.window.viewport_height
+        for index in range(self.bots):
+            player = Player(config, images.player_frames(index))
+            player.quiet = True
+            player.alpha = BOT_ALPHA
+            player.set_mode(player_mode, physics)
+            player.y = self.rng.uniform(0.2, 0.6) * height
+            rng = random.Random(self.rng.getrandbits(32))
+            contestants.append(Contestant(player, pilot=BotPilot(self.autoplayer, rng, self.slip)))
+        self.contestants = contestants
+
+    def handle(self, event) -> bool:
+        """
+        处理其他玩家的拍打键和手柄
+
+        :return: 事件是否已被处理
+        """
+        if event.type == KEYDOWN and event.key in SEAT_KEYS:
+            self.flap(SEAT_KEYS.index(event.key) + 1)
+            return True
+        if event.type == JOYBUTTONDOWN:
+            pad = self.pads.get(event.instance_id)
+            if pad is not None:
+                self.flap(pad[1])
+            return True
+        if event.type == JOYDEVICEADDED:
+            self.add_pad(event.device_index)
+            return True
+        if event.type == JOYDEVICEREMOVED:
+            self.pads.pop(event.instance_id, None)
+            return True
+        return False
+
+    def add_pad(self, device_index: int) -> None:
+        """为新连接的手柄分配座位：按连接顺序，第一个手柄给第1位玩家；已分配的手柄忽略"""
+        pad = pygame.joystick.Joystick(device_index)
+        if pad.get_instance_id() not in self.pads:
+            taken = {seat for _, seat in self.pads.values()}
+            seat = next(seat for seat in range(len(self.pads) + 1) if seat not in taken)
+            self.pads[pad.get_instance_id()] = (pad, seat)
+
+    def flap(self, seat: int) -> None:
+        """第 seat 位玩家（从0开始）拍打，座位不存在或已撞毁时忽略"""
+        if seat < self.seats and seat < len(self.contestants):
+            self.contestants[seat].player.flap()
+
+    def think(self, pipes: Pipes) -> None:
+        """AI小鸟决定是否拍打（在小鸟更新之前调用）"""
+        for contestant in self.contestants:
+            pilot = contestant.pilot
+            if pilot is not None and not contestant.player.crashed and pilot.decide(contestant.player, pipes):
+                contestant.player.flap()
+
+    def _overlap(self, pipes: Pipes) -> _Column:
+        """粗检测：找出与还在飞行的小鸟所在的x范围重叠的管道，以及它们的间隙"""
+        left, right = self._span()
+        column = self.column
+        column.upper.clear()
+        column.lower.clear()
+        column.gap_top, column.gap_bottom = float("-inf"), float("inf")
+        for upper, lower in zip(pipes.upper, pipes.lower):
+            if upper.x < right and upper.x + upper.w > left:
+                column.upper.append(upper)
+                column.lower.append(lower)
+                # 与碰撞检测一样按实体矩形（坐标取整后）计算
+                column.gap_top = max(column.gap_top, upper.rect.bottom)
+                column.gap_bottom = min(column.gap_bottom, lower.rect.top)
+        return column
+
+    def _span(self) -> Tuple[float, float]:
+        """还在飞行的小鸟所在的x范围（道具效果会改变小鸟的宽度）"""
+        left, right = float("inf"), float("-inf")
+        for contestant in self.contestants:
+            player = contestant.player
+            if not player.crashed:
+                x = player.x
+                if x < left:
+                    left = x
+                if x + player.w > right:
+                    right = x + player.w
+        return left, right
+
+    def tick_effects(self, delta_time: int, lead_effects: EffectScheduler) -> None:
+        """
+        推进各位玩家的道具效果计时（按帧间隔推进，暂停期间不会过期）
+
+        :param lead_effects: 第1位玩家的效果由 PowerUpManager.tick 推进，这里跳过
+        """
+        for contestant in self.contestants:
+            effects = contestant.effects
+            if effects is not None and effects is not lead_effects:
+                effects.advance(delta_time)
+
+    def collect(self, manager: PowerUpManager) -> None:
+        """道具归最先碰到它的玩家，效果只作用于这位玩家"""
+        left, right = self._span()
+        powerups = manager.powerups
+        kept = 0
+        for powerup in powerups:
+            taken = False
+            if powerup.x < right and powerup.x + powerup.w > left:
+                for contestant in self.contestants:
+                    if contestant.effects is not None and contestant.alive and contestant.player.collide(powerup):
+                        manager.activate_effect(powerup.power_type, contestant.effects)
+                        taken = True
+                        break
+            if not taken:
+                powerups[kept] = powerup
+                kept += 1
+        del powerups[kept:]
+
+    def score(self, pipes: Pipes) -> None:
+        """每只小鸟进入管道的水平范围时得分（与单人游戏相同的规则，见 Player.pass_pipe）"""
+        for pipe in self._overlap(pipes).upper:
+            for contestant in self.contestants:
+                if contestant.alive and contestant.player.pass_pipe(pipe):
+                    contestant.add_point()
+
+    def tick(self) -> None:
+        """更新并绘制所有小鸟：AI小鸟在下，第1位玩家在最上"""
+        queue = self.config.render_queue
+        queue.layer = self.layer
+        for contestant in reversed(self.contestants):
+            if contestant.visible:
+                contestant.player.draw(queue)
+
+    def collided(self, pipes: Pipes, floor: Floor) -> bool:
+        """
+        检测碰撞，撞毁的小鸟开始下落
+
+        :return: 所有玩家都已撞毁，本局结束
+        """
+        column, clear = self._overlap(pipes), self._clear
+        top, bottom = column.gap_top, column.gap_bottom
+        playing = False
+        for contestant in self.contestants:
+            player = contestant.player
+            if not player.crashed:
+                rect = player.rect
+                # 矩形在所有候选管道的间隙中的小鸟（大多数）跳过管道的逐像素检测
+                candidates = clear if top <= rect.top and rect.bottom <= bottom else column
+                if player.collided(candidates, floor):
+                    player.set_mode(PlayerMode.CRASH)
+                elif contestant.pilot is None:
+                    playing = True
+            elif contestant.pilot is not None and contestant.visible and player.y + player.h >= floor.y - 1:
+                contestant.visible = False  # AI小鸟落地后不再绘制
+        return not playing
+
+    def crash_all(self) -> None:
+        """本局结束（例如限时模式时间到）：还在飞行的小鸟全部下落"""
+        for contestant in self.contestants:
+            player = contestant.player
+            if player.mode != PlayerMode.CRASH:
+                player.crashed = True
+                player.set_mode(PlayerMode.CRASH)
+
+    def seat_scores(self) -> List[Tuple[str, int]]:
+        """各位玩家的 (名称, 得分)"""
+        return [(c.name, c.points) for c in self.contestants if c.pilot is None]
+
+    def bot_stats(self) -> Tuple[int, int]:
+        """AI小鸟中 (还在飞行的数量, 最高分)"""
+        alive = best = 0
+        for contestant in self.contestants:
+            if contestant.pilot is not None:
+                alive += contestant.alive
+                best = max(best, contestant.points)
+        return alive, best
+
+    def hud_text(self) -> Optional[str]:
+        """HUD上的各位玩家得分和AI小鸟的存活数"""
+        parts = []
+        if self.seats > 1:
+            parts.extend(f"{c.name} {c.points}{'' if c.alive else ' x'}" for c in self.contestants[:self.seats])
+        if self.bots:
+            alive, best = self.bot_stats()
+            parts.append(f"bots {alive}/{self.bots} best {best}")
+        return "  ".join(parts) or None
+
+    def result_lines(self) -> List[str]:
+        """游戏结束界面的排名"""
+        lines = []
+        if self.seats > 1:
+            ranking = sorted(self.seat_scores(), key=lambda item: -item[1])
+            lines.extend(f"{rank}. {name}  {points}" for rank, (name, points) in enumerate(ranking, 1))
+        if self.bots:
+            alive, best = self.bot_stats()
+            lines.append(f"Bots best {best}, {alive}/{self.bots} survived")
+        return lines
@@ -1,4 +1,5 @@
 from ..utils import GameConfig
+from ..utils.render_queue import LAYER_FLOOR
 from .entity import Entity
 
 
@@ -6,6 +7,9 @@ class Floor(Entity):
     """
     地面实体。
     """
+
+    layer = LAYER_FLOOR  # 绘制层级
+
     def __init__(self, config: GameConfig) -> None:
         """
         初始化地面实体。
@@ -1,6 +1,7 @@
 # 游戏结束画面模块，定义游戏结束时的显示界面
 
 from ..utils import GameConfig
+from ..utils.render_queue import LAYER_MESSAGE
 from .entity import Entity
 
 
@@ -9,6 +10,8 @@ class GameOver(Entity):
     游戏结束画面
     """
 
+    layer = LAYER_MESSAGE  # 绘制层级
+
     def __init__(self, config: GameConfig) -> None:
         """
         初始化游戏结束画面
@@ -0,0 +1,62 @@
+"""
+幽灵赛跑：回放同一关卡和模式上成绩最好的几局
+
+每条轨迹是一只半透明的小鸟，每帧按帧号从内存映射的轨迹中取y坐标和角度（O(1)，见 GhostRun），
+只更新拍打动画后绘制，不做物理和碰撞；轨迹结束（那一局撞毁）后不再绘制。所有幽灵使用同一组图像，
+旋转精灵的缓存在它们之间共用。
+"""
+from typing import List
+
+from ..utils import GameConfig
+from ..utils.ghosts import Y_SCALE, GhostRun
+from ..utils.render_queue import LAYER_PLAYER
+from .player import Player
+
+GHOST_ALPHA = 90  # 幽灵小鸟的透明度
+
+
+class GhostRace:
+    """
+    回放的轨迹，在玩家之前绘制（玩家在最上面）
+    """
+
+    layer = LAYER_PLAYER  # 绘制层级
+
+    def __init__(self, config: GameConfig, runs: List[GhostRun]) -> None:
+        """
+        :param runs: 要回放的轨迹，按名次排列
+        """
+        self.config = config
+        self.runs = runs
+        self.birds = []
+        for _ in runs:
+            bird = Player(config)
+            bird.quiet = True
+            bird.alpha = GHOST_ALPHA
+            self.birds.append(bird)
+        self.frame = 0  # 本局已回放的帧数
+        self.scale = 1 / Y_SCALE
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    def tick(self) -> None:
+        """绘制本帧所有还在飞行的幽灵"""
+        frame = self.frame
+        self.frame += 1
+        queue = self.config.render_queue
+        queue.layer = self.layer
+        scale = self.scale
+        for run, bird in zip(self.runs, self.birds):
+            if frame < run.frames:
+                bird.y = run.ys[frame] * scale
+                bird.rot = run.rots[frame]
+                bird.update_image()
+                bird.draw_player(queue)
+
+    def close(self) -> None:
+        """释放轨迹的内存映射"""
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.birds = []
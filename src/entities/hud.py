@@ -0,0 +1,206 @@
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import pygame
+
+from ..utils import GameConfig
+from ..utils.render_queue import LAYER_HUD
+from .entity import Entity
+from .score import Score
+
+
+class HudWidget:
+    """
+    HUD控件基类
+
+    每帧通过 source 取值，只有值变化时才调用 render 重新生成表面。
+    render 返回 None 表示隐藏该控件。
+    """
+
+    def __init__(self, source: Callable[[], Any], pos: Tuple[int, int] = (0, 0),
+                 anchor: str = "topleft") -> None:
+        """
+        :param source: 返回控件当前值的函数
+        :param pos: 控件位置
+        :param anchor: pos 对应的矩形锚点，如 topleft、center、topright
+        """
+        self.source = source
+        self.pos = pos
+        self.anchor = anchor
+        self.surface: Optional[pygame.Surface] = None  # 缓存的控件表面
+        self.rect = pygame.Rect(0, 0, 0, 0)  # 控件在覆盖层上的区域
+        self._value = object()  # 上次渲染时的值，初始值保证第一次一定渲染
+
+    def update(self) -> bool:
+        """
+        取值并在变化时重新渲染
+
+        :return: 控件是否发生变化
+        """
+        value = self.source()
+        if value == self._value:
+            return False
+        self._value = value
+        self.surface = self.render(value)
+        if self.surface is not None:
+            self.rect = self.surface.get_rect(**{self.anchor: self.pos})
+        return True
+
+    def render(self, value: Any) -> Optional[pygame.Surface]:
+        """
+        根据值生成控件表面，子类覆盖；基类不显示任何内容
+        """
+        return None
+
+
+class TextWidget(HudWidget):
+    """
+    文本控件，可选描边和背景框
+    """
+
+    def __init__(self, source: Callable[[], Optional[str]], pos: Tuple[int, int],
+                 font: pygame.font.Font, color=(255, 255, 255), anchor: str = "topleft",
+                 outline: Optional[Tuple[int, int, int]] = None,
+                 background: Optional[Tuple[int, int, int, int]] = None,
+                 size: Optional[Tuple[int, int]] = None) -> None:
+        """
+        :param source: 返回文本的函数，返回 None 时隐藏
+        :param font: 字体
+        :param color: 文本颜色
+        :param outline: 描边颜色
+        :param background: 背景颜色（RGBA）
+        :param size: 背景框大小，默认为文本大小
+        """
+        super().__init__(source, pos, anchor)
+        self.font = font
+        self.color = color
+        self.outline = outline
+        self.background = background
+        self.size = size
+
+    def render(self, value: Optional[str]) -> Optional[pygame.Surface]:
+        if value is None:
+            return None
+        text = self.font.render(value, True, self.color)
+        pad = 1 if self.outline else 0
+        size = self.size or (text.get_width() + pad * 2, text.get_height() + pad * 2)
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        if self.background:
+            surface.fill(self.background)
+        text_rect = text.get_rect(center=(size[0] // 2, size[1] // 2))
+        if self.outline:
+            # 先绘制四个方向的描边
+            outline = self.font.render(value, True, self.outline)
+            for dx, dy in ((-1, -1), (1, -1), (-1, 1), (1, 1)):
+                surface.blit(outline, text_rect.move(dx, dy))
+        surface.blit(text, text_rect)
+        return surface
+
+
+class EffectTimersWidget(HudWidget):
+    """
+    道具效果剩余时间列表，以0.1秒为精度刷新
+    """
+
+    def __init__(self, source: Callable[[], Tuple[Tuple[str, Tuple[int, int, int], int], ...]],
+                 pos: Tuple[int, int], font: pygame.font.Font, line_height: int = 20) -> None:
+        """
+        :param source: 返回 ((标签, 颜色, 剩余十分之一秒), ...) 的函数
+        :param font: 字体
+        :param line_height: 行高
+        """
+        super().__init__(source, pos)
+        self.font = font
+        self.line_height = line_height
+
+    def render(self, value) -> Optional[pygame.Surface]:
+        if not value:
+            return None
+        lines = [self.font.render(f"{label}: {tenths / 10:.1f}s", True, color) for label, color, tenths in value]
+        width = max(line.get_width() for line in lines)
+        surface = pygame.Surface((width, self.line_height * (len(lines) - 1) + lines[-1].get_height()),
+                                 pygame.SRCALPHA)
+        for i, line in enumerate(lines):
+            surface.blit(line, (0, i * self.line_height))
+        return surface
+
+
+class ScoreWidget(HudWidget):
+    """
+    分数控件，复用 Score 自身缓存的数字表面
+    """
+
+    def __init__(self, score: Score, visible: Callable[[], bool] = None) -> None:
+        """
+        :param score: 分数实体
+        :param visible: 返回是否显示的函数，默认总是显示
+        """
+        self.score = score
+        self.visible = visible or (lambda: True)
+        super().__init__(lambda: self.score.score if self.visible() else None)
+
+    def render(self, value) -> Optional[pygame.Surface]:
+        if value is None:
+            return None
+        self.pos = self.score.rect.topleft
+        return self.score.image
+
+
+class Hud(Entity):
+    """
+    HUD合成层
+
+    所有控件绘制在同一个透明覆盖层上，只有控件变化时才重新合成，
+    每帧只需把覆盖层的有效区域绘制一次到屏幕上。
+    """
+
+    layer = LAYER_HUD  # 绘制层级
+
+    def __init__(self, config: GameConfig, widgets: Iterable[HudWidget] = ()) -> None:
+        """
+        :param config: 游戏配置
+        :param widgets: 控件列表，按绘制顺序排列
+        """
+        super().__init__(config)
+        self.widgets: List[HudWidget] = list(widgets)
+        self.overlay = pygame.Surface((config.window.width, config.window.height), pygame.SRCALPHA)
+        self.bounds = pygame.Rect(0, 0, 0, 0)  # 覆盖层上有内容的区域
+
+    def add(self, widget: HudWidget) -> None:
+        """
+        添加控件
+        """
+        self.widgets.append(widget)
+
+    def compose(self) -> None:
+        """
+        更新所有控件，有变化时重新合成覆盖层
+        """
+        dirty = False
+        for widget in self.widgets:
+            if widget.update():
+                dirty = True
+        if not dirty:
+            return
+
+        self.overlay.fill((0, 0, 0, 0))
+        self.bounds = pygame.Rect(0, 0, 0, 0)
+        for widget in self.widgets:
+            if widget.surface is not None:
+                self.overlay.blit(widget.surface, widget.rect)
+                self.bounds = widget.rect.copy() if not self.bounds else self.bounds.union(widget.rect)
+        self.bounds = self.bounds.clip(self.overlay.get_rect())
+        self.config.render_queue.changed(self.overlay)  # 覆盖层是原地修改的
+
+    @property
+    def rect(self) -> pygame.Rect:
+        return self.bounds
+
+    def draw(self, surface) -> None:
+        """
+        绘制HUD覆盖层
+
+        :param surface: 绘制的目标表面
+        """
+        self.compose()
+        if self.bounds:
+            surface.blit(self.overlay, self.bounds, self.bounds)
@@ -0,0 +1,235 @@
+import random
+from array import array
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import pygame
+
+from ..utils import GameConfig
+from ..utils.render_queue import LAYER_EFFECTS
+from .entity import Entity
+
+Color = Tuple[int, int, int]
+
+
+@lru_cache(maxsize=64)
+def glow_sprite(color: Tuple[int, int, int, int], size: int) -> pygame.Surface:
+    """
+    预渲染的圆形光晕，相同颜色和尺寸只生成一次
+
+    :param color: RGBA颜色
+    :param size: 直径
+    """
+    surface = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(surface, color, (size // 2, size // 2), size // 2)
+    return surface
+
+
+def fade_frames(image: pygame.Surface, steps: int = 8) -> List[pygame.Surface]:
+    """
+    生成图像从不透明到透明的渐隐帧
+
+    :param image: 原始图像
+    :param steps: 帧数
+    """
+    frames = []
+    for i in range(steps):
+        frame = image.copy()
+        frame.set_alpha(255 - 255 * i // steps)
+        frames.append(frame)
+    return frames
+
+
+class ParticleSystem(Entity):
+    """
+    粒子系统
+
+    粒子数据保存在预分配的数组中（位置、速度、寿命、精灵），存活粒子始终位于
+    数组前部，移除时用最后一个粒子填补空位。粒子图像是预渲染的帧序列，
+    根据粒子已存活的比例选择帧，每帧通过一次 Surface.blits 批量绘制。
+    """
+
+    layer = LAYER_EFFECTS  # 绘制层级
+
+    def __init__(self, config: GameConfig, capacity: int = 512) -> None:
+        """
+        :param config: 游戏配置
+        :param capacity: 最大粒子数，超出时新粒子被丢弃
+        """
+        super().__init__(config)
+        self._rect = pygame.Rect(0, 0, config.window.width, config.window.height)  # 整个窗口，rect 每次返回它
+        self.capacity = capacity
+        self.count = 0  # 存活粒子数
+        zeros = [0.0] * capacity
+        self.px = array("f", zeros)  # x坐标（中心）
+        self.py = array("f", zeros)  # y坐标（中心）
+        self.vx = array("f", zeros)  # x速度（像素/帧）
+        self.vy = array("f", zeros)  # y速度（像素/帧）
+        self.gravity = array("f", zeros)  # y加速度
+        self.age = array("H", [0] * capacity)  # 已存活帧数
+        self.life = array("H", [1] * capacity)  # 总寿命（帧）
+        self.sprite = array("H", [0] * capacity)  # 精灵编号
+        # 每种精灵的帧序列和半尺寸，用于以中心定位
+        self.sprites: List[Sequence[pygame.Surface]] = []
+        self.half_sizes: List[Sequence[Tuple[int, int]]] = []
+        self._debris_cache = {}  # 颜色 -> 碎片精灵编号
+        self._blits = []  # 每帧复用的批量绘制列表
+        self._register_builtin_sprites()
+
+    def _register_builtin_sprites(self) -> None:
+        """注册内置特效使用的精灵"""
+        # 爆炸：逐渐扩大并变透明的橙色圆
+        frames = []
+        steps = 15
+        for i in range(steps):
+            radius = max(1, int(48 * (i + 1) / steps))
+            alpha = max(0, 255 - 255 * i // steps)
+            frames.append(glow_sprite((255, 165, 0, alpha), radius * 2))
+        self.explosion = self.register_sprite(frames)
+        # 火花
+        self.spark = self.register_sprite(fade_frames(glow_sprite((255, 230, 120, 255), 4)))
+        # 速度线：几种不同长度
+        self.speed_lines = []
+        for length in (20, 30, 40, 50, 60):
+            line = pygame.Surface((length, 2), pygame.SRCALPHA)
+            line.fill((255, 255, 255, 100))  # 白色半透明
+            self.speed_lines.append(self.register_sprite([line]))
+
+    def register_sprite(self, frames: Sequence[pygame.Surface]) -> int:
+        """
+        注册精灵帧序列
+
+        :param frames: 按生命周期排列的帧
+        :return: 精灵编号
+        """
+        self.sprites.append(list(frames))
+        self.half_sizes.append([(f.get_width() // 2, f.get_height() // 2) for f in frames])
+        return len(self.sprites) - 1
+
+    def emit(self, sprite: int, x: float, y: float, vx: float = 0.0, vy: float = 0.0,
+             life: int = 15, gravity: float = 0.0) -> None:
+        """
+        发射一个粒子
+
+        :param sprite: 精灵编号
+        :param x: 中心x坐标
+        :param y: 中心y坐标
+        :param vx: x速度
+        :param vy: y速度
+        :param life: 寿命（帧）
+        :param gravity: y加速度
+        """
+        i = self.count
+        if i >= self.capacity:
+            return
+        self.px[i] = x
+        self.py[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.gravity[i] = gravity
+        self.age[i] = 0
+        self.life[i] = max(1, life)
+        self.sprite[i] = sprite
+        self.count = i + 1
+
+    def burst(self, sprite: int, x: float, y: float, count: int, speed: float = 4.0,
+              life: int = 15, gravity: float = 0.3) -> None:
+        """
+        从一点向四周随机发射多个粒子
+        """
+        for _ in range(count):
+            self.emit(
+                sprite, x, y,
+                (random.random() * 2 - 1) * speed,
+                (random.random() * 2 - 1) * speed - speed * 0.5,
+                life - random.randrange(life // 3 + 1),
+                gravity,
+            )
+
+    def explosion_at(self, x: float, y: float) -> None:
+        """
+        在指定位置产生爆炸效果
+        """
+        self.emit(self.explosion, x, y, life=len(self.sprites[self.explosion]))
+        self.burst(self.spark, x, y, 16, speed=5.0)
+
+    def debris(self, image: pygame.Surface, rect: pygame.Rect, count: int = 24) -> None:
+        """
+        管道被摧毁时产生碎片，颜色取自图像中心
+
+        :param image: 被摧毁实体的图像
+        :param rect: 被摧毁实体的区域
+        :param count: 碎片数量
+        """
+        color = tuple(image.get_at((image.get_width() // 2, image.get_height() // 2)))[:3]
+        sprite = self._debris_sprite(color)
+        for _ in range(count):
+            x = rect.x + random.random() * rect.w
+            y = rect.y + random.random() * rect.h
+            self.emit(sprite, x, y, -3 - random.random() * 4, (random.random() - 0.5) * 6,
+                      20 + random.randrange(10), 0.5)
+
+    def _debris_sprite(self, color: Color) -> int:
+        """按颜色缓存碎片精灵"""
+        if color not in self._debris_cache:
+            chunk = pygame.Surface((6, 6), pygame.SRCALPHA)
+            chunk.fill((*color, 255))
+            self._debris_cache[color] = self.register_sprite(fade_frames(chunk))
+        return self._debris_cache[color]
+
+    def emit_speed_lines(self, count: int = 2, velocity: float = -24.0, life: int = 8) -> None:
+        """
+        极速模式的速度线，从屏幕右侧随机高度向左划过
+        """
+        width = self.config.window.width
+        height = self.config.window.height
+        for _ in range(count):
+            sprite = self.speed_lines[random.randrange(len(self.speed_lines))]
+            self.emit(sprite, random.random() * width + width * 0.3, random.random() * height,
+                      velocity, 0.0, life)
+
+    def clear(self) -> None:
+        """移除所有粒子"""
+        self.count = 0
+
+    def update(self) -> None:
+        """推进一帧并移除寿命结束的粒子"""
+        px, py, vx, vy, gravity = self.px, self.py, self.vx, self.vy, self.gravity
+        age, life, sprite = self.age, self.life, self.sprite
+        i = 0
+        while i < self.count:
+            age[i] += 1
+            if age[i] >= life[i]:
+                # 用最后一个粒子填补空位
+                last = self.count - 1
+                px[i], py[i], vx[i], vy[i] = px[last], py[last], vx[last], vy[last]
+                gravity[i], age[i], life[i], sprite[i] = gravity[last], age[last], life[last], sprite[last]
+                self.count = last
+                continue
+            vy[i] += gravity[i]
+            px[i] += vx[i]
+            py[i] += vy[i]
+            i += 1
+
+    @property
+    def rect(self) -> pygame.Rect:
+        return self._rect
+
+    def draw(self, surface) -> None:
+        """
+        更新并批量绘制所有粒子
+
+        :param surface: 绘制的目标表面
+        """
+        self.update()
+        if not self.count:
+            return
+        sprites, half_sizes = self.sprites, self.half_sizes
+        blits = self._blits
+        blits.clear()  # 渲染队列在 blits 中已复制了每项绘制，列表可以复用
+        for i in range(self.count):
+            frames = sprites[self.sprite[i]]
+            frame = self.age[i] * len(frames) // self.life[i]
+            hw, hh = half_sizes[self.sprite[i]][frame]
+            blits.append((frames[frame], (self.px[i] - hw, self.py[i] - hh)))
+        surface.blits(blits, False)
@@ -1,11 +1,14 @@
-import random
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
 from ..utils import GameConfig
+from ..utils.levels import PIPE_SPEED_DOWN, PIPE_SPEED_UP, random_pipe_stream
+from ..utils.render_queue import LAYER_PIPES
 from .entity import Entity
 
 
 class Pipe(Entity):
+    layer = LAYER_PIPES  # 绘制层级
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self.vel_x = -5  # 管道的水平速度
@@ -25,17 +28,25 @@ class Pipe(Entity):
         """摧毁管道"""
         self.destroyed = True
         self.vel_x = -10  # 加速离开屏幕
+        if self.config.particles:
+            self.config.particles.debris(self.image, self.rect)  # 产生碎片
 
 
 class Pipes(Entity):
     upper: List[Pipe]  # 上方管道列表
     lower: List[Pipe]  # 下方管道列表
 
-    def __init__(self, config: GameConfig) -> None:
+    def __init__(self, config: GameConfig, stream: Optional[Iterator[Tuple[int, int]]] = None) -> None:
+        """
+        :param config: 游戏配置
+        :param stream: 产出 (间隙y坐标, 管道类型) 的关卡序列（见 LevelStream.pipes），默认随机生成
+        """
         super().__init__(config)
         self.pipe_gap = 120  # 管道间隙
         self.top = 0  # 顶部位置
         self.bottom = self.config.window.viewport_height  # 底部位置
+        self.pipe_vel_x = -5  # 新生成管道的水平速度
+        self.stream = stream or random_pipe_stream(self.config.window.viewport_height, self.pipe_gap)
         self.upper = []  # 初始化上方管道列表
         self.lower = []  # 初始化下方管道列表
         self.spawn_initial_pipes()  # 生成初始管道
@@ -54,15 +65,26 @@ class Pipes(Entity):
         if player.is_bomb_mode and not player.bomb_ready:
             print(f"Checking bomb collision: is_bomb_mode={player.is_bomb_mode}, bomb_ready={player.bomb_ready}")
             # 检查所有管道
-            for pipe in self.upper + self.lower:
-                if not pipe.destroyed and player.collide(pipe):
-                    pipe.destroy()  # 摧毁管道
-                    self.config.sounds.point.play()  # 播放得分音效
-                    print("Pipe destroyed!")
+            for pipes in (self.upper, self.lower):
+                for pipe in pipes:
+                    if not pipe.destroyed and player.collide(pipe):
+                        pipe.destroy()  # 摧毁管道
+                        self.config.sounds.point.play()  # 播放得分音效
+                        print("Pipe destroyed!")
 
     def stop(self) -> None:
-        for pipe in self.upper + self.lower:
-            pipe.vel_x = 0  # 停止管道移动
+        for pipes in (self.upper, self.lower):
+            for pipe in pipes:
+                pipe.vel_x = 0  # 停止管道移动
+
+    def set_speed(self, vel_x: float) -> None:
+        """
+        设置管道的水平速度，对已有管道和之后生成的管道都有效
+        """
+        self.pipe_vel_x = vel_x
+        for pipes in (self.upper, self.lower):
+            for pipe in pipes:
+                pipe.vel_x = vel_x
 
     def can_spawn_pipes(self) -> bool:
         last = self.upper[-1]  # 获取最后一个上方管道
@@ -101,61 +123,33 @@ class Pipes(Entity):
         self.lower.append(lower_2)  # 添加第二个下方管道
 
     def make_random_pipes(self):
-        """返回随机生成的管道"""
-        # 上下管道之间的间隙y坐标
-        base_y = self.config.window.viewport_height
-
-        gap_y = random.randrange(0, int(base_y * 0.6 - self.pipe_gap))  # 随机生成间隙y坐标
-        gap_y += int(base_y * 0.2)  # 调整间隙y坐标
+        """返回序列中的下一组管道（未指定关卡时随机生成）"""
+        gap_y, kind = next(self.stream)  # 上下管道之间的间隙y坐标和管道类型
         pipe_height = self.config.images.pipe[0].get_height()  # 获取管道高度
         pipe_x = self.config.window.width + 10  # 设置管道x坐标
 
-        # 随机生成特殊管道
-        if random.random() < 0.2:  # 20% 概率生成特殊管道
-            pipe_type = random.choice(['speed_up', 'speed_down'])
-            if pipe_type == 'speed_up':
-                upper_pipe = Pipe(
-                    self.config,
-                    self.config.images.pipe[0],
-                    pipe_x,
-                    gap_y - pipe_height,
-                    speed_up=True
-                )
-                lower_pipe = Pipe(
-                    self.config,
-                    self.config.images.pipe[1],
-                    pipe_x,
-                    gap_y + self.pipe_gap,
-                    speed_up=True
-                )
-            else:
-                upper_pipe = Pipe(
-                    self.config,
-                    self.config.images.pipe[0],
-                    pipe_x,
-                    gap_y - pipe_height,
-                    speed_down=True
-                )
-                lower_pipe = Pipe(
-                    self.config,
-                    self.config.images.pipe[1],
-                    pipe_x,
-                    gap_y + self.pipe_gap,
-                    speed_down=True
-                )
-        else:
-            upper_pipe = Pipe(
-                self.config,
-                self.config.images.pipe[0],
-                pipe_x,
-                gap_y - pipe_height,
-            )  # 创建上方管道
-
-            lower_pipe = Pipe(
-                self.config,
-                self.config.images.pipe[1],
-                pipe_x,
-                gap_y + self.pipe_gap,
-            )  # 创建下方管道
-
+        # 特殊管道带有加速或减速标记
+        flags = {}
+        if kind == PIPE_SPEED_UP:
+            flags["speed_up"] = True
+        elif kind == PIPE_SPEED_DOWN:
+            flags["speed_down"] = True
+
+        upper_pipe = Pipe(
+            self.config,
+            self.config.images.pipe[0],
+            pipe_x,
+            gap_y - pipe_height,
+            **flags,
+        )  # 创建上方管道
+
+        lower_pipe = Pipe(
+            self.config,
+            self.config.images.pipe[1],
+            pipe_x,
+            gap_y + self.pipe_gap,
+            **flags,
+        )  # 创建下方管道
+
+        upper_pipe.vel_x = lower_pipe.vel_x = self.pipe_vel_x
         return upper_pipe, lower_pipe  # 返回上方和下方管道
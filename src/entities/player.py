@@ -1,15 +1,28 @@
+import math
+import weakref
+from collections import OrderedDict
 from enum import Enum
 from itertools import cycle
+from typing import Tuple
 
 import pygame
 
 from ..utils import GameConfig, clamp
+from ..utils.render_queue import LAYER_PLAYER
 from .entity import Entity
 from .floor import Floor
+from .particles import glow_sprite
 from .pipe import Pipe, Pipes
 from .powerup import PowerUpType
 
 
+SPRITE_CACHE_SIZE = 1024  # 旋转精灵缓存的最大数量（多只小鸟同场时有三种颜色和半透明的变体）
+
+# 缩放和旋转后的精灵缓存，所有玩家共用（图像来自共用的 Images），每局新建的玩家不必重新变换
+scaled_sprites = weakref.WeakKeyDictionary()  # 原图像 -> {大小倍数: 缩放后的图像}
+rotated_sprites = OrderedDict()  # (图像, 角度, 透明度) -> 旋转后的图像，最近使用的在最后
+
+
 class PlayerMode(Enum):
     """玩家模式枚举"""
     NORMAL = "NORMAL"  # 正常模式
@@ -22,9 +35,87 @@ class PlayerMode(Enum):
     SPEED = "SPEED"  # 极速模式
 
 
+class PhysicsParams:
+    """
+    玩家物理参数，值为 None 的参数在切换模式时保持不变
+    """
+
+    def __init__(self, vel_y=None, max_vel_y=None, min_vel_y=None, acc_y=None, rot=None,
+                 vel_rot=None, rot_min=None, rot_max=None, flap_acc=None, flap_rot=None) -> None:
+        """
+        :param vel_y: 初始y速度
+        :param max_vel_y: 最大y速度（最大下降速度）
+        :param min_vel_y: 最小y速度（最大上升速度）
+        :param acc_y: y加速度（重力）
+        :param rot: 初始旋转角度
+        :param vel_rot: 旋转速度
+        :param rot_min: 最小旋转角度
+        :param rot_max: 最大旋转角度
+        :param flap_acc: 拍打时的y速度
+        :param flap_rot: 拍打时的旋转角度
+        """
+        self.vel_y = vel_y
+        self.max_vel_y = max_vel_y
+        self.min_vel_y = min_vel_y
+        self.acc_y = acc_y
+        self.rot = rot
+        self.vel_rot = vel_rot
+        self.rot_min = rot_min
+        self.rot_max = rot_max
+        self.flap_acc = flap_acc
+        self.flap_rot = flap_rot
+
+    def apply(self, player: "Player") -> None:
+        """把参数应用到玩家"""
+        for name, value in vars(self).items():
+            if value is not None:
+                setattr(player, name, value)
+        player.flapped = False  # 拍打状态
+        player.flap_shift = 0.0  # 帧间拍打补偿的速度差
+
+
+# 正常飞行：向下的重力，向上拍打
+NORMAL_PHYSICS = PhysicsParams(
+    vel_y=-9, max_vel_y=10, min_vel_y=-8, acc_y=1,
+    rot=80, vel_rot=-3, rot_min=-90, rot_max=20, flap_acc=-9, flap_rot=80,
+)
+# 反向模式：向上的重力，向下拍打
+REVERSE_PHYSICS = PhysicsParams(
+    vel_y=9, max_vel_y=8, min_vel_y=-10, acc_y=-1,
+    rot=-80, vel_rot=3, rot_min=-20, rot_max=90, flap_acc=9, flap_rot=-80,
+)
+# 欢迎界面的上下浮动
+SHM_PHYSICS = PhysicsParams(
+    vel_y=1, max_vel_y=4, min_vel_y=-4, acc_y=0.5,
+    rot=0, vel_rot=0, rot_min=0, rot_max=0, flap_acc=0, flap_rot=0,
+)
+# 撞击后下落，其余参数保持撞击时的值
+CRASH_PHYSICS = PhysicsParams(vel_y=7, max_vel_y=15, acc_y=2, vel_rot=-8)
+
+# 玩家模式 -> (物理参数, 每帧更新方法, 是否播放拍打音效, 模式标志)
+MODE_TABLE = {
+    PlayerMode.SHM: (SHM_PHYSICS, "tick_shm", False, {}),
+    PlayerMode.NORMAL: (NORMAL_PHYSICS, "tick_flight", True, {}),
+    PlayerMode.REVERSE: (REVERSE_PHYSICS, "tick_flight", True, {"is_reverse_mode": True}),
+    PlayerMode.GHOST: (NORMAL_PHYSICS, "tick_flight", True, {"is_ghost_mode": True, "ghost_life": 10}),
+    PlayerMode.NIGHT: (NORMAL_PHYSICS, "tick_flight", True, {"is_night_mode": True}),
+    PlayerMode.SPEED: (NORMAL_PHYSICS, "tick_flight", True, {"is_speed_mode": True}),
+    PlayerMode.CRASH: (CRASH_PHYSICS, "tick_crash", False, {}),
+    PlayerMode.CRASHED: (PhysicsParams(), None, False, {}),
+}
+
+
 class Player(Entity):
-    def __init__(self, config: GameConfig) -> None:
-        image = config.images.player[0]
+    layer = LAYER_PLAYER  # 绘制层级
+    quiet = False  # 不播放拍打音效（观战的AI小鸟）
+
+    def __init__(self, config: GameConfig, frames: Tuple[pygame.Surface, ...] = None) -> None:
+        """
+        :param config: 游戏配置
+        :param frames: 拍打动画的三帧图像，默认为 config.images.player（见 Images.player_frames）
+        """
+        self.frames = frames or config.images.player
+        image = self.frames[0]
         x = int(config.window.width * 0.2)
         y = int((config.window.height - image.get_height()) / 2)
         super().__init__(config, image, x, y)
@@ -35,16 +126,13 @@ class Player(Entity):
         self.frame = 0
         self.crashed = False
         self.crash_entity = None
+        self.last_pipe = None  # 最近一次得分的管道，见 pass_pipe
         # 道具效果相关属性
         self.speed_modifier = 1.0  # 速度修改器
         self.invincible = False    # 无敌状态
         self.size_modifier = 1.0   # 大小修改器
         self.original_image = None # 保存原始图像
         self.is_reverse_mode = False  # 是否为反向模式
-        # 爆炸效果相关属性
-        self.explosion_active = False
-        self.explosion_start_time = 0
-        self.explosion_duration = 500  # 爆炸持续时间(毫秒)
         # 穿越模式相关属性
         self.is_ghost_mode = False  # 是否为穿越模式
         self.ghost_alpha = 160  # 穿越模式下的透明度
@@ -57,6 +145,8 @@ class Player(Entity):
         # 极速模式相关属性
         self.is_speed_mode = False  # 是否为极速模式
         self.speed_boost = 2.0  # 速度提升倍数
+        self.alpha = None  # 整体透明度，None 表示不透明（观战的AI小鸟半透明）
+        self._rotated_rect = pygame.Rect(0, 0, 0, 0)  # rotated_rect 复用的矩形
         self.set_mode(PlayerMode.SHM)
         
     def apply_powerup_effect(self, powerup_type: PowerUpType) -> None:
@@ -97,141 +187,38 @@ class Player(Entity):
             self.w = self.image.get_width()
             self.h = self.image.get_height()
 
-    def set_mode(self, mode: PlayerMode) -> None:
+    def set_mode(self, mode: PlayerMode, physics: "PhysicsParams" = None) -> None:
+        """
+        切换玩家模式
+
+        :param mode: 玩家模式
+        :param physics: 覆盖该模式默认物理参数（供自定义游戏模式使用）
+        """
         self.mode = mode
-        if mode == PlayerMode.NORMAL:
-            self.reset_vals_normal()
-            self.config.sounds.wing.play()
-        elif mode == PlayerMode.SHM:
-            self.reset_vals_shm()
-        elif mode == PlayerMode.REVERSE:
-            self.reset_vals_reverse()
-            self.config.sounds.wing.play()
-        elif mode == PlayerMode.GHOST:
-            self.reset_vals_ghost()
-            self.config.sounds.wing.play()
-        elif mode == PlayerMode.NIGHT:
-            self.reset_vals_night()
+        default_physics, tick_name, wing_sound, flags = MODE_TABLE[mode]
+        (physics or default_physics).apply(self)
+        for name, value in flags.items():
+            setattr(self, name, value)  # 设置模式相关标志
+        self._tick_mode = getattr(self, tick_name) if tick_name else None
+        if wing_sound and not self.quiet:
             self.config.sounds.wing.play()
-        elif mode == PlayerMode.SPEED:
-            self.reset_vals_speed()
-            self.config.sounds.wing.play()
-
-    def reset_vals_normal(self) -> None:
-        self.vel_y = -9  # player's velocity along Y axis
-        self.max_vel_y = 10  # max vel along Y, max descend speed
-        self.min_vel_y = -8  # min vel along Y, max ascend speed
-        self.acc_y = 1  # players downward acceleration
-
-        self.rot = 80  # player's current rotation
-        self.vel_rot = -3  # player's rotation speed
-        self.rot_min = -90  # player's min rotation angle
-        self.rot_max = 20  # player's max rotation angle
-
-        self.flap_acc = -9  # players speed on flapping
-        self.flapped = False  # True when player flaps
-        
-    def reset_vals_reverse(self) -> None:
-        # 反向模式下的初始化值
-        self.vel_y = 9  # 反向的初始速度（向下）
-        self.max_vel_y = 8  # 反向模式下的最大上升速度（实际是下降）
-        self.min_vel_y = -10  # 反向模式下的最小下降速度（实际是上升）
-        self.acc_y = -1  # 反向的重力加速度（向上）
-
-        self.rot = -80  # 反向的初始旋转角度
-        self.vel_rot = 3  # 反向的旋转速度
-        self.rot_min = -20  # 反向的最小旋转角度
-        self.rot_max = 90  # 反向的最大旋转角度
-
-        self.flap_acc = 9  # 反向的拍打加速度
-        self.flapped = False  # 拍打状态
-
-    def reset_vals_shm(self) -> None:
-        self.vel_y = 1  # player's velocity along Y axis
-        self.max_vel_y = 4  # max vel along Y, max descend speed
-        self.min_vel_y = -4  # min vel along Y, max ascend speed
-        self.acc_y = 0.5  # players downward acceleration
-
-        self.rot = 0  # player's current rotation
-        self.vel_rot = 0  # player's rotation speed
-        self.rot_min = 0  # player's min rotation angle
-        self.rot_max = 0  # player's max rotation angle
-
-        self.flap_acc = 0  # players speed on flapping
-        self.flapped = False  # True when player flaps
-
-    def reset_vals_crash(self) -> None:
-        self.acc_y = 2
-        self.vel_y = 7
-        self.max_vel_y = 15
-        self.vel_rot = -8
-
-    def reset_vals_ghost(self) -> None:
-        """重置穿越模式的值"""
-        self.vel_y = -9  # 初始速度
-        self.max_vel_y = 10  # 最大速度
-        self.min_vel_y = -8  # 最小速度
-        self.acc_y = 1  # 重力加速度
-
-        self.rot = 80  # 初始旋转角度
-        self.vel_rot = -3  # 旋转速度
-        self.rot_min = -90  # 最小旋转角度
-        self.rot_max = 20  # 最大旋转角度
-
-        self.flap_acc = -9  # 拍打加速度
-        self.flapped = False  # 拍打状态
-        
-        # 穿越模式相关
-        self.is_ghost_mode = True  # 确保设置穿越模式标志
-        self.ghost_life = 10  # 重置穿越次数
-
-    def reset_vals_night(self) -> None:
-        """重置夜间模式的值"""
-        self.vel_y = -9  # 初始速度
-        self.max_vel_y = 10  # 最大速度
-        self.min_vel_y = -8  # 最小速度
-        self.acc_y = 1  # 重力加速度
-
-        self.rot = 80  # 初始旋转角度
-        self.vel_rot = -3  # 旋转速度
-        self.rot_min = -90  # 最小旋转角度
-        self.rot_max = 20  # 最大旋转角度
-
-        self.flap_acc = -9  # 拍打加速度
-        self.flapped = False  # 拍打状态
-        
-        # 夜间模式相关
-        self.is_night_mode = True  # 确保设置夜间模式标志
-
-    def reset_vals_speed(self) -> None:
-        """重置极速模式的值"""
-        self.vel_y = -9  # 初始速度
-        self.max_vel_y = 10  # 最大速度
-        self.min_vel_y = -8  # 最小速度
-        self.acc_y = 1  # 重力加速度
-
-        self.rot = 80  # 初始旋转角度
-        self.vel_rot = -3  # 旋转速度
-        self.rot_min = -90  # 最小旋转角度
-        self.rot_max = 20  # 最大旋转角度
-
-        self.flap_acc = -9  # 拍打加速度
-        self.flapped = False  # 拍打状态
-        
-        # 极速模式相关
-        self.is_speed_mode = True  # 确保设置极速模式标志
 
     def update_image(self):
         self.frame += 1
         if self.frame % 5 == 0:
             self.img_idx = next(self.img_gen)
-            orig_image = self.config.images.player[self.img_idx]
+            orig_image = self.frames[self.img_idx]
             
             # 应用大小修改
             if self.size_modifier != 1.0:
-                new_width = int(orig_image.get_width() * self.size_modifier)
-                new_height = int(orig_image.get_height() * self.size_modifier)
-                self.image = pygame.transform.scale(orig_image, (new_width, new_height))
+                scaled = scaled_sprites.get(orig_image)
+                if scaled is None:
+                    scaled = scaled_sprites[orig_image] = {}
+                if self.size_modifier not in scaled:
+                    new_width = int(orig_image.get_width() * self.size_modifier)
+                    new_height = int(orig_image.get_height() * self.size_modifier)
+                    scaled[self.size_modifier] = pygame.transform.scale(orig_image, (new_width, new_height))
+                self.image = scaled[self.size_modifier]
             else:
                 self.image = orig_image
                 
@@ -244,27 +231,22 @@ class Player(Entity):
         self.vel_y += self.acc_y
         self.y += self.vel_y
 
-    def tick_normal(self) -> None:
-        if self.vel_y < self.max_vel_y and not self.flapped:
-            self.vel_y += self.acc_y
-        if self.flapped:
-            self.flapped = False
-
-        # 应用速度修改器
-        adjusted_vel_y = self.vel_y * self.speed_modifier
-        self.y = clamp(self.y + adjusted_vel_y, self.min_y, self.max_y)
-        self.rotate()
-        
-    def tick_reverse(self) -> None:
-        # 反向模式的移动逻辑
-        if self.vel_y > self.min_vel_y and not self.flapped:
-            self.vel_y += self.acc_y  # 注意这里acc_y是负值，所以是减速
-        if self.flapped:
-            self.flapped = False
-
-        # 应用速度修改器
-        adjusted_vel_y = self.vel_y * self.speed_modifier
-        self.y = clamp(self.y + adjusted_vel_y, self.min_y, self.max_y)
+    def tick_flight(self) -> None:
+        """
+        飞行模式的更新逻辑（正常、反向、穿越、夜间、极速模式共用）
+        """
+        if not self.flapped:
+            # 向加速度方向加速，直到达到该方向的速度上限
+            if self.acc_y > 0 and self.vel_y < self.max_vel_y:
+                self.vel_y += self.acc_y
+            elif self.acc_y < 0 and self.vel_y > self.min_vel_y:
+                self.vel_y += self.acc_y  # 注意这里acc_y是负值，所以是减速
+        self.flapped = False
+
+        # 应用速度修改器，极速模式使用固定的速度提升倍数；拍打发生在帧间时补偿提前的位移
+        modifier = self.speed_boost if self.is_speed_mode else self.speed_modifier
+        self.y = clamp(self.y + (self.vel_y + self.flap_shift) * modifier, self.min_y, self.max_y)
+        self.flap_shift = 0.0
         self.rotate()
 
     def tick_crash(self) -> None:
@@ -278,42 +260,6 @@ class Player(Entity):
         if self.vel_y < self.max_vel_y:
             self.vel_y += self.acc_y
 
-    def tick_ghost(self) -> None:
-        """穿越模式的更新逻辑"""
-        if self.vel_y < self.max_vel_y and not self.flapped:
-            self.vel_y += self.acc_y
-        if self.flapped:
-            self.flapped = False
-
-        # 应用速度修改器
-        adjusted_vel_y = self.vel_y * self.speed_modifier
-        self.y = clamp(self.y + adjusted_vel_y, self.min_y, self.max_y)
-        self.rotate()
-
-    def tick_night(self) -> None:
-        """夜间模式的更新逻辑"""
-        if self.vel_y < self.max_vel_y and not self.flapped:
-            self.vel_y += self.acc_y
-        if self.flapped:
-            self.flapped = False
-
-        # 应用速度修改器
-        adjusted_vel_y = self.vel_y * self.speed_modifier
-        self.y = clamp(self.y + adjusted_vel_y, self.min_y, self.max_y)
-        self.rotate()
-
-    def tick_speed(self) -> None:
-        """极速模式的更新逻辑"""
-        if self.vel_y < self.max_vel_y and not self.flapped:
-            self.vel_y += self.acc_y
-        if self.flapped:
-            self.flapped = False
-
-        # 应用速度修改器
-        adjusted_vel_y = self.vel_y * self.speed_boost
-        self.y = clamp(self.y + adjusted_vel_y, self.min_y, self.max_y)
-        self.rotate()
-
     def rotate(self) -> None:
         self.rot = clamp(self.rot + self.vel_rot, self.rot_min, self.rot_max)
 
@@ -323,21 +269,77 @@ class Player(Entity):
         
         :param surface: 绘制的目标表面
         """
+        self.advance()
+        self.draw_player(surface)
+
+    def advance(self) -> None:
+        """
+        推进一帧：更新拍打动画，按当前模式更新位置（不绘制，供回滚后重新模拟使用）
+        """
         self.update_image()
-        if self.mode == PlayerMode.SHM:
-            self.tick_shm()
-        elif self.mode == PlayerMode.NORMAL:
-            self.tick_normal()
-        elif self.mode == PlayerMode.REVERSE:
-            self.tick_reverse()
-        elif self.mode == PlayerMode.GHOST:
-            self.tick_ghost()
-        elif self.mode == PlayerMode.NIGHT:
-            self.tick_night()
-        elif self.mode == PlayerMode.SPEED:
-            self.tick_speed()
+        if self._tick_mode:
+            self._tick_mode()  # 按当前模式更新位置
 
-        self.draw_player(surface)
+    def physics_state(self) -> tuple:
+        """
+        当前帧的物理状态，与 restore_physics_state 配合实现回滚：恢复状态后按相同的拍打重新推进，
+        结果与原来完全相同（拍打不带帧间补偿时，见 flap 的 lead 参数）
+        """
+        return self.y, self.vel_y, self.rot, self.flapped, self.flap_shift
+
+    def restore_physics_state(self, state: tuple) -> None:
+        """
+        恢复 physics_state 保存的物理状态
+        """
+        self.y, self.vel_y, self.rot, self.flapped, self.flap_shift = state
+
+    def rotated_sprite(self, alpha: int = None) -> pygame.Surface:
+        """
+        获取当前图像按当前角度旋转、并预先设置好透明度的精灵
+
+        :param alpha: 透明度，None 表示不透明
+        """
+        key = (self.image, self.rot, alpha)
+        sprite = rotated_sprites.get(key)
+        if sprite is None:
+            sprite = pygame.transform.rotate(self.image, self.rot)
+            if alpha is not None:
+                sprite.set_alpha(alpha)
+            rotated_sprites[key] = sprite
+            if len(rotated_sprites) > SPRITE_CACHE_SIZE:
+                rotated_sprites.popitem(last=False)  # 淘汰最久未使用的精灵
+        else:
+            rotated_sprites.move_to_end(key)
+        return sprite
+
+    def blit_sprite(self, surface, rotated_rect: pygame.Rect, alpha: int = None) -> None:
+        """
+        按当前角度和透明度绘制玩家：目标支持变换时交给渲染器，否则绘制缓存的旋转精灵
+
+        :param surface: 绘制的目标表面
+        :param rotated_rect: 旋转后精灵的矩形
+        :param alpha: 透明度，None 表示不透明
+        """
+        if getattr(surface, "transforms", False):
+            dest = self.image.get_rect(center=rotated_rect.center)
+            surface.submit_transformed(self.image, dest, self.rot, alpha)
+        else:
+            surface.blit(self.rotated_sprite(alpha), rotated_rect)
+
+    def rotated_rect(self, surface) -> pygame.Rect:
+        """
+        旋转后精灵的矩形（中心与玩家相同），每次调用返回同一个矩形
+        """
+        rect = self._rotated_rect
+        if not getattr(surface, "transforms", False):
+            rect.size = self.rotated_sprite().get_size()
+        else:
+            # 渲染器旋转时不生成旋转后的精灵，按旋转角度计算外接矩形
+            angle = math.radians(self.rot)
+            cos, sin = abs(math.cos(angle)), abs(math.sin(angle))
+            rect.size = (math.ceil(self.w * cos + self.h * sin), math.ceil(self.w * sin + self.h * cos))
+        rect.center = self.rect.center
+        return rect
 
     def draw_player(self, surface) -> None:
         """
@@ -345,112 +347,71 @@ class Player(Entity):
         
         :param surface: 绘制的目标表面
         """
-        rotated_image = pygame.transform.rotate(self.image, self.rot)
-        rotated_rect = rotated_image.get_rect(center=self.rect.center)
-        
-        # 爆炸效果渲染
-        if self.explosion_active:
-            current_time = pygame.time.get_ticks()
-            elapsed = current_time - self.explosion_start_time
-            if elapsed < self.explosion_duration:
-                # 爆炸渐变半径
-                max_size = max(rotated_rect.width, rotated_rect.height)
-                radius = int(max_size * (elapsed / self.explosion_duration) * 2)
-                # 创建透明圆形表面
-                explosion_surf = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
-                alpha = max(0, 255 - int(255 * (elapsed / self.explosion_duration)))
-                pygame.draw.circle(
-                    explosion_surf,
-                    (255, 165, 0, alpha),  # 橙色爆炸
-                    (radius, radius),
-                    radius
-                )
-                exp_rect = explosion_surf.get_rect(center=rotated_rect.center)
-                surface.blit(explosion_surf, exp_rect)
-            else:
-                self.explosion_active = False
+        rotated_rect = self.rotated_rect(surface)
         
         # 无敌状态时添加闪烁效果
-        if self.invincible and pygame.time.get_ticks() % 200 < 100:
-            # 创建一个带有透明度的副本
-            alpha_image = rotated_image.copy()
-            alpha_image.set_alpha(150)
-            surface.blit(alpha_image, rotated_rect)
+        if self.invincible and self.config.ticks() % 200 < 100:
+            # 带有透明度的缓存精灵
+            self.blit_sprite(surface, rotated_rect, 150)
             
             # 添加光环效果
             glow_size = max(rotated_rect.width, rotated_rect.height) + 10
-            glow_surface = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
-            pygame.draw.circle(
-                glow_surface, 
-                (255, 215, 0, 100),  # 金色光环
-                (glow_size//2, glow_size//2), 
-                glow_size//2
-            )
+            glow_surface = glow_sprite((255, 215, 0, 100), glow_size)  # 金色光环
             glow_rect = glow_surface.get_rect(center=rotated_rect.center)
             surface.blit(glow_surface, glow_rect)
             
         # 穿越模式时添加透明效果
         if self.is_ghost_mode:
-            # 创建一个带有透明度的副本
-            alpha_image = rotated_image.copy()
-            alpha_image.set_alpha(self.ghost_alpha)
-            surface.blit(alpha_image, rotated_rect)
-            
-            # 显示剩余穿越次数
-            font = pygame.font.Font(None, 36)
-            life_text = font.render(f"Ghost Life: {self.ghost_life}", True, (255, 255, 255))
-            life_text_outline = font.render(f"Ghost Life: {self.ghost_life}", True, (0, 0, 0))
-            text_pos = (10, 10)
-            # 先绘制描边
-            surface.blit(life_text_outline, (text_pos[0]-1, text_pos[1]-1))
-            surface.blit(life_text_outline, (text_pos[0]+1, text_pos[1]-1))
-            surface.blit(life_text_outline, (text_pos[0]-1, text_pos[1]+1))
-            surface.blit(life_text_outline, (text_pos[0]+1, text_pos[1]+1))
-            # 再绘制文本
-            surface.blit(life_text, text_pos)
+            # 带有透明度的缓存精灵
+            self.blit_sprite(surface, rotated_rect, self.ghost_alpha)
             
         # 夜间模式时添加夜视效果
         if self.is_night_mode:
-            # 创建一个带有透明度的副本
-            alpha_image = rotated_image.copy()
-            alpha_image.set_alpha(200)
-            surface.blit(alpha_image, rotated_rect)
+            # 带有透明度的缓存精灵
+            self.blit_sprite(surface, rotated_rect, 200)
             
             # 添加夜视效果
             night_vision_size = max(rotated_rect.width, rotated_rect.height) + 20
-            night_vision_surface = pygame.Surface((night_vision_size, night_vision_size), pygame.SRCALPHA)
-            pygame.draw.circle(
-                night_vision_surface, 
-                (0, 0, 255, 100),  # 蓝色夜视
-                (night_vision_size//2, night_vision_size//2), 
-                night_vision_size//2
-            )
+            night_vision_surface = glow_sprite((0, 0, 255, 100), night_vision_size)  # 蓝色夜视
             night_vision_rect = night_vision_surface.get_rect(center=rotated_rect.center)
             surface.blit(night_vision_surface, night_vision_rect)
             
-        surface.blit(rotated_image, rotated_rect)
+        self.blit_sprite(surface, rotated_rect, self.alpha)
 
     def stop_wings(self) -> None:
         self.img_gen = cycle([self.img_idx])
 
-    def flap(self) -> None:
-        if self.mode == PlayerMode.REVERSE:
-            # 反向模式下的拍打逻辑
-            if self.y < self.max_y:
-                self.vel_y = self.flap_acc  # 向下加速
-                self.flapped = True
-                self.rot = -80  # 反向旋转
-                self.config.sounds.wing.play()
-        else:
-            # 正常模式下的拍打逻辑
-            if self.y > self.min_y:
-                self.vel_y = self.flap_acc
-                self.flapped = True
-                self.rot = 80
+    def flap(self, lead: float = 0.0) -> None:
+        """
+        拍打
+
+        :param lead: 输入早于本帧开始的时间（以帧为单位，0~1），下一次更新时补偿这段时间内的位移
+        """
+        if self.crashed:
+            return  # 多只小鸟同场时，撞毁的小鸟在其他小鸟继续飞行时下落
+        # 拍打方向与重力相反；反向模式下向下拍打
+        can_flap = self.y < self.max_y if self.flap_acc > 0 else self.y > self.min_y
+        if can_flap:
+            if not self.flapped:
+                self.flap_shift = lead * (self.flap_acc - self.vel_y)
+            self.vel_y = self.flap_acc
+            self.flapped = True
+            self.rot = self.flap_rot
+            if not self.quiet:
                 self.config.sounds.wing.play()
 
-    def crossed(self, pipe: Pipe) -> bool:
-        return pipe.cx <= self.cx < pipe.cx - pipe.vel_x
+    def pass_pipe(self, pipe: Pipe) -> bool:
+        """
+        得分规则：小鸟的x坐标进入管道的水平范围时得分，每根管道只计一次。单人游戏、多只小鸟同场、
+        联网比赛的服务器和无界面评测都使用这条规则。管道的间距大于宽度，小鸟同时只会在一根管道的
+        范围内，只需记住最近得分的管道。
+
+        :return: 本帧是否得分
+        """
+        if pipe is self.last_pipe or not pipe.x < self.x < pipe.x + pipe.w:
+            return False
+        self.last_pipe = pipe
+        return True
 
     def collided(self, pipes: Pipes, floor: Floor) -> bool:
         """returns True if player collides with floor or pipes."""
@@ -481,7 +442,7 @@ class Player(Entity):
                             break
             
             # 如果有碰撞，并且冷却时间已过，消耗一次穿越次数
-            current_time = pygame.time.get_ticks()
+            current_time = self.config.ticks()
             if has_collision and current_time - self.last_collision_time >= self.collision_cooldown:
                 self.ghost_life -= 1
                 self.last_collision_time = current_time
@@ -513,10 +474,27 @@ class Player(Entity):
 
         return False
 
+    def activate_ghost(self) -> bool:
+        """
+        主动穿越：消耗一次穿越次数并产生爆炸效果
+
+        :return: 是否成功激活
+        """
+        if not self.is_ghost_mode or self.ghost_life <= 0:
+            return False
+        self.ghost_life -= 1
+        self.explode()
+        return True
+
+    def explode(self) -> None:
+        """在玩家位置产生爆炸粒子效果"""
+        if self.config.particles:
+            self.config.particles.explosion_at(self.cx, self.cy)
+
     def update_bomb(self) -> None:
         """更新炮弹状态"""
         if not self.bomb_ready:
-            current_time = pygame.time.get_ticks()
+            current_time = self.config.ticks()
             if current_time - self.bomb_start_time >= self.bomb_duration:
                 self.bomb_ready = True
                 print(f"Bomb deactivated! is_bomb_mode={self.is_bomb_mode}, bomb_ready={self.bomb_ready}")
@@ -526,9 +504,7 @@ class Player(Entity):
         if self.bomb_ready:
             self.bomb_ready = False
             self.is_bomb_mode = True  # 设置为炮弹模式
-            self.bomb_start_time = pygame.time.get_ticks()
-            # 激活爆炸效果
-            self.explosion_active = True
-            self.explosion_start_time = pygame.time.get_ticks()
+            self.bomb_start_time = self.config.ticks()
+            self.explode()  # 激活爆炸效果
             self.config.sounds.point.play()  # 播放炮弹音效
             print(f"Bomb activated! is_bomb_mode={self.is_bomb_mode}, bomb_ready={self.bomb_ready}")
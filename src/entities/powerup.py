@@ -1,10 +1,12 @@
-import random
 from enum import Enum
-from typing import Optional
+from typing import Callable, Iterator, Optional, Tuple
 
 import pygame
 
 from ..utils import GameConfig
+from ..utils.levels import NO_POWERUP, random_powerup_stream
+from ..utils.scheduler import REFRESH, EffectScheduler
+from ..utils.render_queue import LAYER_POWERUPS
 from .entity import Entity
 
 
@@ -16,8 +18,23 @@ class PowerUpType(Enum):
     SMALL_SIZE = "SMALL_SIZE"    # 缩小玩家
 
 
+# 关卡序列中的道具类型序号对应的道具（序号0表示不生成）
+POWERUP_TYPES = tuple(PowerUpType)
+
+POWERUP_DURATION = 5000  # 道具持续时间(毫秒)
+
+# 互斥的效果：同时只能有一个生效，后拾取的会结束先前的效果
+EXCLUSIVE_EFFECTS = {
+    PowerUpType.SPEED_BOOST: (PowerUpType.SLOW_MOTION,),
+    PowerUpType.SLOW_MOTION: (PowerUpType.SPEED_BOOST,),
+}
+
+
 class PowerUp(Entity):
     """道具实体类"""
+
+    layer = LAYER_POWERUPS  # 绘制层级
+
     def __init__(self, config: GameConfig, power_type: PowerUpType, x: int, y: int) -> None:
         # 创建基本的圆形表示
         size = 30
@@ -33,8 +50,8 @@ class PowerUp(Entity):
         }
         
         self.color = color_map[power_type]
-        self.duration = 5000  # 道具持续时间(毫秒)
-        self.vel_x = -4  # 水平移动速度
+        self.duration = POWERUP_DURATION  # 道具持续时间(毫秒)
+        self.vel_x = -8  # 水平移动速度（每帧，由 PowerUpManager.tick 移动）
         
         # 创建道具表面
         surface = pygame.Surface((size, size), pygame.SRCALPHA)
@@ -78,7 +95,6 @@ class PowerUp(Entity):
         :param surface: 绘制的目标表面
         """
         if not self.collected:  # 如果道具未被收集
-            self.x += self.vel_x  # 更新道具位置
             super().draw(surface)  # 调用父类的绘制方法，传递surface参数
     
     def animate(self) -> None:
@@ -112,13 +128,36 @@ class PowerUp(Entity):
 
 class PowerUpManager:
     """道具管理器，负责道具的生成、更新和移除"""
-    def __init__(self, config: GameConfig) -> None:
+    def __init__(self, config: GameConfig,
+                 on_apply: Optional[Callable[[PowerUpType], None]] = None,
+                 on_expire: Optional[Callable[[PowerUpType], None]] = None,
+                 stream: Optional[Iterator[Tuple[int, int]]] = None) -> None:
+        """
+        :param config: 游戏配置
+        :param on_apply: 效果开始时的回调（例如 Player.apply_powerup_effect）
+        :param on_expire: 效果结束时的回调（例如 Player.remove_powerup_effect）
+        :param stream: 产出 (道具类型, y坐标) 的关卡序列（见 LevelStream.powerups），默认随机生成
+        """
         self.config = config
         self.powerups = []
         self.spawn_timer = 0
         self.spawn_interval = 3000  # 每3秒生成一次道具的机会
         self.spawn_chance = 0.6     # 60%概率生成道具
-        self.active_effects = {}    # 当前激活的效果 {PowerUpType: end_time}
+        self.effects = EffectScheduler(on_apply, on_expire)  # 当前激活的效果
+        self.stream = stream or random_powerup_stream(config.window.height, self.spawn_chance)
+
+    def reset(self) -> None:
+        """清空道具和激活的效果"""
+        self.powerups = []
+        self.effects.clear()
+
+    def pause(self) -> None:
+        """暂停效果计时"""
+        self.effects.pause()
+
+    def resume(self) -> None:
+        """恢复效果计时"""
+        self.effects.resume()
     
     def tick(self, delta_time: int) -> None:
         """更新所有道具状态"""
@@ -126,69 +165,47 @@ class PowerUpManager:
         self.spawn_timer += delta_time
         if self.spawn_timer >= self.spawn_interval:
             self.spawn_timer = 0
-            if random.random() < self.spawn_chance:
-                self.spawn_powerup()
-        
-        # 更新和移除道具
-        for powerup in list(self.powerups):
+            kind, y = next(self.stream)  # 每次生成机会消耗序列中的一项
+            if kind != NO_POWERUP:
+                self.spawn_powerup(POWERUP_TYPES[kind - 1], y)
+        
+        # 移动并绘制道具，原地移除超出屏幕的道具（保持顺序，不复制列表）
+        powerups = self.powerups
+        kept = 0
+        for powerup in powerups:
+            powerup.x += powerup.vel_x
             powerup.tick()
-            # 移除超出屏幕的道具
-            if powerup.x < -powerup.w:
-                self.powerups.remove(powerup)
-        
-        # 更新激活效果的剩余时间
-        current_time = pygame.time.get_ticks()
-        expired_effects = []
+            if powerup.x >= -powerup.w:
+                powerups[kept] = powerup
+                kept += 1
+        del powerups[kept:]
         
-        for effect_type, end_time in self.active_effects.items():
-            if current_time >= end_time:
-                expired_effects.append(effect_type)
-                
-        # 移除过期效果
-        for effect in expired_effects:
-            self.active_effects.pop(effect)
+        # 推进效果计时，到期的效果会触发 on_expire 回调
+        self.effects.advance(delta_time)
     
-    def spawn_powerup(self) -> None:
-        """生成一个随机道具"""
-        # 从枚举中随机选择一个道具类型
-        power_type = random.choice(list(PowerUpType))
-        
-        # 在合适的位置生成道具
+    def spawn_powerup(self, power_type: PowerUpType, y: int) -> None:
+        """在屏幕右侧生成一个道具"""
         x = self.config.window.width + 10
-        # 在屏幕中央区域随机生成
-        min_y = int(self.config.window.height * 0.2)
-        max_y = int(self.config.window.height * 0.7)
-        y = random.randint(min_y, max_y)
-        
-        # 创建道具并添加到列表
         powerup = PowerUp(self.config, power_type, x, y)
         self.powerups.append(powerup)
     
-    def activate_effect(self, power_type: PowerUpType) -> None:
-        """激活道具效果"""
-        current_time = pygame.time.get_ticks()
-        end_time = current_time + PowerUp(self.config, power_type, 0, 0).duration
-        self.active_effects[power_type] = end_time
+    def activate_effect(self, power_type: PowerUpType, effects: Optional[EffectScheduler] = None) -> None:
+        """
+        激活道具效果，已激活的效果重新计时
+
+        :param power_type: 道具类型
+        :param effects: 拾取道具的小鸟的效果计时，默认为 self.effects（多只小鸟同场时各自计时，见 Flock）
+        """
+        effects = self.effects if effects is None else effects
+        effects.activate(power_type, POWERUP_DURATION, REFRESH, EXCLUSIVE_EFFECTS.get(power_type, ()))
         
         # 播放音效
-        if power_type == PowerUpType.SPEED_BOOST:
-            self.config.sounds.point.play()
-        elif power_type == PowerUpType.INVINCIBLE:
-            self.config.sounds.point.play()
-        elif power_type == PowerUpType.SLOW_MOTION:
-            self.config.sounds.point.play()
-        elif power_type == PowerUpType.SMALL_SIZE:
-            self.config.sounds.point.play()
+        self.config.sounds.point.play()
     
     def has_effect(self, power_type: PowerUpType) -> bool:
         """检查指定的效果是否处于激活状态"""
-        return power_type in self.active_effects
+        return self.effects.is_active(power_type)
     
     def get_remaining_time(self, power_type: PowerUpType) -> Optional[int]:
         """获取效果剩余时间"""
-        if not self.has_effect(power_type):
-            return None
-        
-        current_time = pygame.time.get_ticks()
-        end_time = self.active_effects[power_type]
-        return max(0, end_time - current_time)
+        return self.effects.remaining(power_type)
@@ -1,21 +1,46 @@
 import pygame
 
 from ..utils import GameConfig
+from ..utils.render_queue import LAYER_SCORE
 from .entity import Entity
 
 
 class Score(Entity):
     """
     分数显示类
+
+    数字图像只在分数变化时合成为一个缓存表面，每帧只需一次绘制。
     """
-    def __init__(self, config: GameConfig) -> None:
+
+    layer = LAYER_SCORE  # 绘制层级
+
+    def __init__(self, config: GameConfig, y: float = None, align: str = "center",
+                 scale: float = 1.0, margin: int = 10) -> None:
         """
         初始化分数
         :param config: 游戏配置
+        :param y: 分数显示y坐标，默认为窗口高度的10%
+        :param align: 对齐方式，left、center 或 right
+        :param scale: 数字缩放比例，用于最高分等较小的显示
+        :param margin: 左对齐或右对齐时距窗口边缘的距离
         """
         super().__init__(config)
-        self.y = self.config.window.height * 0.1  # 分数显示y坐标
+        self.y = self.config.window.height * 0.1 if y is None else y  # 分数显示y坐标
+        self.align = align  # 对齐方式
+        self.margin = margin  # 边距
         self.score = 0  # 初始分数
+        if scale == 1.0:
+            self.digits = self.config.images.numbers
+        else:
+            # 缩放后的数字图像只生成一次
+            self.digits = [
+                pygame.transform.smoothscale(
+                    image, (max(1, int(image.get_width() * scale)), max(1, int(image.get_height() * scale)))
+                )
+                for image in self.config.images.numbers
+            ]
+        self._rendered_score = None  # 缓存表面对应的分数
+        self._rect = pygame.Rect(0, 0, 0, 0)  # 缓存的矩形区域
 
     def reset(self) -> None:
         """
@@ -30,29 +55,50 @@ class Score(Entity):
         self.score += 1  # 分数加1
         self.config.sounds.point.play()  # 播放得分音效
 
+    def set(self, score: int) -> None:
+        """
+        直接设置显示的分数（用于最高分等显示）
+        """
+        self.score = score
+
+    def _refresh(self) -> None:
+        """
+        分数变化时重新合成数字表面
+        """
+        if self._rendered_score == self.score:
+            return
+        images = [self.digits[int(digit)] for digit in str(self.score)]  # 获取数字图像
+        w = sum(image.get_width() for image in images)  # 计算总宽度
+        h = max(image.get_height() for image in images)  # 计算高度
+        self.image = pygame.Surface((w, h), pygame.SRCALPHA)
+        x_offset = 0
+        for image in images:
+            self.image.blit(image, (x_offset, 0))  # 绘制数字
+            x_offset += image.get_width()  # 更新x轴偏移量
+
+        if self.align == "left":
+            x = self.margin
+        elif self.align == "right":
+            x = self.config.window.width - self.margin - w
+        else:
+            x = (self.config.window.width - w) / 2  # 居中
+        self.x, self.w, self.h = x, w, h
+        self._rect = pygame.Rect(x, self.y, w, h)
+        self._rendered_score = self.score
+
     @property
     def rect(self) -> pygame.Rect:
         """
         获取分数矩形区域
         """
-        score_digits = [int(x) for x in list(str(self.score))]  # 将分数转换为数字列表
-        images = [self.config.images.numbers[digit] for digit in score_digits]  # 获取数字图像
-        w = sum(image.get_width() for image in images)  # 计算总宽度
-        x = (self.config.window.width - w) / 2  # 计算x坐标
-        h = max(image.get_height() for image in images)  # 计算高度
-        return pygame.Rect(x, self.y, w, h)  # 返回矩形区域
+        self._refresh()
+        return self._rect
 
     def draw(self, surface) -> None:
         """
-        在屏幕中央显示分数
-        
+        显示分数
+
         :param surface: 绘制的目标表面
         """
-        score_digits = [int(x) for x in list(str(self.score))]  # 将分数转换为数字列表
-        images = [self.config.images.numbers[digit] for digit in score_digits]  # 获取数字图像
-        digits_width = sum(image.get_width() for image in images)  # 计算数字总宽度
-        x_offset = (self.config.window.width - digits_width) / 2  # 计算x轴偏移量
-
-        for image in images:
-            surface.blit(image, (x_offset, self.y))  # 绘制数字
-            x_offset += image.get_width()  # 更新x轴偏移量
+        self._refresh()
+        surface.blit(self.image, self._rect)
@@ -1,6 +1,7 @@
 import math
 import pygame
 from ..utils import GameConfig
+from ..utils.render_queue import LAYER_MESSAGE
 from .entity import Entity
 
 
@@ -8,6 +9,9 @@ class WelcomeMessage(Entity):
     """
     欢迎信息类
     """
+
+    layer = LAYER_MESSAGE  # 绘制层级
+
     def __init__(self, config: GameConfig) -> None:
         """
         初始化欢迎信息
@@ -27,6 +31,10 @@ class WelcomeMessage(Entity):
             x=(config.window.width - image.get_width()) // 2,
             y=self.original_y,
         )
+
+        # 阴影只生成一次
+        self.shadow = pygame.Surface((self.image.get_width() + 4, self.image.get_height() + 4), pygame.SRCALPHA)
+        self.shadow.fill((0, 0, 0, 100))
     
     def update(self):
         """更新欢迎信息的动画效果"""
@@ -37,9 +45,7 @@ class WelcomeMessage(Entity):
     def draw(self, surface):
         """绘制欢迎信息"""
         # 添加阴影效果
-        shadow_surf = pygame.Surface((self.image.get_width()+4, self.image.get_height()+4), pygame.SRCALPHA)
-        shadow_surf.fill((0, 0, 0, 100))
-        surface.blit(shadow_surf, (self.x-2, self.y-2))
+        surface.blit(self.shadow, (self.x - 2, self.y - 2))
         
         # 绘制主体
         super().draw(surface)
@@ -1,27 +1,60 @@
 import asyncio
+import gc
+import itertools
+import os
 import sys
+from collections import deque
+from contextlib import contextmanager
 
 import pygame
-from pygame.locals import K_ESCAPE, K_SPACE, K_UP, KEYDOWN, QUIT
+from pygame.locals import K_ESCAPE, KEYDOWN, QUIT
 
 from .entities import (
     Background,
+    EffectTimersWidget,
+    Entity,
+    Flock,
     Floor,
     GameOver,
+    GhostRace,
+    Hud,
+    ParticleSystem,
     Pipes,
     Player,
     PlayerMode,
     Score,
+    ScoreWidget,
+    TextWidget,
     WelcomeMessage,
 )
-from .entities.powerup import PowerUpManager, PowerUpType
-from .utils import GameConfig, Images, Sounds, Window
+from .entities.particles import glow_sprite
+from .entities.player import rotated_sprites
+from .entities.powerup import POWERUP_TYPES, PowerUpManager, PowerUpType
+from .modes import all_modes, get_mode, load_plugins
+from .startup import timeline
+from .utils import (
+    GameConfig,
+    GhostRecorder,
+    GhostStore,
+    Images,
+    LevelStream,
+    Sounds,
+    Window,
+    create_display,
+    get_hit_mask,
+    open_stats_store,
+    parse_seed,
+)
+from .utils.capture import FrameRecorder
+from .utils.ghosts import GHOST_RUNS
+from .utils.levels import NO_POWERUP
+from .utils.memory import MemoryMonitor
+from .utils.render_queue import LAYER_HUD, LAYER_MESSAGE, LAYER_PLAYER
 from enum import Enum
-import random
 
 
 class GameMode(Enum):
-    """游戏模式枚举"""
+    """内置游戏模式枚举，名称与 modes 中注册的模式一致"""
     CLASSIC = "经典模式"    # 经典无限模式
     TIMED = "限时挑战"      # 限时挑战模式
     REVERSE = "反向模式"    # 重力反转模式
@@ -30,273 +63,407 @@ class GameMode(Enum):
     SPEED = "极速模式"       # 极速模式
 
 
+ATTRACT_DELAY = 8000  # 欢迎界面无操作多久后开始自动演示（毫秒）
+# 游戏进行中第0代垃圾回收的阈值（默认700）：稳态的每帧没有净分配，回收只会因为偶发的分配
+# （新管道、重新规划等）触发，提高阈值后游戏进行中基本不再停顿，真正的泄漏仍会被回收
+PLAY_GC_THRESHOLD = 50000
+
+# 道具效果在HUD上显示的名称和颜色
+EFFECT_LABELS = {
+    PowerUpType.SPEED_BOOST: ("Speed Boost", (255, 165, 0)),  # 橙色
+    PowerUpType.INVINCIBLE: ("Invincible", (255, 215, 0)),  # 金色
+    PowerUpType.SLOW_MOTION: ("Slow Motion", (0, 191, 255)),  # 天蓝色
+    PowerUpType.SMALL_SIZE: ("Small Size", (147, 112, 219)),  # 紫色
+}
+
+
 class Flappy:
-    def __init__(self):
+    def __init__(self, seed=None, autoplay=None, players=None, bots=None):
         """
         初始化Flappy Bird游戏
+
+        :param seed: 关卡种子，"daily" 表示每日挑战；默认读取环境变量 FLAPPY_SEED，未设置时随机生成关卡
+        :param autoplay: 由 AutoPlayer 自动游戏的模式名（如 "SPEED"），默认读取环境变量 FLAPPY_AUTOPLAY；
+                         自动游戏时跳过菜单并自动重新开始，可配合SDL的dummy驱动无界面运行
+        :param players: 本地玩家数（1~4），默认读取环境变量 FLAPPY_PLAYERS
+        :param bots: 同场的AI小鸟数，默认读取环境变量 FLAPPY_BOTS
         """
-        pygame.init()  # 初始化pygame
-        pygame.display.set_caption("Flappy Bird")  # 设置窗口标题
-        window = Window(288, 512)  # 创建窗口对象
-        screen = pygame.display.set_mode((window.width, window.height))  # 设置屏幕大小
-        images = Images()  # 加载图像资源
+        # 内存诊断（FLAPPY_MEMORY），尽早开始跟踪分配
+        self.memory = MemoryMonitor.from_env(
+            tracked=(Entity,),
+            caches={"hit_masks": get_hit_mask.cache, "glow_sprites": glow_sprite, "rotated_sprites": rotated_sprites},
+        )
+        if self.memory:
+            self.memory.start()
+        # 只初始化用到的子系统；pygame.init() 还会初始化手柄等用不到的子系统，
+        # 混音器由 Sounds 在第一次使用时初始化
+        with timeline.phase("pygame init"):
+            pygame.display.init()
+            pygame.font.init()
+            pygame.time.wait(0)  # 初始化SDL计时器，pygame.time.get_ticks 依赖它
+        with timeline.phase("display"):
+            pygame.display.set_caption("Flappy Bird")  # 设置窗口标题
+            window = Window(288, 512)  # 逻辑尺寸，游戏画在这个大小的渲染目标上
+            # 按 FLAPPY_RENDERER / FLAPPY_DISPLAY / FLAPPY_FULLSCREEN / FLAPPY_SCALE 输出到显示器
+            display = create_display(window)
+        with timeline.phase("images"):
+            images = Images()  # 加载图像资源
 
         self.config = GameConfig(
-            screen=screen,
+            screen=display.target,
             clock=pygame.time.Clock(),
-            fps=30,
+            fps=int(os.environ.get("FLAPPY_FPS", 30)),  # 0 表示不限帧率（无界面浸泡测试）
             window=window,
             images=images,
             sounds=Sounds(),
+            display=display,
         )
+        # 帧录制（FLAPPY_CAPTURE），编码在后台线程进行
+        self.config.recorder = FrameRecorder.from_env(display.target, self.config.fps)
+        # FLAPPY_FIXED_STEP（毫秒）：游戏时间按帧推进，不限帧率的无界面运行也按正常速度计时
+        fixed_step = os.environ.get("FLAPPY_FIXED_STEP")
+        if fixed_step:
+            self.config.fixed_step = float(fixed_step)
         # 记录上一帧的时间，用于计算delta_time
-        self.last_frame_time = pygame.time.get_ticks()
+        self.last_frame_time = self.config.ticks()
         
         # 游戏模式相关
-        self.game_mode = GameMode.CLASSIC  # 默认为经典模式
+        load_plugins()  # 加载第三方游戏模式
+        self.game_mode = get_mode(GameMode.CLASSIC.name)  # 默认为经典模式
         self.time_limit = 60 * 1000  # 限时模式的时间限制（毫秒）
         self.time_remaining = self.time_limit  # 剩余时间
 
+        # 自动游戏和欢迎界面的自动演示
+        autoplay = autoplay or os.environ.get("FLAPPY_AUTOPLAY")
+        self.autoplayer = self.create_autoplayer() if autoplay else None
+        # 成绩记录的来源：自动游戏的成绩单独统计，不计入玩家的最高分和排名
+        self.stats_source = "autoplay" if self.autoplayer else "player"
+        if autoplay and str(autoplay).upper() in GameMode.__members__:
+            self.game_mode = get_mode(str(autoplay).upper())
+        self.demo_player = None  # 自动演示使用的控制器，第一次演示时创建
+
+        # 预生成的关卡：同一种子每局的管道和道具完全相同
+        seed = parse_seed(str(seed) if seed is not None else os.environ.get("FLAPPY_SEED"))
+        self.level = LevelStream(seed, window.viewport_height, window.height) if seed is not None else None
+
+        # 本地多人和观战的AI小鸟：与第1位玩家共用管道和道具，只有一位玩家、没有AI小鸟时不创建
+        players = int(players or os.environ.get("FLAPPY_PLAYERS", 1))
+        bots = int(bots if bots is not None else os.environ.get("FLAPPY_BOTS", 0))
+        self.flock = Flock(self.config, players, bots, seed=seed) if players > 1 or bots else None
+
+        # 联网比赛（FLAPPY_RACE）：关卡和模式由服务器决定，见 race_lobby
+        self.race = None
+        if os.environ.get("FLAPPY_RACE"):
+            if self.flock:
+                raise RuntimeError("联网比赛不支持本地多人和AI小鸟")
+            from .net import RaceClient  # 只在联网比赛时导入
+
+            self.race = RaceClient.from_env(self.config)
+
+        # 幽灵赛跑：使用预生成关卡时记录每局的轨迹，回放同一关卡和模式上成绩最好的几局
+        # （FLAPPY_GHOSTS，默认 GHOST_RUNS，0 表示关闭）
+        self.ghost_count = int(os.environ.get("FLAPPY_GHOSTS", GHOST_RUNS))
+        self.ghost_store = GhostStore() if self.ghost_count > 0 else None
+        self.ghost_recorder = GhostRecorder()
+        self.ghost_race = None  # 本局回放的轨迹
+
+        # 本地最高分和统计数据，在第一帧显示之后打开
+        self.stats = None
+        self.round_start_time = 0  # 本局开始时间
+
+        # 设置 FLAPPY_GC=auto 时使用默认的垃圾回收设置，否则游戏进行中推迟回收（见 steady_state）
+        self.defer_gc = os.environ.get("FLAPPY_GC", "").lower() != "auto"
+
+        # 第一帧显示之后、欢迎界面的空闲帧里逐项完成的初始化，开始游戏前全部完成
+        self.warmup = deque([
+            self.open_stats,
+            self.config.sounds.preload,  # 初始化混音器并加载音效
+            self.prepare_hit_masks,
+            pygame.font.get_fonts,  # 建立系统字体列表，HUD的 SysFont 需要
+        ])
+
+    def open_stats(self):
+        """
+        打开本地统计数据库
+        """
+        with timeline.phase("stats"):
+            self.stats = open_stats_store()
+
+    def prepare_hit_masks(self):
+        """
+        预先计算参与碰撞的图像的碰撞掩码（结果有缓存），避免第一局开始时卡顿
+        """
+        images = self.config.images
+        with timeline.phase("hit masks"):
+            for image in (*images.player, *images.pipe, images.base):
+                get_hit_mask(image)
+            if self.flock:
+                for index in range(3):
+                    for image in images.player_frames(index):
+                        get_hit_mask(image)
+
+    @contextmanager
+    def steady_state(self):
+        """
+        游戏进行中提高第0代垃圾回收的阈值，避免回收停顿造成卡顿；本局结束后恢复
+        """
+        if not self.defer_gc:
+            yield
+            return
+        threshold = gc.get_threshold()
+        gc.set_threshold(PLAY_GC_THRESHOLD, *threshold[1:])
+        try:
+            yield
+        finally:
+            gc.set_threshold(*threshold)
+
+    def run_warmup(self, everything=False):
+        """
+        执行一项（或全部）延后的初始化
+        """
+        while self.warmup:
+            self.warmup.popleft()()
+            if not everything:
+                return
+
+    @staticmethod
+    def create_autoplayer():
+        """
+        创建自动游戏的控制器：设置环境变量 FLAPPY_POLICY（.npz 或 .onnx 文件）时使用策略网络，
+        否则使用 AutoPlayer
+        """
+        policy = os.environ.get("FLAPPY_POLICY")
+        if not policy:
+            from .agents import AutoPlayer  # 只在自动游戏时导入
+
+            return AutoPlayer()
+        from .agents.policy import PolicyController, PolicyRunner, load_policy  # 需要NumPy，按需导入
+
+        return PolicyController(PolicyRunner(load_policy(policy)))
+
     async def start(self):
         """
         启动游戏循环
         """
+        if self.race:
+            await self.race.connect()
         while True:
             self.background = Background(self.config)  # 创建背景对象
             self.floor = Floor(self.config)  # 创建地面对象
             self.player = Player(self.config)  # 创建玩家对象
             self.welcome_message = WelcomeMessage(self.config)  # 创建欢迎信息对象
             self.game_over_message = GameOver(self.config)  # 创建游戏结束信息对象
-            self.pipes = Pipes(self.config)  # 创建管道对象
+            self.pipes = Pipes(self.config, self.level and self.level.pipes())  # 创建管道对象
             self.score = Score(self.config)  # 创建得分对象
-            self.powerup_manager = PowerUpManager(self.config)  # 创建道具管理器
-            await self.splash()  # 显示欢迎界面
-            await self.play()  # 开始游戏
+            # 当前模式的最高分，以较小的数字显示在得分下方
+            self.best_score = Score(
+                self.config,
+                y=self.score.y + self.config.images.numbers[0].get_height() + 6,
+                scale=0.5,
+            )
+            # 创建道具管理器，效果开始和结束时各通知玩家一次
+            self.powerup_manager = PowerUpManager(
+                self.config,
+                on_apply=self.player.apply_powerup_effect,
+                on_expire=self.player.remove_powerup_effect,
+                stream=self.level and self.level.powerups(),
+            )
+            self.particles = ParticleSystem(self.config)  # 创建粒子系统
+            self.config.particles = self.particles
+            if not await self.splash():  # 显示欢迎界面
+                continue  # 自动演示结束，重新创建实体
+            with self.steady_state():
+                await self.play()  # 开始游戏
             await self.game_over()  # 游戏结束
 
+    def mode_buttons(self, modes, font):
+        """
+        预先渲染模式选择按钮，返回 [(文本, 文本位置, 选中框, 未选中框, 框位置), ...]
+        """
+        width, height = self.config.window.width, self.config.window.height
+        buttons = []
+        for i, mode in enumerate(modes):
+            text = font.render(mode.label, True, (255, 255, 255))
+            pos = (width // 2 - text.get_width() // 2, height // 2 + 20 + 50 * i)
+            rect = pygame.Rect(pos[0] - 20, pos[1] - 10, text.get_width() + 40, text.get_height() + 20)
+            box = rect.copy()
+            box.topleft = (0, 0)
+            # 活跃按钮：较深的填充和黄色边框
+            active = pygame.Surface(rect.size, pygame.SRCALPHA)
+            active.fill((50, 50, 50, 120))
+            pygame.draw.rect(active, (255, 255, 0), box, 3, border_radius=5)
+            # 非活跃按钮：更浅的半透明填充和灰色边框
+            inactive = pygame.Surface(rect.size, pygame.SRCALPHA)
+            inactive.fill((30, 30, 30, 80))
+            pygame.draw.rect(inactive, (100, 100, 100, 128), box, 2, border_radius=5)
+            buttons.append((text, pos, active, inactive, rect.topleft))
+        return buttons
+
     async def splash(self):
         """
         显示欢迎界面动画
         """
         self.player.set_mode(PlayerMode.SHM)  # 设置玩家模式为SHM（静止模式）
-        
+        if self.race:
+            return await self.race_lobby()  # 联网比赛由服务器开始
+        if self.autoplayer:
+            return True  # 自动游戏时直接开始，沿用初始化时选择的模式
+        modes = all_modes()  # 菜单按注册顺序列出所有模式
+
         # 初始化字体 - 使用系统默认字体并设置更大的字号
         title_font = pygame.font.Font(None, 36)  # 标题字体
         mode_font = pygame.font.Font(None, 28)  # 模式选择字体
         instruction_font = pygame.font.Font(None, 22)  # 指示字体
-        
-        # 创建文本 - 添加标题和更美观的文本
+
+        # 创建文本 - 标题、模式按钮和操作提示
         title_text = title_font.render("Game Mode Selection", True, (255, 255, 0))  # 黄色标题
-        classic_text = mode_font.render("Classic Mode", True, (255, 255, 255))
-        timed_text = mode_font.render("Timed Challenge", True, (255, 255, 255))
-        reverse_text = mode_font.render("Reverse Mode", True, (255, 255, 255))  # 添加反向模式文本
-        ghost_text = mode_font.render("Ghost Mode", True, (255, 255, 255))  # 添加穿越模式文本
-        night_text = mode_font.render("Night Mode", True, (255, 255, 255))  # 添加夜间模式文本
-        speed_text = mode_font.render("Speed Mode", True, (255, 255, 255))  # 添加极速模式文本
         instruction_text = instruction_font.render("UP/DOWN to select, SPACE to start", True, (220, 220, 220))
-        
-        # 为选择框准备颜色和大小
-        box_color_active = (255, 255, 0)  # 活跃选择的颜色
-        box_color_inactive = (100, 100, 100, 128)  # 非活跃选择的颜色
-        
-        # 计算文本位置 - 调整间距使界面更加平衡
-        title_pos = (self.config.window.width//2 - title_text.get_width()//2, self.config.window.height//2 - 50)  # 调整标题位置
-        classic_pos = (self.config.window.width//2 - classic_text.get_width()//2, 
-                      self.config.window.height//2 + 20)  # 调整经典模式位置
-        timed_pos = (self.config.window.width//2 - timed_text.get_width()//2, 
-                    self.config.window.height//2 + 70)  # 调整限时模式位置
-        reverse_pos = (self.config.window.width//2 - reverse_text.get_width()//2, 
-                      self.config.window.height//2 + 120)  # 添加反向模式位置
-        ghost_pos = (self.config.window.width//2 - ghost_text.get_width()//2, 
-                    self.config.window.height//2 + 170)  # 添加穿越模式位置
-        night_pos = (self.config.window.width//2 - night_text.get_width()//2, 
-                    self.config.window.height//2 + 220)  # 添加夜间模式位置
-        speed_pos = (self.config.window.width//2 - speed_text.get_width()//2, 
-                    self.config.window.height//2 + 270)  # 添加极速模式位置
-        instruction_pos = (self.config.window.width//2 - instruction_text.get_width()//2, 
-                          self.config.window.height//2 + 320)  # 调整指示文本位置
-        
-        # 为按钮创建矩形
-        classic_rect = pygame.Rect(classic_pos[0] - 20, classic_pos[1] - 10, 
-                                 classic_text.get_width() + 40, classic_text.get_height() + 20)
-        timed_rect = pygame.Rect(timed_pos[0] - 20, timed_pos[1] - 10, 
-                               timed_text.get_width() + 40, timed_text.get_height() + 20)
-        reverse_rect = pygame.Rect(reverse_pos[0] - 20, reverse_pos[1] - 10, 
-                                 reverse_text.get_width() + 40, reverse_text.get_height() + 20)  # 添加反向模式矩形
-        ghost_rect = pygame.Rect(ghost_pos[0] - 20, ghost_pos[1] - 10, 
-                                ghost_text.get_width() + 40, ghost_text.get_height() + 20)  # 添加穿越模式矩形
-        night_rect = pygame.Rect(night_pos[0] - 20, night_pos[1] - 10, 
-                                night_text.get_width() + 40, night_text.get_height() + 20)  # 添加夜间模式矩形
-        speed_rect = pygame.Rect(speed_pos[0] - 20, speed_pos[1] - 10, 
-                                speed_text.get_width() + 40, speed_text.get_height() + 20)  # 添加极速模式矩形
-        
+        buttons = self.mode_buttons(modes, mode_font)
+
+        # 计算文本位置
+        width, height = self.config.window.width, self.config.window.height
+        title_pos = (width // 2 - title_text.get_width() // 2, height // 2 - 50)
+        instruction_pos = (width // 2 - instruction_text.get_width() // 2, height // 2 + 20 + 50 * len(modes))
+
         # 默认选择经典模式
-        self.game_mode = GameMode.CLASSIC
-        selected_index = 0  # 0表示经典模式，1表示限时模式，2表示反向模式，3表示穿越模式，4表示夜间模式，5表示极速模式
+        selected_index = 0
+        self.game_mode = modes[selected_index]
+        queue = self.config.render_queue
+        idle_since = self.config.ticks()  # 最后一次操作的时间
 
         while True:
-            for event in pygame.event.get():
+            if self.config.ticks() - idle_since > ATTRACT_DELAY:
+                await self.attract()  # 长时间无操作，自动演示
+                return False
+
+            for event in self.config.input.events():
                 self.check_quit_event(event)  # 检查退出事件
-                
-                # 添加调试信息
-                if event.type == KEYDOWN:
-                    print(f"按键按下: {event.key}, pygame.K_m = {pygame.K_m}")
-                    
+                if event.type in (KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.FINGERDOWN):
+                    idle_since = self.config.ticks()
+
                 # 处理模式选择
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_DOWN:
-                        # 向下切换模式
-                        selected_index = (selected_index + 1) % 6  # 循环切换六种模式
-                        if selected_index == 0:
-                            self.game_mode = GameMode.CLASSIC
-                        elif selected_index == 1:
-                            self.game_mode = GameMode.TIMED
-                            # 重置计时器
-                            self.time_remaining = self.time_limit
-                        elif selected_index == 2:
-                            self.game_mode = GameMode.REVERSE
-                        elif selected_index == 3:
-                            self.game_mode = GameMode.GHOST
-                        elif selected_index == 4:
-                            self.game_mode = GameMode.NIGHT
-                        elif selected_index == 5:
-                            self.game_mode = GameMode.SPEED
-                        self.config.sounds.swoosh.play()
-                    elif event.key == pygame.K_UP:
-                        # 向上切换模式
-                        selected_index = (selected_index - 1) % 6  # 循环切换六种模式
-                        if selected_index == 0:
-                            self.game_mode = GameMode.CLASSIC
-                        elif selected_index == 1:
-                            self.game_mode = GameMode.TIMED
-                            # 重置计时器
-                            self.time_remaining = self.time_limit
-                        elif selected_index == 2:
-                            self.game_mode = GameMode.REVERSE
-                        elif selected_index == 3:
-                            self.game_mode = GameMode.GHOST
-                        elif selected_index == 4:
-                            self.game_mode = GameMode.NIGHT
-                        elif selected_index == 5:
-                            self.game_mode = GameMode.SPEED
-                        self.config.sounds.swoosh.play()
-                
+                if event.type == KEYDOWN and event.key in (pygame.K_DOWN, pygame.K_UP):
+                    step = 1 if event.key == pygame.K_DOWN else -1
+                    selected_index = (selected_index + step) % len(modes)  # 循环切换模式
+                    self.game_mode = modes[selected_index]
+                    self.config.sounds.swoosh.play()
+
                 # 空格或上箭头开始游戏
                 if self.is_tap_event(event):
-                    return
-            
+                    return True
+
             # 绘制背景、地面和玩家
             self.background.tick()  # 更新背景
             self.floor.tick()  # 更新地面
             self.player.tick()  # 更新玩家
             self.welcome_message.tick()  # 更新欢迎信息
-            
-            # 绘制标题
-            self.config.screen.blit(title_text, title_pos)
-            
-            # 绘制经典模式按钮
-            if selected_index == 0:
-                # 活跃按钮 - 绘制填充和边框
-                pygame.draw.rect(self.config.screen, (50, 50, 50), classic_rect)  # 深色填充
-                pygame.draw.rect(self.config.screen, box_color_active, classic_rect, 3, border_radius=5)  # 边框
-            else:
-                # 非活跃按钮 - 只绘制边框
-                transparent_color = (30, 30, 30, 80)  # 更浅的半透明
-                surf = pygame.Surface(classic_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, classic_rect)
-                pygame.draw.rect(self.config.screen, box_color_inactive, classic_rect, 2, border_radius=5)  # 边框
-            
-            # 绘制限时模式按钮
-            if selected_index == 1:
-                transparent_color = (50, 50, 50, 120)
-                surf = pygame.Surface(timed_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, timed_rect)
-                pygame.draw.rect(self.config.screen, box_color_active, timed_rect, 3, border_radius=5)
-            else:
-                transparent_color = (30, 30, 30, 80)
-                surf = pygame.Surface(timed_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, timed_rect)
-                pygame.draw.rect(self.config.screen, box_color_inactive, timed_rect, 2, border_radius=5)
-            
-            # 绘制反向模式按钮
-            if selected_index == 2:
-                transparent_color = (50, 50, 50, 120)
-                surf = pygame.Surface(reverse_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, reverse_rect)
-                pygame.draw.rect(self.config.screen, box_color_active, reverse_rect, 3, border_radius=5)
-            else:
-                transparent_color = (30, 30, 30, 80)
-                surf = pygame.Surface(reverse_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, reverse_rect)
-                pygame.draw.rect(self.config.screen, box_color_inactive, reverse_rect, 2, border_radius=5)
-            
-            # 绘制穿越模式按钮
-            if selected_index == 3:
-                transparent_color = (50, 50, 50, 120)
-                surf = pygame.Surface(ghost_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, ghost_rect)
-                pygame.draw.rect(self.config.screen, box_color_active, ghost_rect, 3, border_radius=5)
-            else:
-                transparent_color = (30, 30, 30, 80)
-                surf = pygame.Surface(ghost_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, ghost_rect)
-                pygame.draw.rect(self.config.screen, box_color_inactive, ghost_rect, 2, border_radius=5)
-            
-            # 绘制夜间模式按钮
-            if selected_index == 4:
-                transparent_color = (50, 50, 50, 120)
-                surf = pygame.Surface(night_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, night_rect)
-                pygame.draw.rect(self.config.screen, box_color_active, night_rect, 3, border_radius=5)
-            else:
-                transparent_color = (30, 30, 30, 80)
-                surf = pygame.Surface(night_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, night_rect)
-                pygame.draw.rect(self.config.screen, box_color_inactive, night_rect, 2, border_radius=5)
-            
-            # 绘制极速模式按钮
-            if selected_index == 5:
-                transparent_color = (50, 50, 50, 120)
-                surf = pygame.Surface(speed_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, speed_rect)
-                pygame.draw.rect(self.config.screen, box_color_active, speed_rect, 3, border_radius=5)
-            else:
-                transparent_color = (30, 30, 30, 80)
-                surf = pygame.Surface(speed_rect.size, pygame.SRCALPHA)
-                surf.fill(transparent_color)
-                self.config.screen.blit(surf, speed_rect)
-                pygame.draw.rect(self.config.screen, box_color_inactive, speed_rect, 2, border_radius=5)
-            
-            # 绘制文本
-            self.config.screen.blit(classic_text, classic_pos)
-            self.config.screen.blit(timed_text, timed_pos)
-            self.config.screen.blit(reverse_text, reverse_pos)
-            self.config.screen.blit(ghost_text, ghost_pos)
-            self.config.screen.blit(night_text, night_pos)
-            self.config.screen.blit(speed_text, speed_pos)
-            self.config.screen.blit(instruction_text, instruction_pos)
-            
-            pygame.display.update()  # 刷新显示
+
+            # 菜单绘制在所有实体之上
+            queue.submit(title_text, title_pos, LAYER_MESSAGE)
+            for i, (text, text_pos, active, inactive, box_pos) in enumerate(buttons):
+                queue.submit(active if i == selected_index else inactive, box_pos, LAYER_MESSAGE)
+                queue.submit(text, text_pos, LAYER_MESSAGE)
+            queue.submit(instruction_text, instruction_pos, LAYER_MESSAGE)
+
+            self.config.present()  # 输出渲染队列并刷新显示
+            timeline.first_frame()  # 启动时间线到此结束
+            self.run_warmup()  # 利用空闲帧完成一项延后的初始化
+            await asyncio.sleep(0)  # 等待下一帧
+            self.config.tick()  # 更新游戏配置
+
+    async def race_lobby(self):
+        """
+        联网比赛的等待界面：等待服务器开始比赛，按服务器的种子和模式准备本局
+
+        小鸟停在起点不动（与服务器模拟的初始位置相同）。比赛中没有道具，结果只取决于每帧是否拍打。
+
+        :raises RuntimeError: 与服务器的连接已断开
+        """
+        self.race.ready()
+        queue = self.config.render_queue
+        center = (self.config.window.width // 2, self.config.window.height // 2)
+        status = None
+        while True:
+            start = self.race.take_start()
+            if start is not None:
+                seed, self.game_mode = start
+                window = self.config.window
+                self.level = LevelStream(seed, window.viewport_height, window.height)
+                self.pipes = Pipes(self.config, self.level.pipes())
+                self.powerup_manager.stream = itertools.repeat((NO_POWERUP, 0))
+                return True
+            if self.race.closed:
+                raise RuntimeError("与比赛服务器的连接已断开")
+
+            for event in self.config.input.events():
+                self.check_quit_event(event)  # 检查退出事件
+
+            text = self.race.lobby_text()
+            if text != status:
+                status = text
+                label = self.render_lines([text], 26)
+            self.background.tick()  # 更新背景
+            self.floor.tick()  # 更新地面
+            queue.layer = LAYER_PLAYER
+            self.player.draw_player(queue)
+            queue.submit(label, label.get_rect(center=center), LAYER_MESSAGE)
+
+            self.config.present()  # 输出渲染队列并刷新显示
+            timeline.first_frame()  # 启动时间线到此结束
+            self.run_warmup()  # 利用空闲帧完成一项延后的初始化
+            await asyncio.sleep(0)  # 等待下一帧，处理收到的消息
+            self.config.tick()  # 更新游戏配置
+
+    async def attract(self):
+        """
+        欢迎界面的自动演示：由 AutoPlayer 控制小鸟飞行，任意操作或撞到障碍时结束
+        """
+        if self.demo_player is None:
+            from .agents import AutoPlayer  # 只在自动演示时导入
+
+            self.demo_player = AutoPlayer()
+        self.demo_player.reset()
+        get_mode("CLASSIC").setup(self)
+        font = pygame.font.Font(None, 28)
+        label = font.render("DEMO - press any key", True, (255, 255, 255))
+        label_pos = (self.config.window.width // 2 - label.get_width() // 2, self.config.window.height * 0.85)
+
+        while True:
+            for event in self.config.input.events():
+                self.check_quit_event(event)  # 检查退出事件
+                if event.type in (KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.FINGERDOWN):
+                    return
+
+            if self.demo_player.decide(self.player, self.pipes):
+                self.player.flap()
+
+            self.background.tick()  # 更新背景
+            self.floor.tick()  # 更新地面
+            self.pipes.tick()  # 更新管道
+            self.player.tick()  # 更新玩家
+            self.particles.tick()  # 更新并绘制粒子
+            self.config.render_queue.submit(label, label_pos, LAYER_MESSAGE)
+
+            self.config.present()  # 输出渲染队列并刷新显示
             await asyncio.sleep(0)  # 等待下一帧
             self.config.tick()  # 更新游戏配置
 
+            if self.player.collided(self.pipes, self.floor):
+                return
+
     def check_quit_event(self, event):
         """
         检查退出事件
         """
-        if event.type == QUIT or (
+        if event.type in (QUIT, pygame.WINDOWCLOSE) or (
             event.type == KEYDOWN and event.key == K_ESCAPE
         ):
+            if self.stats:
+                self.stats.close()  # 提交未写入的统计数据
+            if self.config.recorder:
+                self.config.recorder.close()  # 写完已录制的帧
+            if self.race:
+                self.race.close()  # 断开连接并输出流量统计
             pygame.quit()  # 退出pygame
             sys.exit()  # 退出程序
 
@@ -304,18 +471,14 @@ class Flappy:
         """
         检查点击事件
         """
-        m_left, _, _ = pygame.mouse.get_pressed()  # 检查鼠标左键是否按下
-        space_or_up = event.type == KEYDOWN and (
-            event.key == K_SPACE or event.key == K_UP
-        )  # 检查空格键或上箭头是否按下
-        screen_tap = event.type == pygame.FINGERDOWN  # 检查触摸事件
-        return m_left or space_or_up or screen_tap  # 返回是否有点击事件
+        # 空格、上箭头、鼠标左键或触摸按下的那一次，按住不放不重复触发
+        return self.config.input.is_tap(event)
 
     def calculate_delta_time(self):
         """
         计算两帧之间的时间差
         """
-        current_time = pygame.time.get_ticks()
+        current_time = self.config.ticks()
         delta_time = current_time - self.last_frame_time
         self.last_frame_time = current_time
         return delta_time
@@ -331,12 +494,8 @@ class Flappy:
         for powerup in self.powerup_manager.powerups:
             # 如果玩家碰到了道具
             if self.player.collide(powerup):
-                # 应用道具效果
-                self.player.apply_powerup_effect(powerup.power_type)
-                # 激活道具在管理器中的效果
+                # 激活道具效果（通过回调应用到玩家，同时播放音效）
                 self.powerup_manager.activate_effect(powerup.power_type)
-                # 播放得分声音
-                self.config.sounds.point.play()
                 # 添加到要删除的列表
                 powerups_to_remove.append(powerup)
         
@@ -345,62 +504,52 @@ class Flappy:
             if powerup in self.powerup_manager.powerups:
                 self.powerup_manager.powerups.remove(powerup)
 
-    def update_player_effects(self):
+    def active_effect_timers(self):
         """
-        根据当前激活的效果更新玩家状态
+        返回当前激活的效果及其剩余时间（精确到0.1秒），供HUD显示
         """
-        # 检查每种效果是否已过期
-        for power_type in list(PowerUpType):
-            if self.powerup_manager.has_effect(power_type):
-                # 效果仍然激活，确保效果被应用
-                self.player.apply_powerup_effect(power_type)
-            else:
-                # 效果已过期，移除
-                self.player.remove_powerup_effect(power_type)
-    
-    def render_active_effects(self):
-        """
-        在屏幕上显示当前激活的效果及其剩余时间
-        """
-        active_effects = []
-        for power_type in PowerUpType:
-            if self.powerup_manager.has_effect(power_type):
-                remaining_ms = self.powerup_manager.get_remaining_time(power_type)
-                if remaining_ms is not None:
-                    active_effects.append((power_type, remaining_ms))
-        
-        # 如果有激活的效果，在屏幕上显示
-        if active_effects:
-            font = pygame.font.SysFont('Arial', 10)
-            y_offset = 10
-            
-            for power_type, remaining_ms in active_effects:
-                remaining_sec = remaining_ms / 1000
-                
-                # 根据道具类型选择显示文本和颜色
-                if power_type == PowerUpType.SPEED_BOOST:
-                    text = f"Speed Boost: {remaining_sec:.1f}s"
-                    color = (255, 165, 0)  # 橙色
-                elif power_type == PowerUpType.INVINCIBLE:
-                    text = f"Invincible: {remaining_sec:.1f}s"
-                    color = (255, 215, 0)  # 金色
-                elif power_type == PowerUpType.SLOW_MOTION:
-                    text = f"Slow Motion: {remaining_sec:.1f}s"
-                    color = (0, 191, 255)  # 天蓝色
-                elif power_type == PowerUpType.SMALL_SIZE:
-                    text = f"Small Size: {remaining_sec:.1f}s"
-                    color = (147, 112, 219)  # 紫色
-                
-                # 创建文本表面
-                text_surface = font.render(text, True, color)
-                text_rect = text_surface.get_rect()
-                text_rect.topleft = (10, y_offset)
-                
-                # 绘制文本
-                self.config.screen.blit(text_surface, text_rect)
-                
-                # 更新下一个文本的位置
-                y_offset += 20
+        timers = ()  # 没有激活的效果时（大多数帧）不创建任何对象
+        for power_type in POWERUP_TYPES:
+            remaining_ms = self.powerup_manager.get_remaining_time(power_type)
+            if remaining_ms is not None:
+                label, color = EFFECT_LABELS[power_type]
+                timers += ((label, color, remaining_ms // 100),)
+        return timers
+
+    def build_hud(self):
+        """
+        根据当前游戏模式创建HUD控件
+        """
+        hud = Hud(self.config, [
+            ScoreWidget(self.score),
+            ScoreWidget(self.best_score, visible=lambda: self.best_score.score > 0),
+            EffectTimersWidget(self.active_effect_timers, (10, 10), pygame.font.SysFont('Arial', 10)),
+        ])
+        if self.flock:
+            # 各位玩家的得分和AI小鸟的存活数，显示在地面上方
+            pos = (self.config.window.width // 2, self.config.window.viewport_height - 4)
+            hud.add(TextWidget(self.flock.hud_text, pos, pygame.font.SysFont('Arial', 12),
+                               anchor="midbottom", outline=(0, 0, 0)))
+        if self.race:
+            # 联网比赛各选手的权威得分，显示在地面上方
+            pos = (self.config.window.width // 2, self.config.window.viewport_height - 4)
+            hud.add(TextWidget(self.race.standings_text, pos, pygame.font.SysFont('Arial', 12),
+                               anchor="midbottom", outline=(0, 0, 0)))
+        for widget in self.game_mode.hud_widgets(self):
+            hud.add(widget)  # 当前模式额外的控件
+        if self.config.debug:
+            hud.add(TextWidget(self.input_latency_text, (10, self.config.window.height - 20),
+                               pygame.font.SysFont('Arial', 12), outline=(0, 0, 0)))
+        return hud
+
+    def input_latency_text(self):
+        """
+        调试信息：最近的输入到显示延迟
+        """
+        stats = self.config.input.latency_stats()
+        if not stats:
+            return None
+        return f"input {stats['mean']:.1f}ms p95 {stats['p95']:.1f}ms max {stats['max']:.1f}ms"
 
     def check_pipe_pass(self):
         """
@@ -408,234 +557,283 @@ class Flappy:
         """
         # 为每个上管道检查是否通过
         for pipe in self.pipes.upper:
-            # 管道中心点
-            pipe_centerx = pipe.x + pipe.w/2
-            # 检查玩家是否刚刚通过管道中心点
-            if (pipe.x < self.player.x < pipe.x + pipe.w) and not hasattr(pipe, 'passed'):
-                # 标记该管道已通过
-                pipe.passed = True
-                # 增加分数
+            # 检查玩家是否刚刚进入管道范围（每根管道只计一次）
+            if self.player.pass_pipe(pipe):
+                # 增加分数（同时播放得分音效）
                 self.score.add()
-                # 播放得分声音
-                self.config.sounds.point.play()
+
+    def ghosts_enabled(self):
+        """
+        本局是否记录和回放轨迹：需要预生成关卡（管道才能逐帧对上），联网比赛时不使用
+        """
+        return self.ghost_store is not None and self.level is not None and not self.race
+
+    def save_ghost(self):
+        """
+        本局的成绩能进入当前关卡和模式的前几名时保存轨迹
+        """
+        if self.ghosts_enabled():
+            self.ghost_store.save(self.level, self.game_mode.name, self.score.score, self.ghost_recorder)
 
     async def play(self):
         """
         主要游戏循环
         """
-        # 当玩家开始游戏时
-        # 根据游戏模式设置玩家模式
-        if self.game_mode == GameMode.REVERSE:
-            self.player.set_mode(PlayerMode.REVERSE)  # 设置玩家模式为REVERSE（反向模式）
-        elif self.game_mode == GameMode.GHOST:
-            self.player.set_mode(PlayerMode.GHOST)  # 设置玩家模式为GHOST（穿越模式）
-        elif self.game_mode == GameMode.NIGHT:
-            self.player.set_mode(PlayerMode.NIGHT)  # 设置玩家模式为NIGHT（夜间模式）
-        elif self.game_mode == GameMode.SPEED:
-            self.player.set_mode(PlayerMode.SPEED)  # 设置玩家模式为SPEED（极速模式）
-            # 在极速模式下加快管道移动速度
-            for pipe in self.pipes.upper + self.pipes.lower:
-                pipe.vel_x = -8  # 增加管道速度
-        else:
-            self.player.set_mode(PlayerMode.NORMAL)  # 设置玩家模式为NORMAL（正常模式）
-            
-        self.powerup_manager.powerups = []  # 清空道具列表
-        self.powerup_manager.active_effects = {}  # 清空活跃效果
-        
-        # 重置计时器（如果是限时模式）
-        if self.game_mode == GameMode.TIMED:
-            self.time_remaining = self.time_limit
-            
-        # 创建字体用于显示剩余时间 - 使用Windows默认字体
-        time_font = pygame.font.SysFont('microsoftyahei', 24)  # 微软雅黑
+        self.run_warmup(everything=True)  # 开始游戏前完成所有延后的初始化
+        # 当玩家开始游戏时，由当前模式设置玩家物理参数、管道速度等
+        self.game_mode.setup(self)
+        self.powerup_manager.reset()  # 清空道具列表和活跃效果
+        if self.flock:
+            self.flock.reset(self.player, self.score, self.powerup_manager.effects,
+                             self.game_mode.player_mode, self.game_mode.physics)
+
+        # 幽灵赛跑：打开成绩最好的轨迹，重新开始记录
+        record_ghost = self.ghosts_enabled()
+        self.ghost_recorder.reset()
+        if record_ghost:
+            runs = self.ghost_store.runs(self.level, self.game_mode.name, self.ghost_count)
+            self.ghost_race = GhostRace(self.config, runs) if runs else None
+
         game_over = False
+        if self.autoplayer:
+            self.autoplayer.reset()
+        self.round_start_time = self.config.ticks()
+        if self.stats:
+            self.best_score.set(self.stats.best(self.game_mode.name, self.stats_source))
+        self.hud = self.build_hud()  # 创建当前模式的HUD
 
         while True:
             # 计算帧间隔时间
-            current_time = pygame.time.get_ticks()
+            current_time = self.config.ticks()
             delta_time = current_time - self.last_frame_time
             self.last_frame_time = current_time
 
-            for event in pygame.event.get():
+            for event in self.config.input.events():
                 self.check_quit_event(event)  # 检查退出事件
-                if event.type == KEYDOWN:
-                    print(f"按键按下: {event.key}, pygame.K_m = {pygame.K_m}")
-                    
+                if self.flock and self.flock.handle(event):
+                    continue  # 其他玩家的拍打键或手柄
                 if self.is_tap_event(event):
-                    self.player.flap()  # 玩家点击，执行拍打动作
-                elif event.type == KEYDOWN and event.key == pygame.K_m and self.game_mode == GameMode.GHOST:
-                    print(f"M键被按下! 游戏模式: {self.game_mode}, 是否为穿越模式: {self.game_mode == GameMode.GHOST}")
-                    # 激活穿越模式
-                    self.player.activate_ghost()
-                    # 检查是否成功激活穿越
-                    if self.player.is_ghost_mode and not self.player.ghost_ready:
-                        # 穿越：立即摧毁所有屏幕上可见的管道
-                        pipes_destroyed = 0
-                        for pipe in self.pipes.upper + self.pipes.lower:
-                            if not pipe.destroyed and pipe.x > 0 and pipe.x < self.config.window.width:
-                                pipe.destroy()
-                                pipes_destroyed += 1
-                        
-                        # 根据摧毁的管道数量，播放对应数量的得分音效
-                        if pipes_destroyed > 0:
-                            self.config.sounds.point.play()
-                            print(f"Ghost activated! {pipes_destroyed} pipes destroyed.")
-                    # 穿越：立即摧毁所有管道
-                    # for pipe in self.pipes.upper + self.pipes.lower:
-                    #     if not pipe.destroyed:
-                    #         pipe.destroy()
-                    #         self.config.sounds.point.play()
-                    # print("Ghost activated! Pipes destroyed.")
-
-            # 限时模式时间更新
-            if self.game_mode == GameMode.TIMED:
-                self.time_remaining -= delta_time
-                if self.time_remaining <= 0:
-                    self.time_remaining = 0
-                    game_over = True
-            
+                    # 玩家点击，执行拍打动作；补偿点击早于本帧的时间。联网比赛不补偿，
+                    # 拍打的效果只取决于帧号，服务器和其他选手才能重现
+                    lead = self.config.input.consume(event)
+                    self.player.flap(0.0 if self.race else lead)
+                elif event.type == KEYDOWN and event.key == pygame.K_p and not self.race:
+                    await self.pause()  # 暂停游戏
+                else:
+                    self.game_mode.on_event(self, event)  # 模式专属的输入
+
+            # 自动游戏：由控制器决定是否拍打，策略网络推理超时视为不拍打
+            if self.autoplayer and await self.autoplayer.request(self.player, self.pipes):
+                self.player.flap()
+            if self.flock:
+                self.flock.think(self.pipes)  # AI小鸟
+            if self.race:
+                self.race.record(self.player.flapped)  # 本帧的输入，攒够几帧或拍打时发送
+
+            # 模式逻辑（如限时模式计时），返回True时本局结束
+            if self.game_mode.update(self, delta_time):
+                game_over = True
+
             # 更新道具管理器
             self.powerup_manager.tick(delta_time)
             
-            # 检查道具碰撞
-            self.check_powerup_collisions()
-            
-            # 更新玩家状态效果
-            self.update_player_effects()
-            
-            # 检查管道通过情况并更新分数
-            self.check_pipe_pass()
+            if self.flock:
+                # 多只小鸟：道具归最先碰到的玩家，各自计分
+                self.flock.tick_effects(delta_time, self.powerup_manager.effects)
+                self.flock.collect(self.powerup_manager)
+                self.flock.score(self.pipes)
+            else:
+                # 检查道具碰撞
+                self.check_powerup_collisions()
+
+                # 检查管道通过情况并更新分数
+                self.check_pipe_pass()
             
             self.background.tick()  # 更新背景
             self.floor.tick()  # 更新地面
             self.pipes.tick()  # 更新管道
-            self.score.tick()  # 更新得分
-            self.player.tick()  # 更新玩家
-            
-            # 绘制道具
-            for powerup in self.powerup_manager.powerups:
-                powerup.tick()
-                
-            # 绘制活跃效果提示
-            self.render_active_effects()
-            
-            # 如果是限时模式，显示剩余时间
-            if self.game_mode == GameMode.TIMED:
-                seconds_left = max(0, int(self.time_remaining / 1000))
-                
-                # 创建一个半透明的计时器背景
-                timer_bg = pygame.Surface((100, 40), pygame.SRCALPHA)
-                alpha = 180  # 透明度
-                timer_bg.fill((0, 0, 0, alpha))
-                self.config.screen.blit(timer_bg, (self.config.window.width - 110, 5))
-                
-                # 绘制计时器文本
-                time_text = time_font.render(f"Time: {seconds_left}s", True, (255, 255, 255))
-                time_rect = time_text.get_rect(center=(self.config.window.width - 60, 25))
-                self.config.screen.blit(time_text, time_rect)
-                
-                # 当时间小于10秒时闪烁显示并添加红色警告效果
-                if seconds_left <= 10 and self.time_remaining > 0:
-                    # 闪烁效果
-                    if (current_time // 500) % 2 == 0:  # 每500毫秒闪烁一次
-                        # 创建警告背景
-                        warning_bg = pygame.Surface((200, 40), pygame.SRCALPHA)
-                        warning_bg.fill((255, 0, 0, 150))  # 半透明红色
-                        warning_rect = warning_bg.get_rect(center=(self.config.window.width//2, 50))
-                        self.config.screen.blit(warning_bg, warning_rect)
-                        
-                        # 警告文本
-                        warning_text = time_font.render("Time running out!", True, (255, 255, 255))
-                        warning_text_rect = warning_text.get_rect(center=(self.config.window.width//2, 50))
-                        self.config.screen.blit(warning_text, warning_text_rect)
-                        
-            # 夜间模式特效
-            if self.game_mode == GameMode.NIGHT:
-                # 创建一个全屏黑色半透明图层模拟黑夜
-                darkness = pygame.Surface((self.config.window.width, self.config.window.height), pygame.SRCALPHA)
-                darkness.fill((0, 0, 0, 180))  # 黑色半透明
-                
-                # 在玩家周围创建一个视野圆圈
-                vision_range = self.player.night_vision_range
-                pygame.draw.circle(
-                    darkness,
-                    (0, 0, 0, 0),  # 完全透明
-                    (int(self.player.x + self.player.w//2), int(self.player.y + self.player.h//2)),
-                    vision_range
-                )
-                
-                # 添加渐变效果到视野边缘
-                for i in range(30):
-                    pygame.draw.circle(
-                        darkness,
-                        (0, 0, 0, i * 6),  # 逐渐增加透明度
-                        (int(self.player.x + self.player.w//2), int(self.player.y + self.player.h//2)),
-                        vision_range + 30 - i
-                    )
-                
-                # 应用黑暗效果
-                self.config.screen.blit(darkness, (0, 0))
-            
-            # 极速模式特效
-            if self.game_mode == GameMode.SPEED:
-                # 创建速度线效果
-                for i in range(10):
-                    line_length = random.randint(20, 60)
-                    line_y = random.randint(0, self.config.window.height)
-                    line_x = random.randint(0, self.config.window.width)
-                    line_color = (255, 255, 255, 100)  # 白色半透明
-                    
-                    pygame.draw.line(
-                        self.config.screen,
-                        line_color,
-                        (line_x, line_y),
-                        (line_x - line_length, line_y),
-                        2
-                    )
-                
-                # 显示速度提示
-                speed_font = pygame.font.SysFont('microsoftyahei', 20)
-                speed_text = speed_font.render("极速模式!", True, (255, 255, 0))
-                speed_rect = speed_text.get_rect(topright=(self.config.window.width - 20, 20))
-                
-                # 创建一个闪烁效果
-                if pygame.time.get_ticks() % 1000 < 500:
-                    self.config.screen.blit(speed_text, speed_rect)
+            if self.race:
+                self.race.draw()  # 对手的小鸟
+            if self.ghost_race:
+                self.ghost_race.tick()  # 回放的轨迹
+            if self.flock:
+                self.flock.tick()  # 更新所有小鸟
+            else:
+                self.player.tick()  # 更新玩家
+            if record_ghost:
+                self.ghost_recorder.record(self.player)  # 本帧更新后的位置
+
+            self.game_mode.draw_overlay(self)  # 模式专属的覆盖效果（夜间视野、速度线等）
+            self.particles.tick()  # 更新并绘制粒子
+
+            self.hud.tick()  # 绘制HUD
             
-            pygame.display.update()  # 刷新显示
+            self.config.present()  # 输出渲染队列并刷新显示
+            timeline.first_frame()  # 自动游戏时跳过欢迎界面，启动时间线在这里结束
             await asyncio.sleep(0)  # 等待下一帧
             self.config.tick()  # 更新游戏配置
             
-            # 玩家碰撞检测
-            if self.player.collided(self.pipes, self.floor):
+            # 玩家碰撞检测；多只小鸟时所有玩家都撞毁才结束
+            if self.flock:
+                if self.flock.collided(self.pipes, self.floor):
+                    return
+            elif self.player.collided(self.pipes, self.floor):
+                return
+            # 联网比赛：服务器判定撞毁（或连接断开）时本局也结束
+            if self.race and (self.race.eliminated or self.race.closed):
                 return
             
             # 限时模式结束
             if game_over:
                 return
 
+    async def pause(self):
+        """
+        暂停游戏直到再次按下P键，暂停期间道具效果和限时模式都不计时
+        """
+        self.powerup_manager.pause()
+        font = pygame.font.Font(None, 48)
+        text = font.render("Paused", True, (255, 255, 255))
+        self.config.screen.blit(text, text.get_rect(
+            center=(self.config.window.width // 2, self.config.window.height // 2)))
+        self.config.display.present()
+
+        while True:
+            for event in self.config.input.events():
+                self.check_quit_event(event)  # 检查退出事件
+                if event.type == KEYDOWN and event.key == pygame.K_p:
+                    self.powerup_manager.resume()
+                    # 暂停的时间不计入下一帧的帧间隔
+                    self.last_frame_time = self.config.ticks()
+                    return
+            await asyncio.sleep(0)  # 等待下一帧
+            self.config.tick()
+
+    def record_result(self):
+        """
+        将本局成绩写入统计数据库，返回显示最高分和排名的文本表面
+        """
+        if not self.stats:
+            return None
+        mode = self.game_mode.name
+        score = self.score.score
+        # 排名和最高分基于已提交的数据查询，本局成绩在后台写入
+        best = max(self.stats.best(mode, self.stats_source), score)
+        rank = self.stats.rank(mode, score, self.stats_source)
+        self.stats.record(mode, score, self.config.ticks() - self.round_start_time, self.stats_source)
+
+        return self.render_lines([f"Best: {best}", f"Rank: #{rank}"], 26)
+
+    def record_memory(self):
+        """
+        内存诊断：本局结束时采样，返回显示内存增长的文本表面
+        """
+        if not self.memory:
+            return None
+        self.memory.round_end(mode=self.game_mode.name, score=self.score.score)
+        return self.render_lines(self.memory.summary_lines(), 18)
+
+    @staticmethod
+    def render_lines(lines, size):
+        """
+        把多行文字渲染为一个带黑色描边的居中文本表面
+        """
+        font = pygame.font.Font(None, size)
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        outlines = [font.render(line, True, (0, 0, 0)) for line in lines]
+        width = max(text.get_width() for text in rendered) + 2
+        height = sum(text.get_height() for text in rendered) + 2
+        # 合成为一个表面，游戏结束界面每帧只需一次绘制
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        y = 0
+        for text, outline in zip(rendered, outlines):
+            x = (width - text.get_width()) // 2
+            surface.blit(outline, (x + 1, y + 1))
+            surface.blit(text, (x, y))
+            y += text.get_height()
+        return surface
+
+    def can_leave_game_over(self):
+        """
+        玩家落到地面后才能离开结束界面；联网比赛还要等其他选手撞毁、公布名次
+        """
+        if self.race and not self.race.finished:
+            return False
+        return self.player.y + self.player.h >= self.floor.y - 1
+
+    def tick_race_result(self, shown, ranking_text):
+        """
+        结束界面中更新联网比赛，名次公布后重新渲染排名，返回已显示的结果和排名文本
+        """
+        self.race.record(False)  # 对手继续飞行
+        self.race.draw()
+        if self.race.result is not shown:
+            shown = self.race.result
+            ranking_text = self.render_lines(self.race.result_lines(), 22)
+        return shown, ranking_text
+
+    def draw_results(self, record_text, ranking_text, memory_text, lines_y):
+        """
+        在结束界面依次绘制最高分、排名和内存诊断文本，没有的项跳过
+        """
+        center_x = self.config.window.width // 2
+        if record_text:
+            self.config.render_queue.submit(record_text, record_text.get_rect(
+                center=(center_x, self.config.window.height * 0.4)), LAYER_HUD)
+        if ranking_text:
+            self.config.render_queue.submit(ranking_text, ranking_text.get_rect(
+                midtop=(center_x, lines_y)), LAYER_HUD)
+        if memory_text:
+            memory_y = lines_y + ranking_text.get_height() + 4 if ranking_text else self.config.window.height * 0.55
+            self.config.render_queue.submit(memory_text, memory_text.get_rect(
+                midtop=(center_x, memory_y)), LAYER_HUD)
+
     async def game_over(self):
         """
         玩家死亡并显示游戏结束界面
         """
-        self.player.set_mode(PlayerMode.CRASH)  # 设置玩家模式为CRASH（死亡模式）
+        if self.flock:
+            self.flock.crash_all()  # 先撞毁的小鸟已在下落，其余的一起下落
+        else:
+            self.player.set_mode(PlayerMode.CRASH)  # 设置玩家模式为CRASH（死亡模式）
+        if self.race:
+            self.race.finish()  # 之后由服务器判定撞毁，所有选手撞毁后公布名次
+        if self.ghost_race:
+            self.ghost_race.close()  # 结束界面不回放；保存时可能删除排在后面的轨迹
+            self.ghost_race = None
+        self.save_ghost()
         self.pipes.stop()  # 停止管道
         self.floor.stop()  # 停止地面
+        record_text = self.record_result()  # 记录成绩并生成最高分和排名文本
+        memory_text = self.record_memory()  # 内存诊断的采样结果
+        ranking_text = self.render_lines(self.flock.result_lines(), 22) if self.flock else None  # 多人排名
+        race_result = False  # 已显示的联网比赛结果，结果公布后重新渲染
+        lines_y = self.config.window.height * 0.48  # 排名和内存诊断依次显示在最高分下方
 
         while True:
-            for event in pygame.event.get():
+            on_floor = self.can_leave_game_over()
+            if self.autoplayer and on_floor:
+                return  # 自动游戏时落地后直接开始下一局
+
+            for event in self.config.input.events():
                 self.check_quit_event(event)  # 检查退出事件
-                if self.is_tap_event(event):
-                    if self.player.y + self.player.h >= self.floor.y - 1:
-                        return  # 如果玩家落到地面，结束游戏
+                if self.is_tap_event(event) and on_floor:
+                    return  # 如果玩家落到地面，结束游戏
 
             self.background.tick()  # 更新背景
             self.floor.tick()  # 更新地面
             self.pipes.tick()  # 更新管道
             self.score.tick()  # 更新得分
-            self.player.tick()  # 更新玩家
+            if self.race:
+                race_result, ranking_text = self.tick_race_result(race_result, ranking_text)
+            if self.flock:
+                self.flock.tick()  # 更新所有小鸟
+            else:
+                self.player.tick()  # 更新玩家
+            self.particles.tick()  # 更新并绘制粒子
             self.game_over_message.tick()  # 更新游戏结束信息
+            self.draw_results(record_text, ranking_text, memory_text, lines_y)
 
             self.config.tick()  # 更新游戏配置
-            pygame.display.update()  # 刷新显示
+            self.config.present()  # 输出渲染队列并刷新显示
             await asyncio.sleep(0)  # 等待下一帧
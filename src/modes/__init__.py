@@ -0,0 +1,10 @@
+from . import builtin  # noqa: F401  导入时注册内置模式
+from .base import GameModeSpec, all_modes, get_mode, load_plugins, register_mode
+
+__all__ = [
+    "GameModeSpec",  # 游戏模式基类
+    "all_modes",  # 所有已注册模式
+    "get_mode",  # 按名称获取模式
+    "load_plugins",  # 加载模式插件
+    "register_mode",  # 注册模式
+]
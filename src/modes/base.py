@@ -0,0 +1,113 @@
+import importlib
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from ..entities.player import PhysicsParams, PlayerMode
+
+if TYPE_CHECKING:  # 仅用于类型注解，避免循环导入
+    from ..flappy import Flappy
+
+# 插件入口点分组名，第三方包可在其中注册游戏模式
+PLUGIN_ENTRY_POINT_GROUP = "flappybird.modes"
+
+
+class GameModeSpec:
+    """
+    游戏模式描述基类
+
+    每个模式提供玩家物理参数和一组钩子，游戏主循环只通过这些钩子与模式交互，
+    添加新模式无需修改主循环。子类覆盖类属性和需要的钩子即可。
+    """
+
+    name = "CLASSIC"  # 注册名，用于统计数据和插件引用
+    label = "Classic Mode"  # 菜单中显示的名称
+    player_mode = PlayerMode.NORMAL  # 玩家模式
+    physics: Optional[PhysicsParams] = None  # 覆盖玩家模式默认的物理参数
+    pipe_vel_x: Optional[float] = None  # 覆盖管道的水平速度
+
+    def setup(self, game: "Flappy") -> None:
+        """
+        每局开始时调用
+        """
+        game.player.set_mode(self.player_mode, self.physics)
+        if self.pipe_vel_x is not None:
+            game.pipes.set_speed(self.pipe_vel_x)
+
+    def on_event(self, game: "Flappy", event) -> None:
+        """
+        处理模式专属的输入事件（点击之外的事件）
+        """
+
+    def update(self, game: "Flappy", delta_time: int) -> bool:
+        """
+        每帧的模式逻辑
+
+        :param delta_time: 帧间隔（毫秒）
+        :return: 本局是否结束
+        """
+        return False
+
+    def draw_overlay(self, game: "Flappy") -> None:
+        """
+        绘制模式专属的覆盖效果（在实体之后、HUD之前）
+        """
+
+    def hud_widgets(self, game: "Flappy") -> list:
+        """
+        返回模式专属的HUD控件
+        """
+        return []
+
+
+_registry: Dict[str, GameModeSpec] = {}  # 按注册顺序保存，决定菜单顺序
+
+
+def register_mode(spec):
+    """
+    注册游戏模式，可作为类装饰器使用；同名模式会被覆盖
+
+    :param spec: GameModeSpec 子类或实例
+    :return: 传入的参数
+    """
+    instance = spec() if isinstance(spec, type) else spec
+    _registry[instance.name] = instance
+    return spec
+
+
+def get_mode(name: str) -> GameModeSpec:
+    """
+    按注册名获取游戏模式
+    """
+    return _registry[name]
+
+
+def all_modes() -> List[GameModeSpec]:
+    """
+    按注册顺序返回所有游戏模式
+    """
+    return list(_registry.values())
+
+
+def load_plugins() -> None:
+    """
+    加载游戏模式插件
+
+    插件是导入时调用 register_mode 的模块，来源包括入口点分组 flappybird.modes
+    以及环境变量 FLAPPY_MODE_PLUGINS 中逗号分隔的模块名。
+    """
+    modules = [name.strip() for name in os.environ.get("FLAPPY_MODE_PLUGINS", "").split(",") if name.strip()]
+    for module in modules:
+        importlib.import_module(module)
+
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        return
+    try:
+        plugins = entry_points(group=PLUGIN_ENTRY_POINT_GROUP)
+    except TypeError:  # Python 3.8/3.9 返回字典
+        plugins = entry_points().get(PLUGIN_ENTRY_POINT_GROUP, [])
+    for entry_point in plugins:
+        spec = entry_point.load()
+        if isinstance(spec, type) and issubclass(spec, GameModeSpec) or isinstance(spec, GameModeSpec):
+            register_mode(spec)
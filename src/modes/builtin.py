@@ -0,0 +1,172 @@
+import pygame
+from pygame.locals import KEYDOWN
+
+from ..entities import TextWidget
+from ..entities.player import PlayerMode
+from ..utils.render_queue import LAYER_OVERLAY
+from .base import GameModeSpec, register_mode
+
+
+@register_mode
+class ClassicMode(GameModeSpec):
+    """经典无限模式"""
+
+    name = "CLASSIC"
+    label = "Classic Mode"
+
+
+@register_mode
+class TimedMode(GameModeSpec):
+    """限时挑战模式：时间用完时本局结束"""
+
+    name = "TIMED"
+    label = "Timed Challenge"
+
+    def setup(self, game) -> None:
+        super().setup(game)
+        game.time_remaining = game.time_limit  # 重置计时器
+
+    def update(self, game, delta_time: int) -> bool:
+        game.time_remaining -= delta_time
+        if game.time_remaining <= 0:
+            game.time_remaining = 0
+            return True
+        return False
+
+    def hud_widgets(self, game) -> list:
+        """倒计时和时间不足时的闪烁警告"""
+        time_font = pygame.font.SysFont('microsoftyahei', 24)  # 微软雅黑
+        width = game.config.window.width
+
+        def seconds_left():
+            return f"Time: {max(0, int(game.time_remaining / 1000))}s"
+
+        def warning():
+            # 当时间小于10秒时每500毫秒闪烁一次
+            running_out = int(game.time_remaining / 1000) <= 10 and game.time_remaining > 0
+            if running_out and (game.config.ticks() // 500) % 2 == 0:
+                return "Time running out!"
+            return None
+
+        return [
+            TextWidget(seconds_left, (width - 60, 25), time_font, anchor="center",
+                       background=(0, 0, 0, 180), size=(100, 40)),
+            TextWidget(warning, (width // 2, 50), time_font, anchor="center",
+                       background=(255, 0, 0, 150), size=(200, 40)),
+        ]
+
+
+@register_mode
+class ReverseMode(GameModeSpec):
+    """重力反转模式"""
+
+    name = "REVERSE"
+    label = "Reverse Mode"
+    player_mode = PlayerMode.REVERSE
+
+
+@register_mode
+class GhostMode(GameModeSpec):
+    """穿越模式：可以穿过管道若干次，按M键摧毁屏幕上的管道"""
+
+    name = "GHOST"
+    label = "Ghost Mode"
+    player_mode = PlayerMode.GHOST
+
+    def on_event(self, game, event) -> None:
+        if event.type != KEYDOWN or event.key != pygame.K_m:
+            return
+        # 主动穿越：立即摧毁所有屏幕上可见的管道
+        if not game.player.activate_ghost():
+            return
+        pipes_destroyed = 0
+        for pipes in (game.pipes.upper, game.pipes.lower):
+            for pipe in pipes:
+                if not pipe.destroyed and 0 < pipe.x < game.config.window.width:
+                    pipe.destroy()
+                    pipes_destroyed += 1
+        if pipes_destroyed > 0:
+            game.config.sounds.point.play()
+
+    def hud_widgets(self, game) -> list:
+        """剩余穿越次数"""
+        font = pygame.font.Font(None, 36)
+        return [
+            TextWidget(lambda: f"Ghost Life: {game.player.ghost_life}", (10, 10), font, outline=(0, 0, 0)),
+        ]
+
+
+@register_mode
+class NightMode(GameModeSpec):
+    """夜间模式：只能看到玩家周围的区域"""
+
+    name = "NIGHT"
+    label = "Night Mode"
+    player_mode = PlayerMode.NIGHT
+
+    darkness = (0, 0, 0, 180)  # 黑色半透明
+
+    def __init__(self) -> None:
+        self._overlay = None  # 预先分配的全屏黑暗图层，每帧原地更新
+        self._hole = None  # 预先绘制的视野圆圈（含边缘渐变）
+        self._hole_range = None  # 视野圆圈对应的视野范围
+        self._hole_rect = pygame.Rect(0, 0, 0, 0)  # 视野圆圈在黑暗图层上的位置
+
+    def _prepare(self, size, vision_range: int) -> None:
+        """按窗口大小和视野范围分配黑暗图层，绘制视野圆圈"""
+        if self._overlay is None or self._overlay.get_size() != size:
+            self._overlay = pygame.Surface(size, pygame.SRCALPHA)
+            self._overlay.fill(self.darkness)
+            self._hole_rect.size = (0, 0)
+        radius = vision_range + 30
+        hole = pygame.Surface((radius * 2 + 2, radius * 2 + 2), pygame.SRCALPHA)
+        hole.fill(self.darkness)
+        pygame.draw.circle(hole, (0, 0, 0, 0), (radius, radius), vision_range)  # 完全透明
+        # 添加渐变效果到视野边缘
+        for i in range(30):
+            pygame.draw.circle(hole, (0, 0, 0, i * 6), (radius, radius), vision_range + 30 - i)
+        self._hole = hole
+        self._hole_range = vision_range
+
+    def draw_overlay(self, game) -> None:
+        config = game.config
+        player = game.player
+        size = (config.window.width, config.window.height)
+        if self._overlay is None or self._overlay.get_size() != size or self._hole_range != player.night_vision_range:
+            self._prepare(size, player.night_vision_range)
+
+        # 全屏黑色半透明图层模拟黑夜：恢复上一帧的视野区域，再在玩家周围挖出视野圆圈
+        darkness = self._overlay
+        rect = self._hole_rect
+        darkness.fill(self.darkness, rect)
+        radius = self._hole_range + 30
+        rect.update(int(player.x + player.w // 2) - radius, int(player.y + player.h // 2) - radius,
+                    self._hole.get_width(), self._hole.get_height())
+        # 圆圈内的透明度都不超过黑暗图层，取较小值即为直接复制
+        darkness.blit(self._hole, rect, None, pygame.BLEND_RGBA_MIN)
+        config.render_queue.changed(darkness)  # 图层是原地修改的
+
+        # 应用黑暗效果
+        config.render_queue.submit(darkness, (0, 0), LAYER_OVERLAY)
+
+
+@register_mode
+class SpeedMode(GameModeSpec):
+    """极速模式：玩家和管道速度加快"""
+
+    name = "SPEED"
+    label = "Speed Mode"
+    player_mode = PlayerMode.SPEED
+    pipe_vel_x = -8  # 加快管道移动速度
+
+    def draw_overlay(self, game) -> None:
+        game.particles.emit_speed_lines()  # 速度线粒子
+
+    def hud_widgets(self, game) -> list:
+        """闪烁的模式提示"""
+        speed_font = pygame.font.SysFont('microsoftyahei', 20)
+        return [
+            TextWidget(lambda: "极速模式!" if game.config.ticks() % 1000 < 500 else None,
+                       (game.config.window.width - 20, 20), speed_font, color=(255, 255, 0),
+                       anchor="topright"),
+        ]
@@ -0,0 +1,8 @@
+from .client import RaceClient, RemoteRacer
+from .server import RaceServer
+
+__all__ = [
+    "RaceClient",  # 联网比赛客户端
+    "RaceServer",  # 联网比赛的权威服务器
+    "RemoteRacer",  # 按转发的输入模拟的对手
+]
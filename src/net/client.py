@@ -0,0 +1,371 @@
+"""
+联网比赛的客户端
+
+本地小鸟照常模拟，每帧是否拍打按 INPUT_INTERVAL 帧合并发送（拍打时立即发送）。对手的小鸟按
+服务器转发的输入在本地模拟：还没收到输入的帧按不拍打预测，收到输入时回滚到最后确认的状态重新
+模拟。得分和撞毁以服务器为准。网络读写都在游戏的事件循环中进行，每帧的 asyncio.sleep(0)
+让出时处理收到的消息，不会阻塞帧。
+"""
+import asyncio
+import os
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..entities import Player, PlayerMode
+from ..modes import get_mode
+from ..utils import GameConfig
+from ..utils.render_queue import LAYER_PLAYER
+from . import protocol
+from .protocol import DEFAULT_PORT, INPUT_INTERVAL, ProtocolError
+
+REMOTE_ALPHA = 140  # 对手小鸟的透明度
+
+
+def parse_address(value: str, default_host: str = "127.0.0.1") -> Tuple[str, int]:
+    """
+    解析 "主机:端口"、"主机" 或 "端口"，缺省的部分使用默认值
+    """
+    if not value:
+        return default_host, DEFAULT_PORT
+    if value.isdigit():
+        return default_host, int(value)
+    host, sep, port = value.rpartition(":")
+    if not sep:
+        return value, DEFAULT_PORT
+    return host or default_host, int(port)
+
+
+class RemoteRacer:
+    """
+    对手的小鸟，按转发的输入在本地模拟
+
+    物理只取决于每帧是否拍打（联网比赛不做帧间补偿），收到的输入之前的帧是确定的。
+    还没收到输入的帧按不拍打预测；收到新的输入或撞毁事件时，从最后确认的物理状态回滚，
+    按确认的输入重新模拟到当前帧。
+    """
+
+    def __init__(self, config: GameConfig, racer_id: int, color: int, mode) -> None:
+        """
+        :param racer_id: 选手编号
+        :param color: 小鸟颜色序号
+        :param mode: 比赛的游戏模式
+        """
+        self.id = racer_id
+        self.player = Player(config, config.images.player_frames(color))
+        self.player.quiet = True
+        self.player.alpha = REMOTE_ALPHA
+        self.player.set_mode(mode.player_mode, mode.physics)
+        self.score = 0
+        self.flaps = set()  # 拍打的帧号
+        self.known = 0  # 已收到输入的帧数
+        self.crash: Optional[Tuple[int, bool]] = None  # (撞毁的帧号, 是否撞到地面)
+        self.simulated = 0  # 已模拟的帧数
+        self._confirmed = (0, self.player.physics_state())  # (帧数, 此时的物理状态)
+        self._stale = False  # 收到新的输入后需要回滚
+        self.rollbacks = 0  # 回滚次数
+
+    def receive(self, flaps: List[bool]) -> None:
+        """收到接下来若干帧的输入"""
+        for i, flap in enumerate(flaps):
+            if flap:
+                self.flaps.add(self.known + i)
+        self.known += len(flaps)
+        self._stale = True
+
+    def crashed_at(self, frame: int, floor: bool) -> None:
+        """服务器判定在第 frame 帧撞毁，之前的输入都已收到（撞毁前不拍打的部分不再发送）"""
+        self.crash = (frame, floor)
+        self.known = max(self.known, frame + 1)
+        self._stale = True
+
+    def _step(self) -> None:
+        player = self.player
+        frame = self.simulated
+        if frame in self.flaps:
+            player.flap()
+        player.advance()
+        self.simulated += 1
+        if self.crash is not None and frame == self.crash[0]:
+            player.crashed = True
+            player.crash_entity = "floor" if self.crash[1] else "pipe"
+            player.set_mode(PlayerMode.CRASH)
+
+    def update(self, frames: int) -> None:
+        """
+        模拟到第 frames 帧（帧数）
+
+        :param frames: 本地已模拟的帧数
+        """
+        player = self.player
+        if self._stale and not player.crashed:
+            self._stale = False
+            count, state = self._confirmed
+            if count < self.simulated:
+                player.restore_physics_state(state)
+                self.simulated = count
+                self.rollbacks += 1
+            confirmed = min(self.known, frames)
+            while self.simulated < confirmed and not player.crashed:
+                self._step()
+            if not player.crashed:
+                self._confirmed = (self.simulated, player.physics_state())
+        while self.simulated < frames:
+            self._step()
+
+
+class RaceClient:
+    """
+    联网比赛的客户端，消息格式见 protocol
+    """
+
+    def __init__(self, config: GameConfig, host: str = "127.0.0.1", port: int = DEFAULT_PORT, server=None) -> None:
+        """
+        :param host: 服务器地址；server 不为 None 时为监听地址
+        :param port: 端口；server 不为 None 时 0 表示由系统分配
+        :param server: 在本进程中运行的 RaceServer，connect 时开始监听
+        """
+        self.config = config
+        self.host = host
+        self.port = port
+        self.server = server
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False  # 连接已断开
+        self.racer_id: Optional[int] = None  # 服务器分配的选手编号
+        self.lobby: Optional[Tuple[int, int]] = None  # (已准备的选手数, 开始需要的选手数)
+        self.waiting = True  # 已准备好下一场比赛（新加入时服务器视为已准备）
+        self._start: Optional[Tuple[int, object]] = None  # 收到的开始消息：(种子, 游戏模式)
+        self.remotes: Dict[int, RemoteRacer] = {}  # 编号 -> 对手
+        self.scores: Dict[int, int] = {}  # 编号 -> 权威得分
+        self.crashes: Dict[int, int] = {}  # 编号 -> 撞毁的帧号
+        self.eliminated: Optional[Tuple[int, bool]] = None  # 服务器判定本地小鸟撞毁：(帧号, 是否撞到地面)
+        self.result: Optional[List[Tuple[int, int, int]]] = None  # 比赛结果：按名次排列的 (编号, 分数, 帧号)
+        self.frame = 0  # 本场比赛本地已模拟的帧数
+        self.done = False  # 本地已撞毁，不再发送输入
+        self._inputs: List[bool] = []  # 还没发送的每帧输入
+        # 流量统计
+        self.connected_at = 0.0
+        self.sent = 0  # 发送的字节数
+        self.received = 0  # 收到的字节数
+
+    @classmethod
+    def from_env(cls, config: GameConfig) -> Optional["RaceClient"]:
+        """
+        按环境变量 FLAPPY_RACE 创建：
+        "主机:端口" 连接到比赛服务器；"serve[:主机][:端口]" 在本进程中运行服务器并加入，
+        默认只监听本机，开始比赛需要的选手数为 FLAPPY_RACERS（默认2），模式为 FLAPPY_RACE_MODE
+        （默认 CLASSIC）
+        """
+        spec = os.environ.get("FLAPPY_RACE")
+        if not spec:
+            return None
+        if spec != "serve" and not spec.startswith("serve:"):
+            return cls(config, *parse_address(spec))
+        from .server import RaceServer, simulation_config
+
+        server = RaceServer(simulation_config(config.images), int(os.environ.get("FLAPPY_RACERS", 2)),
+                            os.environ.get("FLAPPY_RACE_MODE", "CLASSIC").upper())
+        return cls(config, *parse_address(spec[len("serve:"):]), server=server)
+
+    async def connect(self) -> None:
+        """
+        连接服务器（需要时先开始监听）并开始接收消息
+
+        :raises RuntimeError: 无法连接
+        """
+        host = self.host
+        try:
+            if self.server is not None:
+                self.port = await self.server.start(self.host, self.port)
+                print(f"race server on {self.host}:{self.port}, {self.server.needed} racers, mode {self.server.mode.name}")
+                if host in ("0.0.0.0", "::"):
+                    host = "127.0.0.1"
+            self.reader, self.writer = await asyncio.open_connection(host, self.port)
+        except OSError as e:
+            raise RuntimeError(f"无法连接比赛服务器 {host}:{self.port}：{e}") from None
+        sock = self.writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # 输入消息很小，不等待合并
+        self.connected_at = time.perf_counter()
+        self._send(protocol.HELLO, bytes((self.config.images.player_index,)))
+        self._task = asyncio.get_running_loop().create_task(self._receive())
+
+    def close(self) -> None:
+        """断开连接，输出流量统计"""
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.writer = None
+        if self._task is not None:
+            self._task.cancel()
+        if self.server is not None:
+            self.server.close()
+        sent, received = self.bandwidth()
+        print(f"race: sent {self.sent} bytes ({sent:.0f} B/s), received {self.received} bytes ({received:.0f} B/s)")
+
+    def bandwidth(self) -> Tuple[float, float]:
+        """连接以来平均每秒发送和收到的字节数（不含TCP/IP头）"""
+        elapsed = max(time.perf_counter() - self.connected_at, 1e-3)
+        return self.sent / elapsed, self.received / elapsed
+
+    def _send(self, kind: bytes, payload: bytes = b"") -> None:
+        if self.writer is None or self.closed:
+            return
+        message = protocol.encode(kind, payload)
+        self.writer.write(message)  # 写入传输层的缓冲，不等待
+        self.sent += len(message)
+
+    async def _receive(self) -> None:
+        """接收消息，在游戏循环让出时运行"""
+        try:
+            while True:
+                kind, payload = await protocol.read(self.reader)
+                self.received += 2 + len(payload)
+                self._handle(kind, payload)
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            self.closed = True
+
+    def _handle(self, kind: bytes, payload: bytes) -> None:
+        handler = self._HANDLERS.get(kind)
+        if handler is None:
+            raise ProtocolError(f"未知的消息类型 {kind!r}")
+        handler(self, payload)
+
+    def _on_welcome(self, payload: bytes) -> None:
+        self.racer_id = payload[0]
+
+    def _on_lobby(self, payload: bytes) -> None:
+        self.lobby = (payload[0], payload[1])
+
+    def _on_start(self, payload: bytes) -> None:
+        seed, mode_name, racers = protocol.unpack_start(payload)
+        mode = get_mode(mode_name)
+        self._start = (seed, mode)
+        self.waiting = False
+        self.remotes = {racer_id: RemoteRacer(self.config, racer_id, color, mode)
+                        for racer_id, color in racers if racer_id != self.racer_id}
+        self.scores = {racer_id: 0 for racer_id, _ in racers}
+        self.crashes = {}
+        self.eliminated = None
+        self.result = None
+        self.frame = 0
+        self.done = False
+        self._inputs.clear()
+
+    def _on_relay(self, payload: bytes) -> None:
+        remote = self.remotes.get(payload[0])
+        if remote is not None:
+            remote.receive(protocol.unpack_inputs(payload[1:]))
+
+    def _on_score(self, payload: bytes) -> None:
+        racer_id, score = protocol.unpack_score(payload)
+        self.scores[racer_id] = score
+
+    def _on_crash(self, payload: bytes) -> None:
+        racer_id, frame, score, floor = protocol.unpack_crash(payload)
+        self.scores[racer_id] = score
+        self.crashes[racer_id] = frame
+        if racer_id == self.racer_id:
+            self.eliminated = (frame, floor)
+        elif racer_id in self.remotes:
+            self.remotes[racer_id].crashed_at(frame, floor)
+
+    def _on_result(self, payload: bytes) -> None:
+        self.result = protocol.unpack_result(payload)
+
+    def _on_leave(self, payload: bytes) -> None:
+        self.remotes.pop(payload[0], None)
+        self.scores.pop(payload[0], None)
+
+    # 消息类型 -> 处理方法
+    _HANDLERS = {
+        protocol.WELCOME: _on_welcome,
+        protocol.LOBBY: _on_lobby,
+        protocol.START: _on_start,
+        protocol.RELAY: _on_relay,
+        protocol.SCORE: _on_score,
+        protocol.CRASH: _on_crash,
+        protocol.RESULT: _on_result,
+        protocol.LEAVE: _on_leave,
+    }
+
+    def take_start(self) -> Optional[Tuple[int, object]]:
+        """
+        取出收到的开始消息
+
+        :return: (种子, 游戏模式)，还没开始时为 None
+        """
+        start, self._start = self._start, None
+        return start
+
+    def ready(self) -> None:
+        """准备好下一场比赛"""
+        if not self.waiting:
+            self.waiting = True
+            self._send(protocol.READY)
+
+    def record(self, flapped: bool) -> None:
+        """
+        记录本帧本地小鸟是否拍打，拍打时或攒够 INPUT_INTERVAL 帧时发送；本地撞毁之后只推进帧数
+        """
+        self.frame += 1
+        if self.done:
+            return
+        self._inputs.append(flapped)
+        if flapped or len(self._inputs) >= INPUT_INTERVAL:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._inputs:
+            self._send(protocol.INPUT, protocol.pack_inputs(self._inputs))
+            self._inputs.clear()
+
+    def finish(self) -> None:
+        """本地小鸟撞毁：发送剩余的输入，之后由服务器判定撞毁"""
+        if not self.done:
+            self.done = True
+            self._flush()
+            self._send(protocol.DONE)
+
+    @property
+    def finished(self) -> bool:
+        """比赛已公布结果或连接已断开"""
+        return self.result is not None or self.closed
+
+    def draw(self) -> None:
+        """把对手模拟到本地的帧数并绘制（在本地小鸟之前绘制，本地小鸟在最上面）"""
+        queue = self.config.render_queue
+        queue.layer = LAYER_PLAYER
+        for remote in self.remotes.values():
+            remote.update(self.frame)
+            remote.player.draw_player(queue)
+
+    def _name(self, racer_id: int) -> str:
+        return "You" if racer_id == self.racer_id else f"P{racer_id + 1}"
+
+    def standings_text(self) -> str:
+        """比赛中的HUD：按权威得分排列，已撞毁的选手标 x"""
+        ranked = sorted(self.scores.items(), key=lambda item: -item[1])
+        return "  ".join(f"{self._name(racer_id)} {score}{'x' if racer_id in self.crashes else ''}"
+                         for racer_id, score in ranked)
+
+    def lobby_text(self) -> str:
+        """等待界面的状态"""
+        if self.closed:
+            return "Disconnected"
+        if self.racer_id is None:
+            return "Connecting..."
+        if self.lobby is None:
+            return "Waiting for race"
+        ready, needed = self.lobby
+        return f"Waiting for racers {ready}/{needed}"
+
+    def result_lines(self) -> List[str]:
+        """比赛结果，还没公布时为等待提示"""
+        if self.result is None:
+            return ["Disconnected"] if self.closed else ["Waiting for other racers..."]
+        return [f"#{rank} {self._name(racer_id)} {score}" for rank, (racer_id, score, _) in enumerate(self.result, 1)]
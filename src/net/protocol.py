@@ -0,0 +1,124 @@
+"""
+联网比赛的消息格式
+
+每条消息为 1字节长度 + 1字节类型 + 负载，整数使用小端序。比赛中只传输输入的增量：
+客户端每次拍打或每 INPUT_INTERVAL 帧发送一次这段时间内每帧是否拍打的位图（约4字节），
+服务器把它转发给其他选手，并下发权威的得分和撞毁事件。每位选手的流量约为每秒几十字节。
+"""
+import asyncio
+import struct
+from typing import List, Sequence, Tuple
+
+DEFAULT_PORT = 7777  # 默认端口
+INPUT_INTERVAL = 6  # 没有拍打时每隔多少帧发送一次输入
+
+# 客户端 -> 服务器
+HELLO = b"H"  # 加入：小鸟颜色
+INPUT = b"I"  # 输入：帧数 + 每帧是否拍打的位图
+DONE = b"D"  # 本地撞毁，之后不再有输入
+READY = b"R"  # 准备好下一场比赛
+
+# 服务器 -> 客户端
+WELCOME = b"W"  # 选手编号
+LOBBY = b"L"  # 等待中：已准备的选手数、开始需要的选手数
+START = b"S"  # 开始：种子、模式名、所有选手的 (编号, 颜色)
+RELAY = b"I"  # 转发其他选手的输入：选手编号 + 输入
+SCORE = b"P"  # 权威得分：选手编号、分数
+CRASH = b"C"  # 权威撞毁：选手编号、帧号、分数、是否撞到地面
+RESULT = b"E"  # 比赛结束：按名次排列的 (编号, 分数, 撞毁帧号)
+LEAVE = b"X"  # 选手离开：选手编号
+
+_START = struct.Struct("<IB")  # 种子、模式名长度
+_SCORE = struct.Struct("<BH")
+_CRASH = struct.Struct("<BIH?")
+_RANK = struct.Struct("<BHI")
+
+
+class ProtocolError(Exception):
+    """收到格式错误的消息"""
+
+
+def encode(kind: bytes, payload: bytes = b"") -> bytes:
+    """
+    编码一条消息
+
+    :param kind: 消息类型（1字节）
+    :param payload: 负载，最多254字节
+    """
+    if len(payload) > 254:
+        raise ValueError("消息过长")
+    return bytes((len(payload) + 1,)) + kind + payload
+
+
+async def read(reader: asyncio.StreamReader) -> Tuple[bytes, bytes]:
+    """
+    读取一条消息
+
+    :return: (消息类型, 负载)
+    :raises asyncio.IncompleteReadError: 连接已关闭
+    """
+    size = (await reader.readexactly(1))[0]
+    if size == 0:
+        raise ProtocolError("空消息")
+    data = await reader.readexactly(size)
+    return data[:1], data[1:]
+
+
+def pack_inputs(flaps: Sequence[bool]) -> bytes:
+    """把每帧是否拍打编码为 帧数 + 位图（第i帧对应第i位）"""
+    bits = 0
+    for i, flap in enumerate(flaps):
+        if flap:
+            bits |= 1 << i
+    return bytes((len(flaps),)) + bits.to_bytes((len(flaps) + 7) // 8, "little")
+
+
+def unpack_inputs(payload: bytes) -> List[bool]:
+    """pack_inputs 的逆操作"""
+    if not payload:
+        raise ProtocolError("输入为空")
+    count = payload[0]
+    if len(payload) != 1 + (count + 7) // 8:
+        raise ProtocolError("输入长度不符")
+    bits = int.from_bytes(payload[1:], "little")
+    return [bool(bits >> i & 1) for i in range(count)]
+
+
+def pack_start(seed: int, mode: str, racers: Sequence[Tuple[int, int]]) -> bytes:
+    name = mode.encode()
+    return _START.pack(seed, len(name)) + name + b"".join(bytes(racer) for racer in racers)
+
+
+def unpack_start(payload: bytes) -> Tuple[int, str, List[Tuple[int, int]]]:
+    """:return: (种子, 模式名, [(选手编号, 颜色)])"""
+    seed, size = _START.unpack_from(payload)
+    offset = _START.size + size
+    mode = payload[_START.size:offset].decode()
+    racers = payload[offset:]
+    return seed, mode, [(racers[i], racers[i + 1]) for i in range(0, len(racers) - 1, 2)]
+
+
+def pack_score(racer: int, score: int) -> bytes:
+    return _SCORE.pack(racer, min(score, 0xFFFF))
+
+
+def unpack_score(payload: bytes) -> Tuple[int, int]:
+    return _SCORE.unpack(payload)
+
+
+def pack_crash(racer: int, frame: int, score: int, floor: bool) -> bytes:
+    return _CRASH.pack(racer, frame, min(score, 0xFFFF), floor)
+
+
+def unpack_crash(payload: bytes) -> Tuple[int, int, int, bool]:
+    """:return: (选手编号, 撞毁的帧号, 分数, 是否撞到地面)"""
+    return _CRASH.unpack(payload)
+
+
+def pack_result(ranking: Sequence[Tuple[int, int, int]]) -> bytes:
+    return b"".join(_RANK.pack(racer, min(score, 0xFFFF), frame) for racer, score, frame in ranking)
+
+
+def unpack_result(payload: bytes) -> List[Tuple[int, int, int]]:
+    """:return: 按名次排列的 [(选手编号, 分数, 撞毁的帧号)]"""
+    return [_RANK.unpack_from(payload, offset) for offset in range(0, len(payload), _RANK.size)]
@@ -0,0 +1,305 @@
+"""
+联网比赛的权威服务器
+
+所有选手使用同一个种子的关卡。服务器为每位选手运行一个无界面的模拟，按收到的输入逐帧推进，
+得分和撞毁以服务器的结果为准并广播给所有选手；其他选手的输入原样转发，客户端据此在本地
+模拟对手。一场比赛所有选手都撞毁后公布名次，所有人准备好后开始下一场（种子递增）。
+
+make race-server 单独运行服务器；游戏设置 FLAPPY_RACE=serve 时在自己的事件循环中运行一个
+只监听本机的服务器（见 RaceClient.from_env）。
+"""
+import asyncio
+import os
+import random
+import socket
+from typing import Dict, List, Optional
+
+import pygame
+
+from ..entities import Floor, Pipes, Player
+from ..modes import get_mode
+from ..utils import GameConfig, Images, LevelStream, Sounds, Window
+from . import protocol
+from .protocol import DEFAULT_PORT, ProtocolError
+
+# 可以联网比赛的模式：结果只取决于每帧是否拍打。限时模式依赖游戏时间，穿越模式有额外的按键和冷却时间
+RACE_MODES = ("CLASSIC", "REVERSE", "NIGHT", "SPEED")
+MAX_RACERS = 8  # 同时连接的最多选手数
+FINISH_LIMIT = 600  # 选手报告撞毁后，服务器不拍打继续模拟的最多帧数
+WRITE_BUFFER_LIMIT = 64 * 1024  # 发送缓冲超过这个大小的连接（长时间不读取）被断开
+
+
+def simulation_config(images: Optional[Images] = None) -> GameConfig:
+    """
+    服务器模拟用的游戏配置：离屏的渲染目标，不播放音效，不输出调试信息
+
+    :param images: 与游戏共用的图像，默认重新加载（需要已设置显示模式）
+    """
+    window = Window(288, 512)
+    config = GameConfig(screen=pygame.Surface((window.width, window.height)), clock=pygame.time.Clock(), fps=0,
+                        window=window, images=images or Images(), sounds=Sounds(enabled=False))
+    config.debug = False
+    return config
+
+
+class _RacerSim:
+    """一位选手的权威模拟，与 Flappy.play 相同的顺序推进玩家、管道和地面"""
+
+    def __init__(self, config: GameConfig, mode, level: LevelStream, color: int) -> None:
+        self.config = config
+        self.player = Player(config, config.images.player_frames(color))
+        self.player.quiet = True
+        self.pipes = Pipes(config, level.pipes())
+        self.floor = Floor(config)
+        self.score = 0
+        self.frame = 0  # 已模拟的帧数
+        mode.setup(self)
+
+    def step(self, flap: bool) -> bool:
+        """
+        模拟一帧
+
+        :return: 本帧是否得分
+        """
+        player = self.player
+        if flap:
+            player.flap()
+        scored = False
+        for pipe in self.pipes.upper:  # 与 Flappy.check_pipe_pass 相同的规则
+            if player.pass_pipe(pipe):
+                self.score += 1
+                scored = True
+        self.floor.tick()
+        self.pipes.tick()
+        player.advance()
+        self.config.render_queue.clear()  # 不输出画面
+        self.frame += 1
+        return scored
+
+    def collided(self) -> bool:
+        return self.player.collided(self.pipes, self.floor)
+
+
+class _Racer:
+    """一个连接"""
+
+    def __init__(self, racer_id: int, writer: asyncio.StreamWriter, color: int) -> None:
+        self.id = racer_id
+        self.writer = writer
+        self.color = color
+        self.ready = True  # 新加入的选手等待下一场比赛
+        self.sim: Optional[_RacerSim] = None  # 当前比赛中还在飞行时的模拟
+        self.score = 0
+        self.crash_frame: Optional[int] = None  # 撞毁的帧号
+
+    def send(self, message: bytes) -> None:
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+            transport.abort()  # 对方不再读取，断开后由读取循环清理
+            return
+        self.writer.write(message)
+
+
+class RaceServer:
+    """
+    联网比赛服务器，消息格式见 protocol
+    """
+
+    def __init__(self, config: GameConfig, racers: int = 2, mode: str = "CLASSIC", seed: Optional[int] = None) -> None:
+        """
+        :param config: 模拟用的游戏配置，见 simulation_config
+        :param racers: 开始比赛需要的选手数
+        :param mode: 游戏模式名，见 RACE_MODES
+        :param seed: 第一场比赛的关卡种子，之后每场加1；默认每场随机
+        """
+        if mode not in RACE_MODES:
+            raise ValueError(f"联网比赛不支持模式 {mode}，可选 {', '.join(RACE_MODES)}")
+        if not 1 <= racers <= MAX_RACERS:
+            raise ValueError(f"选手数应为 1~{MAX_RACERS}")
+        self.config = config
+        self.needed = racers
+        self.mode = get_mode(mode)
+        self.seed = seed
+        self.races = 0  # 已开始的比赛数
+        self.racers: Dict[int, _Racer] = {}  # 编号 -> 连接
+        self.race: List[_Racer] = []  # 当前比赛的选手，没有比赛时为空
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> int:
+        """
+        开始监听
+
+        :param port: 端口，0 表示由系统分配
+        :return: 实际监听的端口
+        """
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        for racer in list(self.racers.values()):
+            racer.writer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """一个连接的读取循环"""
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # 输入消息很小，不等待合并
+        racer = None
+        try:
+            kind, payload = await protocol.read(reader)
+            racer_id = next((i for i in range(MAX_RACERS) if i not in self.racers), None)
+            if kind != protocol.HELLO or len(payload) != 1 or racer_id is None:
+                return  # 不是本游戏的客户端，或者已满
+            racer = self.racers[racer_id] = _Racer(racer_id, writer, payload[0])
+            racer.send(protocol.encode(protocol.WELCOME, bytes((racer_id,))))
+            self._lobby()
+            while True:
+                kind, payload = await protocol.read(reader)
+                if kind == protocol.INPUT:
+                    self._input(racer, payload)
+                elif kind == protocol.DONE:
+                    self._done(racer)
+                elif kind == protocol.READY:
+                    racer.ready = True
+                    self._lobby()
+                else:
+                    raise ProtocolError(f"未知的消息类型 {kind!r}")
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        except asyncio.CancelledError:
+            pass  # 游戏退出时事件循环取消连接（在游戏进程中运行的服务器）
+        finally:
+            writer.close()
+            if racer is not None:
+                self._leave(racer)
+
+    def _broadcast(self, racers: List[_Racer], message: bytes) -> None:
+        for racer in racers:
+            racer.send(message)
+
+    def _lobby(self) -> None:
+        """没有比赛时，准备好的选手足够就开始比赛，否则通知等待中的选手"""
+        ready = [racer for racer in self.racers.values() if racer.ready]
+        if not self.race and len(ready) >= self.needed:
+            self._start(ready)
+            return
+        message = protocol.encode(protocol.LOBBY, bytes((len(ready), self.needed)))
+        self._broadcast([racer for racer in self.racers.values() if racer not in self.race], message)
+
+    def _start(self, entrants: List[_Racer]) -> None:
+        self.races += 1
+        if self.seed is not None:
+            seed = (self.seed + self.races - 1) & 0xFFFFFFFF
+        else:
+            seed = random.getrandbits(32)
+        window = self.config.window
+        level = LevelStream(seed, window.viewport_height, window.height)
+        for racer in entrants:
+            racer.ready = False
+            racer.score = 0
+            racer.crash_frame = None
+            racer.sim = _RacerSim(self.config, self.mode, level, racer.color)
+        self.race = entrants
+        payload = protocol.pack_start(seed, self.mode.name, [(racer.id, racer.color) for racer in entrants])
+        self._broadcast(entrants, protocol.encode(protocol.START, payload))
+
+    def _input(self, racer: _Racer, payload: bytes) -> None:
+        """转发输入并推进权威模拟"""
+        flaps = protocol.unpack_inputs(payload)
+        sim = racer.sim
+        if sim is None:
+            return  # 不在比赛中或已撞毁
+        # 先转发，客户端收到撞毁事件时已经有撞毁之前的全部输入
+        relay = protocol.encode(protocol.RELAY, bytes((racer.id,)) + payload)
+        self._broadcast([other for other in self.race if other is not racer], relay)
+        for flap in flaps:
+            if sim.step(flap):
+                racer.score = sim.score
+                self._broadcast(self.race, protocol.encode(protocol.SCORE, protocol.pack_score(racer.id, sim.score)))
+            if sim.collided():
+                self._crash(racer)
+                return
+
+    def _done(self, racer: _Racer) -> None:
+        """选手在本地撞毁：权威模拟不拍打继续推进到撞毁为止"""
+        sim = racer.sim
+        if sim is None:
+            return
+        for _ in range(FINISH_LIMIT):
+            sim.step(False)
+            if sim.collided():
+                break
+        self._crash(racer)
+
+    def _crash(self, racer: _Racer) -> None:
+        sim = racer.sim
+        racer.sim = None
+        racer.score = sim.score
+        racer.crash_frame = sim.frame - 1
+        floor = sim.player.crash_entity == "floor"
+        payload = protocol.pack_crash(racer.id, racer.crash_frame, racer.score, floor)
+        self._broadcast(self.race, protocol.encode(protocol.CRASH, payload))
+        self._check_finished()
+
+    def _leave(self, racer: _Racer) -> None:
+        del self.racers[racer.id]
+        if racer in self.race:
+            self.race.remove(racer)
+            self._broadcast(self.race, protocol.encode(protocol.LEAVE, bytes((racer.id,))))
+            self._check_finished()
+        self._lobby()
+
+    def _check_finished(self) -> None:
+        """所有选手都撞毁后公布名次：分数高的在前，分数相同时坚持得久的在前"""
+        if not self.race:
+            return  # 所有选手都已离开，没有名次可公布
+        if any(racer.sim is not None for racer in self.race):
+            return
+        ranking = sorted(self.race, key=lambda racer: (-racer.score, -racer.crash_frame))
+        payload = protocol.pack_result([(racer.id, racer.score, racer.crash_frame) for racer in ranking])
+        self._broadcast(self.race, protocol.encode(protocol.RESULT, payload))
+        print(f"race {self.races}: " + ", ".join(f"#{racer.id + 1} {racer.score}" for racer in ranking))
+        self.race = []
+        self._lobby()
+
+
+def main() -> None:
+    """
+    make race-server：单独运行比赛服务器
+    """
+    import argparse
+
+    from ..utils import parse_seed
+
+    parser = argparse.ArgumentParser(description="联网比赛的权威服务器")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，局域网比赛使用 0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="端口")
+    parser.add_argument("--racers", type=int, default=2, help="开始比赛需要的选手数")
+    parser.add_argument("--mode", default="CLASSIC", help=f"游戏模式：{', '.join(RACE_MODES)}")
+    parser.add_argument("--seed", default=None, help='第一场比赛的关卡种子，"daily" 为每日挑战；默认每场随机')
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))  # 加载图像需要显示模式
+    seed = parse_seed(args.seed)
+    server = RaceServer(simulation_config(), args.racers, args.mode.upper(),
+                        None if seed is None else seed & 0xFFFFFFFF)
+
+    async def run() -> None:
+        port = await server.start(args.host, args.port)
+        print(f"race server on {args.host}:{port}, {args.racers} racers, mode {server.mode.name}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
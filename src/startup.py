@@ -0,0 +1,137 @@
+"""
+启动时间线
+
+记录从进程启动到第一帧显示的各个阶段、模块导入耗时（类似 python -X importtime）和资源加载耗时。
+本模块不依赖pygame和游戏的其他模块，main.py 在导入游戏之前启用它，导入本身也能被计时。
+"""
+import builtins
+import importlib.util
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+
+class StartupTimeline:
+    """
+    启动时间线，设置环境变量 FLAPPY_STARTUP_REPORT=1 时在第一帧显示后输出到标准错误；
+    设置 FLAPPY_STARTUP_BUDGET_MS 时，第一帧超出预算也会输出
+    """
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()  # 时间线的起点
+        self.enabled = False  # 是否记录
+        self.report_always = False  # 未超出预算时是否也输出报告
+        self.budget_ms: Optional[float] = None  # 第一帧的时间预算（毫秒）
+        self.phases: List[Tuple[str, float, float]] = []  # (名称, 开始, 结束)，相对起点的秒数
+        self.imports: List[Tuple[int, str, float, float]] = []  # (深度, 模块名, 自身耗时, 累计耗时)
+        self.assets: List[Tuple[str, float]] = []  # (资源, 耗时)
+        self.first_frame_at: Optional[float] = None  # 第一帧显示的时间
+        self._import_stack: List[float] = []  # 正在导入的模块的子模块累计耗时
+        self._original_import = None
+
+    def start(self, origin: Optional[float] = None) -> None:
+        """
+        按环境变量启用时间线并开始记录模块导入
+
+        :param origin: 时间线的起点（perf_counter），默认为调用时
+        """
+        self.report_always = os.environ.get("FLAPPY_STARTUP_REPORT", "") not in ("", "0")
+        budget = os.environ.get("FLAPPY_STARTUP_BUDGET_MS")
+        self.budget_ms = float(budget) if budget else None
+        self.enabled = self.report_always or self.budget_ms is not None
+        if not self.enabled:
+            return
+        if origin is not None:
+            self.origin = origin
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """替换 builtins.__import__：只对第一次导入的模块计时"""
+        original = self._original_import
+        try:
+            package = globals.get("__package__") if globals and level else None
+            resolved = importlib.util.resolve_name("." * level + name, package) if level else name
+        except (ImportError, ValueError, AttributeError):
+            resolved = None
+        if not resolved or resolved in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        depth = len(self._import_stack)
+        self._import_stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._import_stack.pop()
+            if self._import_stack:
+                self._import_stack[-1] += elapsed
+            self.imports.append((depth, resolved, elapsed - children, elapsed))
+
+    @contextmanager
+    def phase(self, name: str):
+        """记录一个阶段的开始和结束"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, started - self.origin, time.perf_counter() - self.origin))
+
+    def asset(self, name: str, seconds: float) -> None:
+        """记录一个资源的加载耗时"""
+        if self.enabled:
+            self.assets.append((name, seconds))
+
+    def first_frame(self) -> None:
+        """第一帧显示后调用：停止记录导入，按设置输出报告；之后的调用不做任何事"""
+        if not self.enabled or self.first_frame_at is not None:
+            return
+        self.first_frame_at = time.perf_counter() - self.origin
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        over_budget = self.budget_ms is not None and self.first_frame_at * 1000 > self.budget_ms
+        if self.report_always or over_budget:
+            self.report()
+
+    def report(self, file=None, top: int = 20) -> None:
+        """
+        输出时间线
+
+        :param file: 输出目标，默认为标准错误
+        :param top: 列出的导入模块和资源数
+        """
+        file = file or sys.stderr
+        print("startup timeline (ms since start):", file=file)
+        for name, start, end in sorted(self.phases, key=lambda p: p[1]):
+            print(f"  {start * 1000:8.1f} .. {end * 1000:8.1f}  {(end - start) * 1000:7.1f}  {name}", file=file)
+
+        if self.imports:
+            total = sum(cumulative for depth, _, _, cumulative in self.imports if depth == 0)
+            print(f"imports: {len(self.imports)} modules, {total * 1000:.1f} ms; "
+                  f"slowest (self | cumulative ms):", file=file)
+            for depth, name, own, cumulative in sorted(self.imports, key=lambda i: -i[3])[:top]:
+                print(f"  {own * 1000:7.1f} | {cumulative * 1000:7.1f} | {'  ' * depth}{name}", file=file)
+
+        if self.assets:
+            total = sum(seconds for _, seconds in self.assets)
+            print(f"assets: {len(self.assets)} files, {total * 1000:.1f} ms; slowest:", file=file)
+            for name, seconds in sorted(self.assets, key=lambda a: -a[1])[:top]:
+                print(f"  {seconds * 1000:7.1f}  {name}", file=file)
+
+        if self.first_frame_at is not None:
+            line = f"first frame at {self.first_frame_at * 1000:.1f} ms"
+            if self.budget_ms is not None:
+                status = "over budget" if self.first_frame_at * 1000 > self.budget_ms else "within budget"
+                line += f" ({status}: {self.budget_ms:.0f} ms)"
+            print(line, file=file)
+
+
+timeline = StartupTimeline()  # 进程内唯一的启动时间线
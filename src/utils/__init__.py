@@ -1,5 +1,11 @@
+from .display import Display, create_display
 from .game_config import GameConfig
+from .ghosts import GhostRecorder, GhostStore
 from .images import Images
+from .input import InputManager
+from .levels import LevelStream, daily_seed, parse_seed
+from .render_queue import RenderQueue
 from .sounds import Sounds
+from .stats import StatsStore, open_stats_store
 from .utils import clamp, get_hit_mask, pixel_collision
 from .window import Window
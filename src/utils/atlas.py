@@ -0,0 +1,222 @@
+"""
+精灵图集
+
+构建步骤（make atlas）把 assets/sprites 下的所有PNG打包成一个图集文件：文件头、JSON索引
+（精灵名 -> 图集中的矩形），然后是整张图集的原始像素。像素为预乘透明度的32位BGRA，与常见
+显示格式的内存布局相同，运行时把文件内存映射后直接用 pygame.image.frombuffer 创建表面，
+不需要解码PNG，也不需要 convert_alpha；各个精灵是这张表面的子表面。
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import pygame
+
+from ..startup import timeline
+
+SPRITE_DIR = "assets/sprites"  # 精灵PNG所在目录
+DEFAULT_ATLAS = "assets/sprites.atlas"  # 默认图集文件，可通过环境变量 FLAPPY_ATLAS 覆盖，设为 off 时不使用图集
+
+_MAGIC = b"FATL"
+_VERSION = 1
+# 文件头：标识、版本、图集宽度、高度、索引长度、像素数据偏移
+_HEADER = struct.Struct("<4sHxxIIII")
+_ALIGN = 64  # 像素数据按缓存行对齐
+_PADDING = 1  # 精灵之间的透明间隔，缩放和纹理采样时不会混入相邻精灵
+_FORMAT = "BGRA"  # 像素的字节顺序
+
+
+def sprite_name(path: str) -> str:
+    """精灵名：不含目录和扩展名的文件名，例如 assets/sprites/base.png -> base"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _pack(sizes: Dict[str, Tuple[int, int]], width: int) -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """
+    按行排布：精灵按高度从高到低放入宽度为 width 的若干行
+
+    :return: (精灵名 -> 左上角坐标, 图集高度)
+    """
+    positions = {}
+    x = y = row_height = 0
+    for name in sorted(sizes, key=lambda n: (-sizes[n][1], -sizes[n][0], n)):
+        w, h = sizes[name]
+        if x and x + w > width:  # 当前行放不下，换行
+            x, y, row_height = 0, y + row_height + _PADDING, 0
+        positions[name] = (x, y)
+        x += w + _PADDING
+        row_height = max(row_height, h)
+    return positions, y + row_height
+
+
+def build_atlas(paths: Iterable[str], out_path: str = DEFAULT_ATLAS, max_width: int = 2048) -> Dict[str, list]:
+    """
+    把多个PNG打包成图集文件，需要已经设置显示模式
+
+    :param paths: PNG路径
+    :param out_path: 输出的图集文件
+    :param max_width: 图集的最大宽度，在不超过它的宽度中选面积最小的排布
+    :return: 索引，精灵名 -> [x, y, 宽, 高, 是否有半透明像素]
+    """
+    images = {sprite_name(path): pygame.image.load(path).convert_alpha() for path in paths}
+    sizes = {name: image.get_size() for name, image in images.items()}
+    widest = max(w for w, _ in sizes.values())
+    layouts = (_pack(sizes, width) + (width,) for width in range(widest, max(widest, max_width) + 1, 8))
+    positions, height, width = min(layouts, key=lambda layout: layout[1] * layout[2])
+
+    sheet = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+    sheet.fill((0, 0, 0, 0))
+    index = {}
+    for name, image in images.items():
+        x, y = positions[name]
+        # 预乘透明度后原样复制到图集（BLEND_RGBA_MAX 保留源像素的透明度，目标为全透明）
+        sheet.blit(image.premul_alpha(), (x, y), None, pygame.BLEND_RGBA_MAX)
+        alphas = pygame.image.tobytes(image, "RGBA")[3::4]
+        translucent = any(0 < a < 255 for a in alphas)
+        index[name] = [x, y, image.get_width(), image.get_height(), translucent]
+
+    index_bytes = json.dumps({
+        "format": _FORMAT,
+        "premultiplied": True,
+        "sprites": index,
+    }, sort_keys=True).encode()
+    offset = -(-(_HEADER.size + len(index_bytes)) // _ALIGN) * _ALIGN
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, width, height, len(index_bytes), offset))
+        f.write(index_bytes)
+        f.write(bytes(offset - _HEADER.size - len(index_bytes)))
+        f.write(pygame.image.tobytes(sheet, _FORMAT))
+    os.replace(tmp_path, out_path)  # 原子替换，正在运行的游戏映射的旧文件不受影响
+    return index
+
+
+class SpriteAtlas:
+    """
+    内存映射的精灵图集
+
+    所有精灵是同一张表面的子表面，表面直接引用映射的文件内容，只读。像素是预乘透明度的，
+    不透明和全透明像素与普通表面完全相同；含半透明像素的精灵需用 BLEND_PREMULTIPLIED 绘制，
+    见 blend_flags()。
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        打开图集文件
+
+        :param path: 图集文件路径
+        :raises ValueError: 文件不是本版本的图集
+        """
+        started = time.perf_counter()
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError(f"{path}: 不是图集文件")
+            magic, version, width, height, index_length, offset = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{path}: 不是图集文件或版本不兼容")
+            index = json.loads(f.read(index_length))
+            self.buffer = self._map(f, offset, width * height * 4)
+
+        self.sprites: Dict[str, Tuple[int, int, int, int]] = {}  # 精灵名 -> 矩形
+        self.translucent = set()  # 含半透明像素的精灵名
+        for name, (x, y, w, h, translucent) in index["sprites"].items():
+            self.sprites[name] = (x, y, w, h)
+            if translucent:
+                self.translucent.add(name)
+
+        self.sheet = pygame.image.frombuffer(self.buffer, (width, height), index["format"])
+        screen = pygame.display.get_surface()
+        if screen is not None and screen.get_masks()[:3] != self.sheet.get_masks()[:3]:
+            # 显示格式的字节顺序不同（少见），整张转换一次，之后的绘制仍走快速路径
+            self.sheet = self.sheet.convert_alpha()
+        self._premultiplied = set()  # 本图集交出的含半透明像素的表面
+        timeline.asset(path, time.perf_counter() - started)
+
+    @staticmethod
+    def _map(f, offset: int, length: int):
+        """把像素数据映射到内存；没有 mmap 的平台（如Web版本）读入内存"""
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, AttributeError):
+            f.seek(offset)
+            data = f.read(length)
+        else:
+            data = memoryview(mapped)[offset:offset + length]
+        if len(data) != length:
+            raise ValueError(f"{f.name}: 图集文件不完整")
+        return data
+
+    @classmethod
+    def open_default(cls, sources: Optional[Iterable[str]] = None) -> Optional["SpriteAtlas"]:
+        """
+        打开默认图集；没有构建图集、图集已过期（有比它新的PNG）或无法读取时返回 None
+
+        :param sources: 检查是否过期的PNG路径，不存在的文件（例如Web包中省略的PNG）忽略
+        """
+        path = os.environ.get("FLAPPY_ATLAS", DEFAULT_ATLAS)
+        if path.lower() in ("", "0", "off"):
+            return None
+        try:
+            built = os.path.getmtime(path)
+        except OSError:
+            return None
+        for source in sources or ():
+            try:
+                if os.path.getmtime(source) > built:
+                    return None
+            except OSError:
+                pass
+        try:
+            return cls(path)
+        except (OSError, ValueError, KeyError, pygame.error):
+            return None
+
+    def __contains__(self, name: str) -> bool:
+        return sprite_name(name) in self.sprites
+
+    def get(self, name: str, alpha: bool = True) -> pygame.Surface:
+        """
+        取出一个精灵
+
+        :param name: 精灵名或PNG路径
+        :param alpha: 是否保留透明通道；False 时复制为不透明表面（例如背景），绘制更快
+        """
+        name = sprite_name(name)
+        surface = self.sheet.subsurface(self.sprites[name])
+        if not alpha:
+            return surface.convert() if pygame.display.get_surface() else surface.copy()
+        if name in self.translucent:
+            self._premultiplied.add(surface)
+        return surface
+
+    def blend_flags(self, surface: pygame.Surface) -> int:
+        """绘制某个精灵需要的混合标志：本图集交出的半透明精灵为 BLEND_PREMULTIPLIED"""
+        return pygame.BLEND_PREMULTIPLIED if surface in self._premultiplied else 0
+
+
+def main() -> None:
+    """
+    构建精灵图集：make atlas
+    """
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="把精灵PNG打包成图集")
+    parser.add_argument("--sprites", default=SPRITE_DIR, help="精灵PNG所在目录")
+    parser.add_argument("--output", default=DEFAULT_ATLAS, help="输出的图集文件")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.sprites, "*.png")))
+    if not paths:
+        sys.exit(f"{args.sprites}: 没有PNG文件")
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # 构建时不需要窗口
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    index = build_atlas(paths, args.output)
+    print(f"{args.output}: {len(index)} 个精灵, {os.path.getsize(args.output)} 字节")
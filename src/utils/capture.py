@@ -0,0 +1,239 @@
+"""
+帧录制
+
+设置 FLAPPY_CAPTURE 时逐帧录制渲染队列输出的逻辑画面（288x512），用于精彩集锦和覆盖层的视觉
+回归测试；配合 FLAPPY_AUTOPLAY、FLAPPY_SEED 和SDL的dummy驱动可以无界面录制固定关卡。
+
+游戏循环中每帧只把画面复制到预先分配的环形缓冲区中的一个表面（一次同格式的 blit，不分配
+内存），编码在后台线程完成，不阻塞游戏循环。缓冲区全部被占用时等待编码线程空出一个（计入
+stalls），不丢帧。两种输出：
+
+- PNG序列：FLAPPY_CAPTURE 为目录，每帧一个 frame_000000.png，多个线程并行编码
+- 差分容器：FLAPPY_CAPTURE 以 .flcap 结尾，每帧用 zlib 压缩，与上一帧按字节异或后压缩
+  （差分帧）和直接压缩（关键帧）取较小的一个：欢迎、结束界面几乎不变，差分帧只有几百字节；
+  游戏中管道和地面每帧移动，异或的结果并不比原图好压缩，多数是关键帧。至少每
+  KEYFRAME_INTERVAL 帧一个关键帧，便于从中间开始读取
+
+容器格式（小端）：头部 MAGIC、宽、高、帧率（各2字节）；之后每帧为类型（1字节，0 关键帧，
+1 差分帧）、压缩后的长度（4字节）和 zlib 压缩的RGB像素。
+"""
+import atexit
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+import pygame
+
+MAGIC = b"FLAPCAP\x01"
+_HEADER = struct.Struct("<HHH")  # 宽、高、帧率
+_FRAME = struct.Struct("<BI")  # 类型、压缩后的长度
+KEYFRAME = 0  # 完整的一帧
+DELTA = 1  # 与上一帧异或
+KEYFRAME_INTERVAL = 150  # 关键帧间隔（帧），30帧/秒时为5秒
+COMPRESS_LEVEL = 6  # 一帧压缩两次约8毫秒，30帧/秒时一个编码线程足够
+
+
+class FrameRecorder:
+    """
+    把每帧画面复制到环形缓冲区，由后台线程编码为PNG序列或差分容器
+    """
+
+    def __init__(self, path: str, size: Tuple[int, int], fps: int = 30, slots: int = 8,
+                 workers: int = 2, limit: Optional[int] = None) -> None:
+        """
+        :param path: 输出目录（PNG序列）或 .flcap 文件（差分容器）
+        :param size: 画面尺寸
+        :param fps: 写入容器头部的帧率
+        :param slots: 环形缓冲区的帧数，编码偶尔变慢时由它吸收
+        :param workers: PNG编码线程数；差分帧依赖上一帧，容器只用一个线程
+        :param limit: 录制的帧数，None 表示不限
+        """
+        self.path = path
+        self.size = size
+        self.fps = fps
+        self.limit = limit
+        self.delta = path.endswith(".flcap")
+        self.frames = 0  # 已录制的帧数
+        self.stalls = 0  # 等待空闲缓冲区的次数
+        self.encode_time = 0.0  # 编码的总耗时（秒）
+        self.error: Optional[BaseException] = None  # 编码线程的第一个错误
+        self._slots: List[Optional[pygame.Surface]] = [None] * slots  # 第一帧时按画面的像素格式创建
+        self._free = queue.Queue()  # 空闲缓冲区的下标
+        for index in range(slots):
+            self._free.put(index)
+        self._work = queue.Queue()  # (帧号, 缓冲区下标)，None 表示结束
+        self._previous: Optional[bytes] = None  # 上一帧的像素，差分帧的参考
+        self._file = None
+        if self.delta:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "wb")
+            self._file.write(MAGIC + _HEADER.pack(size[0], size[1], fps))
+            workers = 1
+        else:
+            os.makedirs(path, exist_ok=True)
+        self._threads = [threading.Thread(target=self._run, name=f"capture-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+        self.closed = False
+        atexit.register(self.close)  # 异常退出时也写完已录制的帧
+
+    @classmethod
+    def from_env(cls, target, fps: int) -> Optional["FrameRecorder"]:
+        """
+        按环境变量 FLAPPY_CAPTURE（输出目录或 .flcap 文件）和 FLAPPY_CAPTURE_FRAMES（录制的帧数）
+        创建，未设置时返回 None
+
+        :param target: 逻辑渲染目标
+        :param fps: 游戏帧率，0（不限帧率）时按30记录
+        :raises RuntimeError: 渲染目标不是 pygame.Surface（FLAPPY_RENDERER=texture）
+        """
+        path = os.environ.get("FLAPPY_CAPTURE", "")
+        if not path:
+            return None
+        if not isinstance(target, pygame.Surface):
+            raise RuntimeError("FLAPPY_CAPTURE 需要软件表面的渲染后端（FLAPPY_RENDERER=surface）")
+        limit = os.environ.get("FLAPPY_CAPTURE_FRAMES")
+        return cls(path, target.get_size(), fps or 30, limit=int(limit) if limit else None)
+
+    def capture(self, surface: pygame.Surface) -> bool:
+        """
+        录制一帧：复制到空闲的缓冲区，交给编码线程
+
+        :return: 是否刚好录制到设定的帧数
+        :raises RuntimeError: 编码线程出错
+        """
+        if self.closed or self.frames == self.limit:
+            return False  # 已录制完，等待退出
+        if self.error is not None:
+            raise RuntimeError(f"帧录制失败: {self.error}") from self.error
+        try:
+            index = self._free.get_nowait()
+        except queue.Empty:
+            self.stalls += 1  # 编码跟不上，等待而不是丢帧
+            index = self._free.get()
+        slot = self._slots[index]
+        if slot is None:
+            slot = self._slots[index] = pygame.Surface(self.size, 0, surface)
+        slot.blit(surface, (0, 0))
+        self._work.put((self.frames, index))
+        self.frames += 1
+        return self.frames == self.limit
+
+    def _run(self) -> None:
+        """编码线程"""
+        while True:
+            item = self._work.get()
+            if item is None:
+                return
+            frame, index = item
+            started = time.perf_counter()
+            try:
+                if self.error is None:
+                    self._encode(frame, self._slots[index])
+            except Exception as e:  # 记录下来，由游戏循环在下一帧抛出
+                self.error = e
+            finally:
+                self.encode_time += time.perf_counter() - started
+                self._free.put(index)
+
+    def _encode(self, frame: int, surface: pygame.Surface) -> None:
+        if not self.delta:
+            pygame.image.save(surface, os.path.join(self.path, f"frame_{frame:06d}.png"))
+            return
+        pixels = pygame.image.tobytes(surface, "RGB")
+        kind, data = KEYFRAME, zlib.compress(pixels, COMPRESS_LEVEL)
+        if self._previous is not None and frame % KEYFRAME_INTERVAL:
+            # 整帧当作一个大整数异或，比逐字节循环快两个数量级
+            order = sys.byteorder
+            delta = (int.from_bytes(pixels, order) ^ int.from_bytes(self._previous, order)).to_bytes(len(pixels), order)
+            delta = zlib.compress(delta, COMPRESS_LEVEL)
+            if len(delta) < len(data):
+                kind, data = DELTA, delta
+        self._file.write(_FRAME.pack(kind, len(data)))
+        self._file.write(data)
+        self._previous = pixels
+
+    def close(self) -> None:
+        """等待编码完成并关闭输出，可以重复调用"""
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        for _ in self._threads:
+            self._work.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._file is not None:
+            self._file.close()
+        encode_ms = self.encode_time / max(self.frames, 1) * 1000
+        print(f"captured {self.frames} frames to {self.path} "
+              f"(encode {encode_ms:.1f}ms/frame, stalls {self.stalls})")
+
+
+class CaptureReader:
+    """
+    读取差分容器，逐帧还原RGB像素
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :raises ValueError: 不是帧录制的容器
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(len(MAGIC) + _HEADER.size)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"不是帧录制的容器: {path}")
+        self.width, self.height, self.fps = _HEADER.unpack(header[len(MAGIC):])
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def __iter__(self) -> Iterator[bytes]:
+        """每帧的RGB像素"""
+        order = sys.byteorder
+        previous = None
+        with open(self.path, "rb") as f:
+            f.seek(len(MAGIC) + _HEADER.size)
+            while True:
+                head = f.read(_FRAME.size)
+                if len(head) < _FRAME.size:
+                    return
+                kind, length = _FRAME.unpack(head)
+                data = zlib.decompress(f.read(length))
+                if kind == DELTA:
+                    data = (int.from_bytes(data, order) ^ int.from_bytes(previous, order)).to_bytes(len(data), order)
+                previous = data
+                yield data
+
+    def surfaces(self) -> Iterator[pygame.Surface]:
+        """每帧的表面"""
+        for pixels in self:
+            yield pygame.image.frombytes(pixels, self.size, "RGB")
+
+
+def main() -> None:
+    """
+    python -c "from src.utils.capture import main; main()" capture.flcap frames/
+    把差分容器导出为PNG序列
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="把帧录制的容器导出为PNG序列")
+    parser.add_argument("capture", help=".flcap 文件")
+    parser.add_argument("output", help="输出目录")
+    args = parser.parse_args()
+
+    reader = CaptureReader(args.capture)
+    os.makedirs(args.output, exist_ok=True)
+    count = 0
+    for count, surface in enumerate(reader.surfaces(), 1):
+        pygame.image.save(surface, os.path.join(args.output, f"frame_{count - 1:06d}.png"))
+    print(f"exported {count} frames ({reader.width}x{reader.height} @ {reader.fps}fps) to {args.output}")
@@ -0,0 +1,191 @@
+"""
+显示输出
+
+游戏始终画在固定大小的逻辑渲染目标上（Window 的尺寸），Display 每帧把它缩放到实际的窗口或
+全屏显示器。缩放方式：
+
+- integer：最近邻整数倍放大，像素画保持清晰，四周留黑边
+- smooth：smoothscale 按比例放大到最大，只在宽高比不同的方向留黑边
+- sdl：交给SDL2渲染器缩放（pygame.SCALED），不需要在Python中缩放
+
+静态层（背景）缩放后缓存，只在内容变化时重新缩放。integer 方式每帧只重新缩放本帧有绘制的
+区域，上一帧画过、这一帧没有画的区域从缓存恢复；smooth 方式的分区域缩放与整帧缩放对不齐，
+有变化时整帧缩放。
+"""
+import os
+from typing import List, Optional, Tuple
+
+import pygame
+
+from .render_queue import RenderQueue
+from .window import Window
+
+SCALE_MODES = ("integer", "smooth", "sdl")  # 可选的缩放方式
+FULL_FRAME_RATIO = 0.6  # 需要重新缩放的面积超过画面的这个比例时，直接缩放整帧
+
+
+def parse_size(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    解析显示尺寸，例如 "1080x1920"
+
+    :raises ValueError: 格式不正确
+    """
+    if not value:
+        return None
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def create_display(window: Window):
+    """
+    按环境变量 FLAPPY_RENDERER 创建显示输出：surface（默认）为软件表面的 Display，
+    texture 为使用SDL2渲染器的 TextureDisplay
+
+    :raises ValueError: 未知的渲染后端
+    """
+    renderer = os.environ.get("FLAPPY_RENDERER", "surface").lower()
+    if renderer == "texture":
+        from .renderer import TextureDisplay  # 只在使用时导入 pygame._sdl2
+
+        fullscreen = os.environ.get("FLAPPY_FULLSCREEN", "") not in ("", "0")
+        return TextureDisplay(window, parse_size(os.environ.get("FLAPPY_DISPLAY")), fullscreen)
+    if renderer != "surface":
+        raise ValueError(f"未知的渲染后端: {renderer}，可选 surface, texture")
+    return Display(window)
+
+
+class Display:
+    """
+    逻辑渲染目标和缩放输出
+
+    显示尺寸、全屏和缩放方式默认从环境变量 FLAPPY_DISPLAY（如 1080x1920）、FLAPPY_FULLSCREEN
+    和 FLAPPY_SCALE 读取；都没有设置时逻辑目标就是窗口本身，与不缩放时完全相同。
+    """
+
+    def __init__(self, window: Window, size: Optional[Tuple[int, int]] = None,
+                 fullscreen: Optional[bool] = None, scale: Optional[str] = None) -> None:
+        """
+        创建窗口和逻辑渲染目标
+
+        :param window: 逻辑尺寸
+        :param size: 显示尺寸，默认为逻辑尺寸（全屏时为桌面尺寸）
+        :param fullscreen: 是否全屏
+        :param scale: 缩放方式，见 SCALE_MODES
+        :raises ValueError: 未知的缩放方式
+        """
+        size = size or parse_size(os.environ.get("FLAPPY_DISPLAY"))
+        if fullscreen is None:
+            fullscreen = os.environ.get("FLAPPY_FULLSCREEN", "") not in ("", "0")
+        self.mode = (scale or os.environ.get("FLAPPY_SCALE") or "integer").lower()
+        if self.mode not in SCALE_MODES:
+            raise ValueError(f"未知的缩放方式: {self.mode}，可选 {', '.join(SCALE_MODES)}")
+
+        self.logical_size = (window.width, window.height)
+        flags = pygame.FULLSCREEN if fullscreen else 0
+        # 不缩放或由SDL缩放时，直接画到窗口
+        self.scaled = self.mode != "sdl" and (fullscreen or (size and tuple(size) != self.logical_size))
+        if not self.scaled:
+            if self.mode == "sdl":
+                flags |= pygame.SCALED
+            self.surface = pygame.display.set_mode(self.logical_size, flags)
+            self.target = self.surface
+            self.viewport = self.surface.get_rect()
+            return
+
+        self.surface = pygame.display.set_mode(size or (0, 0), flags)
+        self.target = pygame.Surface(self.logical_size).convert(self.surface)
+        self.viewport = self._fit(self.surface.get_size())
+        self.surface.fill((0, 0, 0))  # 黑边
+        self._view = self.surface.subsurface(self.viewport)
+        self._static_source = pygame.Surface(self.logical_size).convert(self.surface)
+        self._static_scaled = pygame.Surface(self.viewport.size).convert(self.surface)
+        self._static_items: Optional[tuple] = None  # 缓存对应的静态层绘制，None 表示没有缓存
+        self._last_dirty: List[pygame.Rect] = []  # 上一帧重新缩放过的逻辑区域
+        self.full_frames = 0  # 整帧缩放的次数
+        self.partial_frames = 0  # 只缩放变化区域的次数
+
+    def _fit(self, size: Tuple[int, int]) -> pygame.Rect:
+        """逻辑画面在显示器上的位置：按缩放方式放大后居中"""
+        lw, lh = self.logical_size
+        dw, dh = size
+        if self.mode == "integer":
+            factor = max(1, min(dw // lw, dh // lh))
+            w, h = lw * factor, lh * factor
+        elif dw * lh <= dh * lw:  # 显示器比逻辑画面窄，宽度撑满
+            w, h = dw, dw * lh // lw
+        else:
+            w, h = dh * lw // lh, dh
+        return pygame.Rect((dw - w) // 2, (dh - h) // 2, w, h)
+
+    def bind(self, queue: RenderQueue) -> None:
+        """让渲染队列记录每帧变化的区域"""
+        queue.track_damage = self.scaled
+
+    def _scale(self, source: pygame.Surface, dest: pygame.Surface) -> None:
+        """按缩放方式把 source 缩放到 dest 的大小，写入 dest"""
+        if self.mode == "integer":
+            pygame.transform.scale(source, dest.get_size(), dest)
+        else:
+            pygame.transform.smoothscale(source, dest.get_size(), dest)
+
+    def _to_view(self, rect: pygame.Rect) -> pygame.Rect:
+        """逻辑坐标的矩形 -> 视口内的矩形"""
+        lw, lh = self.logical_size
+        vw, vh = self.viewport.size
+        left, top = rect.left * vw // lw, rect.top * vh // lh
+        return pygame.Rect(left, top, rect.right * vw // lw - left, rect.bottom * vh // lh - top)
+
+    def _refresh_static(self, items: tuple) -> None:
+        """重新绘制并缩放静态层缓存"""
+        self._static_source.fill((0, 0, 0))
+        self._static_source.blits([(source, (x, y), area, flags) for source, x, y, area, flags in items], False)
+        self._scale(self._static_source, self._static_scaled)
+        self._static_items = items
+
+    def present(self, queue: Optional[RenderQueue] = None) -> None:
+        """
+        把逻辑渲染目标输出到显示器
+
+        :param queue: 刚输出本帧的渲染队列，提供变化的区域；None 时整帧重新缩放
+        """
+        if not self.scaled:
+            pygame.display.update()
+            return
+
+        bounds = self.target.get_rect()
+        full = queue is None
+        if queue is not None and queue.static_items != self._static_items:
+            self._refresh_static(queue.static_items)
+            full = True  # 背景变了，整帧重新缩放
+
+        dirty = [bounds]
+        if queue is not None:
+            dirty = [rect.clip(bounds) for rect in queue.dirty]
+            dirty = [rect for rect in dirty if rect.w and rect.h]
+            # smoothscale 的采样位置与区域大小有关，分区域缩放和整帧缩放的结果对不齐，只能整帧缩放；
+            # 恢复缓存只是复制，缩放才是主要开销
+            area = sum(rect.w * rect.h for rect in dirty)
+            if dirty and (self.mode != "integer" or area > FULL_FRAME_RATIO * bounds.w * bounds.h):
+                full = True
+
+        if full:
+            self._scale(self.target, self._view)
+            self._last_dirty = dirty
+            self.full_frames += 1
+            pygame.display.update(self.viewport)
+            return
+
+        updated = []
+        # 上一帧画过的区域先从静态层缓存恢复，本帧画到的区域再重新缩放覆盖
+        for rect in self._last_dirty:
+            view_rect = self._to_view(rect)
+            self._view.blit(self._static_scaled, view_rect, view_rect)
+            updated.append(view_rect.move(self.viewport.topleft))
+        for rect in dirty:
+            view_rect = self._to_view(rect)
+            if view_rect.w and view_rect.h:
+                self._scale(self.target.subsurface(rect), self._view.subsurface(view_rect))
+                updated.append(view_rect.move(self.viewport.topleft))
+        self._last_dirty = dirty
+        self.partial_frames += 1
+        pygame.display.update(updated)
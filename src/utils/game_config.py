@@ -1,8 +1,12 @@
 import os
+from typing import Optional
 
 import pygame
 
+from .display import Display
 from .images import Images
+from .input import InputManager
+from .render_queue import RenderQueue
 from .sounds import Sounds
 from .window import Window
 
@@ -19,6 +23,7 @@ class GameConfig:
         window: Window,
         images: Images,
         sounds: Sounds,
+        display: Optional[Display] = None,
     ) -> None:
         """
         初始化游戏配置
@@ -28,6 +33,7 @@ class GameConfig:
         :param window: 窗口配置
         :param images: 图像配置
         :param sounds: 声音配置
+        :param display: 缩放输出，screen 为它的逻辑渲染目标；None 时直接刷新窗口
         """
         self.screen = screen  # 游戏屏幕
         self.clock = clock  # 游戏时钟
@@ -36,9 +42,42 @@ class GameConfig:
         self.images = images  # 图像配置
         self.sounds = sounds  # 声音配置
         self.debug = os.environ.get("DEBUG", False)  # 调试模式
+        self.particles = None  # 粒子系统，由游戏在每局开始时创建
+        self.display = display  # 缩放输出
+        self.render_queue = RenderQueue(screen)  # 帧渲染队列
+        if display is not None:
+            display.bind(self.render_queue)
+        self.input = InputManager()  # 输入子系统
+        self.recorder = None  # 帧录制（FLAPPY_CAPTURE），见 FrameRecorder
+        self.fixed_step: Optional[float] = None  # 固定的帧间隔（毫秒），设置后游戏时间按帧推进，见 ticks
+        self.frame = 0  # 已输出的帧数
 
     def tick(self) -> None:
         """
         更新游戏时钟
         """
-        self.clock.tick(self.fps)  # 控制游戏帧率
+        self.input.wait(self.clock, self.fps)  # 控制游戏帧率，等待期间轮询输入
+
+    def ticks(self) -> int:
+        """
+        游戏时间（毫秒），代替 pygame.time.get_ticks：设置了 fixed_step 时为已输出的帧数乘以帧间隔，
+        画面和游戏逻辑与机器速度无关（视觉回归测试、无界面录制）
+        """
+        if self.fixed_step is None:
+            return pygame.time.get_ticks()
+        return int(self.frame * self.fixed_step)
+
+    def present(self) -> None:
+        """
+        输出本帧渲染队列并刷新显示
+        """
+        self.render_queue.flush()
+        if self.recorder is not None and self.recorder.capture(self.screen):
+            pygame.event.post(pygame.event.Event(pygame.QUIT))  # 已录制到设定的帧数，正常退出
+        if self.display is not None:
+            self.display.present(self.render_queue)  # 缩放到显示器
+        else:
+            pygame.display.update()
+        self.sounds.begin_frame()  # 音效按帧去重
+        self.input.presented()  # 记录输入到显示的延迟
+        self.frame += 1
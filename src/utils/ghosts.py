@@ -0,0 +1,170 @@
+"""
+记录的飞行轨迹（幽灵赛跑）
+
+使用预生成关卡（固定种子或每日挑战）时，每局逐帧记录小鸟的y坐标和角度；同一关卡和模式成绩最好的
+GHOST_RUNS 局保存为轨迹文件。之后在同一关卡上游戏时，这些轨迹作为半透明的小鸟按帧号回放——管道由
+种子决定、逐帧移动，同一帧号的管道位置完全相同。
+
+轨迹文件：文件头 + y坐标（int16，1/4像素）+ 角度（int8），小端序。回放时内存映射，每帧按帧号直接
+取值，只有用到的页会从磁盘读入。
+"""
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+from typing import List, Optional
+
+# 默认保存目录，可通过环境变量 FLAPPY_GHOST_DIR 覆盖
+DEFAULT_GHOST_DIR = os.path.join(os.path.expanduser("~"), ".flappybird", "ghosts")
+GHOST_RUNS = 10  # 每个关卡和模式保存的轨迹数
+Y_SCALE = 4  # y坐标的精度（每像素的单位数）
+
+_MAGIC = b"FGHO"
+_VERSION = 1
+# 文件头：标识、版本、种子、分数、帧数
+_HEADER = struct.Struct("<4sHxxQII")
+
+
+class GhostRecorder:
+    """
+    逐帧记录玩家的y坐标和角度，数组按需增长，每帧不创建对象
+    """
+
+    def __init__(self) -> None:
+        self.ys = array("h")
+        self.rots = array("b")
+
+    def __len__(self) -> int:
+        return len(self.ys)
+
+    def reset(self) -> None:
+        del self.ys[:]
+        del self.rots[:]
+
+    def record(self, player) -> None:
+        """记录本帧更新后的位置"""
+        self.ys.append(min(max(int(player.y * Y_SCALE), -32768), 32767))
+        self.rots.append(min(max(int(player.rot), -128), 127))
+
+
+class GhostRun:
+    """
+    一条保存的轨迹，内存映射只读；ys[帧号] / Y_SCALE 为y坐标，rots[帧号] 为角度
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :raises OSError: 无法读取
+        :raises ValueError: 不是轨迹文件
+        """
+        self.path = path
+        self._mmap = None
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._buffer = memoryview(self._mmap)
+            except (OSError, ValueError, AttributeError):  # 不支持内存映射时整体读入
+                self._buffer = memoryview(f.read())
+        if len(self._buffer) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: 文件不完整")
+        magic, version, self.seed, self.score, self.frames = _HEADER.unpack_from(self._buffer)
+        if (magic, version) != (_MAGIC, _VERSION) or len(self._buffer) != _HEADER.size + self.frames * 3 \
+                or sys.byteorder != "little":
+            self.close()
+            raise ValueError(f"{path}: 不是轨迹文件")
+        offset = _HEADER.size
+        self.ys = self._buffer[offset:offset + self.frames * 2].cast("h")
+        self.rots = self._buffer[offset + self.frames * 2:].cast("b")
+
+    def close(self) -> None:
+        """释放内存映射"""
+        for name in ("ys", "rots", "_buffer"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class GhostStore:
+    """
+    按关卡和模式保存成绩最好的若干条轨迹
+
+    每个关卡和模式一个目录，文件名包含分数和帧数，列出最好的轨迹时不需要打开文件。
+    """
+
+    def __init__(self, directory: Optional[str] = None, keep: int = GHOST_RUNS) -> None:
+        """
+        :param directory: 保存目录，默认为 FLAPPY_GHOST_DIR 或 ~/.flappybird/ghosts
+        :param keep: 每个关卡和模式保存的轨迹数
+        """
+        self.directory = directory or os.environ.get("FLAPPY_GHOST_DIR", DEFAULT_GHOST_DIR)
+        self.keep = keep
+
+    def _level_dir(self, level, mode: str) -> str:
+        # 关卡缓存的文件名包含种子和生成参数
+        name = os.path.splitext(os.path.basename(level.path))[0]
+        return os.path.join(self.directory, f"{name}-{mode}")
+
+    def _ranked(self, directory: str) -> List[str]:
+        """目录中的轨迹文件，分数高的在前，分数相同时飞得久的在前"""
+        try:
+            names = [name for name in os.listdir(directory) if name.endswith(".run")]
+        except OSError:
+            return []
+        return sorted(names, reverse=True)
+
+    def runs(self, level, mode: str, count: Optional[int] = None) -> List[GhostRun]:
+        """
+        打开成绩最好的轨迹
+
+        :param level: LevelStream
+        :param mode: 游戏模式名
+        :param count: 最多打开的条数，默认为 keep
+        """
+        directory = self._level_dir(level, mode)
+        runs = []
+        for name in self._ranked(directory)[:self.keep if count is None else count]:
+            try:
+                runs.append(GhostRun(os.path.join(directory, name)))
+            except (OSError, ValueError):
+                continue  # 写入中断或旧版本的文件
+        return runs
+
+    def save(self, level, mode: str, score: int, recorder: GhostRecorder) -> bool:
+        """
+        成绩能进入前 keep 名时保存轨迹，并删除排在之后的轨迹（删除前应先关闭打开的轨迹）
+
+        :return: 是否保存
+        """
+        frames = len(recorder)
+        if not frames:
+            return False
+        directory = self._level_dir(level, mode)
+        name = f"{min(score, 999999):06d}-{frames:08d}-{uuid.uuid4().hex[:8]}.run"
+        ranked = self._ranked(directory)
+        if len(ranked) >= self.keep and name < ranked[self.keep - 1]:
+            return False
+        ys, rots = recorder.ys, recorder.rots
+        if sys.byteorder != "little":  # 文件统一使用小端序
+            ys = array("h", ys)
+            ys.byteswap()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, name)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, level.seed, score, frames))
+                ys.tofile(f)
+                rots.tofile(f)
+            os.replace(tmp_path, path)
+            for old in sorted(ranked + [name], reverse=True)[self.keep:]:
+                os.remove(os.path.join(directory, old))
+        except OSError as e:
+            print(f"无法保存轨迹: {e}")
+            return False
+        return True
@@ -1,10 +1,34 @@
 import random
+import time
 from typing import List, Tuple
 
 import pygame
 
+from ..startup import timeline
+from .atlas import SpriteAtlas
 from .constants import BACKGROUNDS, PIPES, PLAYERS
 
+# 除背景、玩家、管道以外用到的精灵
+SPRITES = tuple(f"assets/sprites/{num}.png" for num in range(10)) + (
+    "assets/sprites/gameover.png",
+    "assets/sprites/message.png",
+    "assets/sprites/base.png",
+)
+
+
+def load_image(path: str, alpha: bool = True) -> pygame.Surface:
+    """
+    加载图像并转换为显示格式，加载耗时记入启动时间线
+
+    :param path: 图像路径
+    :param alpha: 是否保留透明通道
+    """
+    started = time.perf_counter()
+    image = pygame.image.load(path)
+    image = image.convert_alpha() if alpha else image.convert()
+    timeline.asset(path, time.perf_counter() - started)
+    return image
+
 
 class Images:
     numbers: List[pygame.Surface]  # 数字图像列表
@@ -13,29 +37,30 @@ class Images:
     base: pygame.Surface  # 地面图像
     background: pygame.Surface  # 背景图像
     player: Tuple[pygame.Surface]  # 玩家图像
+    player_index: int  # 玩家图像在 PLAYERS 中的序号
     pipe: Tuple[pygame.Surface]  # 管道图像
 
     def __init__(self) -> None:
         """
-        初始化图像资源
+        初始化图像资源：构建了图集（make atlas）时从图集取出，否则逐个加载PNG
         """
+        self._player_frames = {}  # 其他颜色的小鸟图像，见 player_frames
+        self.atlas = SpriteAtlas.open_default(
+            SPRITES + BACKGROUNDS + PIPES + tuple(path for player in PLAYERS for path in player)
+        )
         self.numbers = list(
             (
-                pygame.image.load(f"assets/sprites/{num}.png").convert_alpha()  # 加载数字图像
+                self.load(f"assets/sprites/{num}.png")  # 加载数字图像
                 for num in range(10)
             )
         )
 
         # 游戏结束图像
-        self.game_over = pygame.image.load(
-            "assets/sprites/gameover.png"
-        ).convert_alpha()
+        self.game_over = self.load("assets/sprites/gameover.png")
         # 欢迎信息图像
-        self.welcome_message = pygame.image.load(
-            "assets/sprites/message.png"
-        ).convert_alpha()
+        self.welcome_message = self.load("assets/sprites/message.png")
         # 地面图像
-        self.base = pygame.image.load("assets/sprites/base.png").convert_alpha()
+        self.base = self.load("assets/sprites/base.png")
         self.randomize()  # 随机化背景和玩家图像
 
     def randomize(self):
@@ -49,17 +74,48 @@ class Images:
         # 随机选择管道图像
         rand_pipe = random.randint(0, len(PIPES) - 1)
 
-        self.background = pygame.image.load(BACKGROUNDS[rand_bg]).convert()  # 加载随机背景图像
+        self.background = self.load(BACKGROUNDS[rand_bg], alpha=False)  # 加载随机背景图像
+        self.player_index = rand_player
         self.player = (
-            pygame.image.load(PLAYERS[rand_player][0]).convert_alpha(),  # 加载玩家上拍图像
-            pygame.image.load(PLAYERS[rand_player][1]).convert_alpha(),  # 加载玩家中拍图像
-            pygame.image.load(PLAYERS[rand_player][2]).convert_alpha(),  # 加载玩家下拍图像
+            self.load(PLAYERS[rand_player][0]),  # 加载玩家上拍图像
+            self.load(PLAYERS[rand_player][1]),  # 加载玩家中拍图像
+            self.load(PLAYERS[rand_player][2]),  # 加载玩家下拍图像
         )
+        # 管道图像只加载一次，上方管道为翻转后的副本
+        pipe = self.load(PIPES[rand_pipe])
         self.pipe = (
-            pygame.transform.flip(
-                pygame.image.load(PIPES[rand_pipe]).convert_alpha(),
-                False,
-                True,
-            ),  # 加载并翻转管道图像
-            pygame.image.load(PIPES[rand_pipe]).convert_alpha(),  # 加载管道图像
+            pygame.transform.flip(pipe, False, True),  # 翻转的上方管道
+            pipe,  # 下方管道
         )
+
+    def player_frames(self, index: int) -> Tuple[pygame.Surface, ...]:
+        """
+        第 index 种颜色（按 PLAYERS 循环）的小鸟的三帧图像，多只小鸟同场时区分颜色；
+        同一种颜色的所有小鸟共用同一组图像，旋转精灵和碰撞掩码的缓存也随之共用
+
+        :param index: 颜色序号，player_index 为当前玩家的颜色
+        """
+        index %= len(PLAYERS)
+        if index == self.player_index:
+            return self.player
+        frames = self._player_frames.get(index)
+        if frames is None:
+            frames = self._player_frames[index] = tuple(self.load(path) for path in PLAYERS[index])
+        return frames
+
+    def load(self, path: str, alpha: bool = True) -> pygame.Surface:
+        """
+        取出一个精灵：图集中有时返回图集的子表面，否则加载PNG
+
+        :param path: PNG路径
+        :param alpha: 是否保留透明通道
+        """
+        if self.atlas is not None and path in self.atlas:
+            return self.atlas.get(path, alpha)
+        return load_image(path, alpha)
+
+    def blend_flags(self, image: pygame.Surface) -> int:
+        """
+        绘制图像需要的混合标志：图集中含半透明像素的精灵是预乘透明度的
+        """
+        return self.atlas.blend_flags(image) if self.atlas is not None else 0
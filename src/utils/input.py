@@ -0,0 +1,149 @@
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import pygame
+from pygame.locals import (
+    FINGERDOWN,
+    FINGERUP,
+    K_SPACE,
+    K_UP,
+    KEYDOWN,
+    KEYUP,
+    MOUSEBUTTONDOWN,
+    MOUSEBUTTONUP,
+)
+
+TAP_KEYS = (K_SPACE, K_UP)  # 触发拍打的按键
+POLL_INTERVAL = 0.002  # 等待下一帧期间轮询输入的间隔（秒）
+
+
+class InputManager:
+    """
+    输入子系统
+
+    等待下一帧时不再整段睡眠，而是每隔 POLL_INTERVAL 取一次事件并记录时间戳（event.stamp），
+    输入的时间精度不受帧率限制。按住不放的按键、鼠标键和手指只在按下时算一次点击，
+    触摸屏同时产生的模拟鼠标事件被忽略。
+
+    游戏逻辑按帧处理点击，但可以通过 consume 得到点击发生在上一帧间隔中的位置，
+    由物理更新补偿提前的那部分时间；点击被处理后到下一次画面刷新的时间记为输入到显示的延迟。
+    """
+
+    def __init__(self, history: int = 256) -> None:
+        """
+        :param history: 保留最近多少次延迟测量
+        """
+        self._buffer: List[pygame.event.Event] = []  # 等待下一帧期间收到的事件
+        self._held = set()  # 按住不放的按键、鼠标键和手指
+        self._pending: List[float] = []  # 本帧已处理、尚未显示的点击时间戳
+        self.latencies = deque(maxlen=history)  # 最近的输入到显示延迟（秒）
+        self.frame_start = time.perf_counter()  # 本帧开始处理输入的时间
+        self.frame_interval = 1 / 30  # 上一帧间隔（秒）
+        self._next_frame = None  # 下一帧的开始时间
+
+    def _collect(self) -> None:
+        """取出pygame事件队列中的事件，记录时间戳并判断是否为新的点击"""
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            event.stamp = now
+            event.tap = self._classify(event)
+            self._buffer.append(event)
+
+    def _classify(self, event) -> bool:
+        """更新按住状态，返回是否为新的点击"""
+        if event.type in (KEYDOWN, KEYUP):
+            if event.key not in TAP_KEYS:
+                return False
+            source = ("key", event.key)
+        elif event.type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP):
+            if getattr(event, "touch", False) or event.button != 1:
+                return False  # 触摸产生的模拟鼠标事件由 FINGERDOWN 处理
+            source = ("mouse", 1)
+        elif event.type in (FINGERDOWN, FINGERUP):
+            source = ("finger", getattr(event, "finger_id", 0))
+        else:
+            return False
+
+        if event.type in (KEYUP, MOUSEBUTTONUP, FINGERUP):
+            self._held.discard(source)
+            return False
+        if source in self._held:
+            return False  # 按住不放产生的重复事件
+        self._held.add(source)
+        return True
+
+    def events(self) -> List[pygame.event.Event]:
+        """
+        返回上一帧以来的所有事件（按时间顺序），每帧开始时调用一次
+        """
+        self._collect()
+        now = time.perf_counter()
+        self.frame_interval = max(now - self.frame_start, 1e-3)
+        self.frame_start = now
+        events, self._buffer = self._buffer, []
+        return events
+
+    def is_tap(self, event) -> bool:
+        """是否为新的点击（空格、上箭头、鼠标左键或触摸）"""
+        tap = getattr(event, "tap", None)
+        if tap is None:  # 没有经过 events() 的事件
+            tap = event.tap = self._classify(event)
+        return tap
+
+    def consume(self, event) -> float:
+        """
+        处理一次点击，开始测量它的输入到显示延迟
+
+        :return: 点击早于本帧开始的时间，以帧间隔为单位（0~1）
+        """
+        stamp = getattr(event, "stamp", None)
+        if stamp is None:
+            return 0.0
+        self._pending.append(stamp)
+        return min(max((self.frame_start - stamp) / self.frame_interval, 0.0), 1.0)
+
+    def presented(self) -> None:
+        """画面刷新后调用，记录本帧处理的点击的延迟"""
+        if self._pending:
+            now = time.perf_counter()
+            self.latencies.extend(now - stamp for stamp in self._pending)
+            self._pending.clear()
+
+    def wait(self, clock: pygame.time.Clock, fps: int) -> None:
+        """
+        等待到下一帧开始，期间持续轮询输入；替代 clock.tick(fps)
+
+        Web版本（pygbag）不能阻塞主线程，直接使用 clock.tick。
+        """
+        if not fps or sys.platform == "emscripten":
+            clock.tick(fps)
+            return
+        interval = 1 / fps
+        now = time.perf_counter()
+        target = self._next_frame if self._next_frame and now - self._next_frame < interval else now
+        while True:
+            remaining = target - time.perf_counter()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, POLL_INTERVAL))
+            self._collect()
+        self._next_frame = max(target, time.perf_counter() - interval) + interval
+        clock.tick()  # 只用于统计帧率
+
+    def latency_stats(self) -> Optional[Dict[str, float]]:
+        """
+        最近的输入到显示延迟统计（毫秒），还没有测量时返回 None
+        """
+        if not self.latencies:
+            return None
+        values = sorted(self.latencies)
+        count = len(values)
+        return {
+            "count": count,
+            "mean": sum(values) / count * 1000,
+            "p50": values[count // 2] * 1000,
+            "p95": values[min(count - 1, int(count * 0.95))] * 1000,
+            "max": values[-1] * 1000,
+        }
@@ -0,0 +1,237 @@
+import datetime
+import hashlib
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from typing import Iterator, Optional, Tuple
+
+# 默认缓存目录，可通过环境变量 FLAPPY_LEVEL_CACHE 覆盖
+DEFAULT_LEVEL_CACHE = os.path.join(os.path.expanduser("~"), ".flappybird", "levels")
+
+# 特殊管道类型
+PIPE_NORMAL = 0  # 普通管道
+PIPE_SPEED_UP = 1  # 加速管道
+PIPE_SPEED_DOWN = 2  # 减速管道
+
+NO_POWERUP = 0  # 本次生成机会没有道具，其余值为 PowerUpType 定义顺序的序号加1
+POWERUP_KINDS = 4  # 道具种类数
+
+LEVEL_LENGTH = 4096  # 每个关卡文件包含的管道数和道具生成机会数，用完后从头循环
+
+_MAGIC = b"FLVL"
+_VERSION = 1
+# 文件头：标识、版本、种子、管道数、道具生成机会数、生成参数（视口高度、窗口高度、管道间隙）
+_HEADER = struct.Struct("<4sHxxQIIHHH2x")
+
+
+def daily_seed(date: Optional[datetime.date] = None) -> int:
+    """
+    每日挑战的种子，同一天（UTC）在所有机器上相同
+
+    :param date: 日期，默认为今天
+    """
+    date = date or datetime.datetime.now(datetime.timezone.utc).date()
+    digest = hashlib.sha256(f"flappybird-daily-{date.isoformat()}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def parse_seed(value: Optional[str]) -> Optional[int]:
+    """
+    解析种子配置：空值表示不使用预生成关卡，"daily" 表示每日挑战，其余按整数解析
+    """
+    if not value:
+        return None
+    if value.strip().lower() == "daily":
+        return daily_seed()
+    return int(value) & 0xFFFFFFFFFFFFFFFF
+
+
+def generate_level(seed: int, viewport_height: float, window_height: int, pipe_gap: int,
+                   length: int = LEVEL_LENGTH) -> Tuple[array, array, array, array]:
+    """
+    按种子生成整个关卡，随机规则与 random_pipe_stream 和 random_powerup_stream 相同
+
+    :return: (间隙y坐标, 管道类型, 道具类型, 道具y坐标) 四个数组
+    """
+    # 管道和道具使用独立的随机数序列，互不影响
+    pipe_rng = random.Random(seed)
+    powerup_rng = random.Random(seed ^ 0x9E3779B97F4A7C15)
+
+    gap_limit = int(viewport_height * 0.6 - pipe_gap)
+    gap_offset = int(viewport_height * 0.2)
+    gaps = array("h", bytes(2 * length))
+    kinds = array("B", bytes(length))
+    for i in range(length):
+        gaps[i] = pipe_rng.randrange(0, gap_limit) + gap_offset
+        if pipe_rng.random() < 0.2:  # 20% 概率生成特殊管道
+            kinds[i] = pipe_rng.choice((PIPE_SPEED_UP, PIPE_SPEED_DOWN))
+
+    min_y = int(window_height * 0.2)
+    max_y = int(window_height * 0.7)
+    powerup_kinds = array("B", bytes(length))
+    powerup_ys = array("h", bytes(2 * length))
+    for i in range(length):
+        if powerup_rng.random() < 0.6:  # 60%概率生成道具
+            powerup_kinds[i] = powerup_rng.randrange(POWERUP_KINDS) + 1
+            powerup_ys[i] = powerup_rng.randint(min_y, max_y)
+    return gaps, kinds, powerup_kinds, powerup_ys
+
+
+def _write_level(path: str, seed: int, params: Tuple[int, int, int], data) -> None:
+    """把关卡写入文件，先写临时文件再改名，其他进程不会读到一半的文件"""
+    gaps, kinds, powerup_kinds, powerup_ys = data
+    if sys.byteorder != "little":  # 文件统一使用小端序
+        gaps, powerup_ys = array("h", gaps), array("h", powerup_ys)
+        gaps.byteswap()
+        powerup_ys.byteswap()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, seed, len(gaps), len(powerup_kinds), *params))
+        # 两字节的数组在前，保证内存映射后的切片对齐
+        gaps.tofile(f)
+        powerup_ys.tofile(f)
+        kinds.tofile(f)
+        powerup_kinds.tofile(f)
+    os.replace(tmp_path, path)
+
+
+class LevelStream:
+    """
+    预生成的关卡序列
+
+    同一种子和生成参数得到完全相同的管道和道具序列。关卡生成一次后保存在缓存目录中，
+    之后通过内存映射读取，每局开始只需创建新的迭代器，不需要重新生成。
+    """
+
+    def __init__(self, seed: int, viewport_height: float, window_height: int, pipe_gap: int = 120,
+                 cache_dir: Optional[str] = None, length: int = LEVEL_LENGTH) -> None:
+        """
+        :param seed: 关卡种子
+        :param viewport_height: 视口高度
+        :param window_height: 窗口高度
+        :param pipe_gap: 管道间隙
+        :param cache_dir: 缓存目录，默认为 ~/.flappybird/levels
+        :param length: 管道数和道具生成机会数
+        """
+        self.seed = seed
+        params = (int(viewport_height), int(window_height), int(pipe_gap))
+        cache_dir = cache_dir or os.environ.get("FLAPPY_LEVEL_CACHE", DEFAULT_LEVEL_CACHE)
+        self.path = os.path.join(cache_dir, f"{seed:016x}-{params[0]}-{params[1]}-{params[2]}-{length}.lvl")
+        self._mmap = None
+
+        try:
+            buffer = self._open(params)
+        except (OSError, ValueError):
+            buffer = None
+        if buffer is None:
+            data = generate_level(seed, viewport_height, window_height, pipe_gap, length)
+            try:
+                _write_level(self.path, seed, params, data)
+                buffer = self._open(params)
+            except (OSError, ValueError):
+                buffer = None
+            if buffer is None:  # 缓存目录不可写（如Web版本），直接使用内存中的数组
+                self.gaps, self.kinds, self.powerup_kinds, self.powerup_ys = (memoryview(a) for a in data)
+
+    def _open(self, params: Tuple[int, int, int]) -> Optional[memoryview]:
+        """内存映射缓存文件并切分出各个数组，文件不存在或不匹配时返回 None"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                buffer = memoryview(self._mmap)
+            except (OSError, ValueError, AttributeError):  # 不支持内存映射时整体读入
+                buffer = memoryview(f.read())
+        if len(buffer) < _HEADER.size:
+            return None
+        magic, version, seed, pipes, powerups, *file_params = _HEADER.unpack_from(buffer)
+        expected = _HEADER.size + pipes * 3 + powerups * 3
+        if (magic, version, seed, tuple(file_params)) != (_MAGIC, _VERSION, self.seed, params) \
+                or len(buffer) != expected or sys.byteorder != "little":
+            return None
+
+        offset = _HEADER.size
+        self.gaps = buffer[offset:offset + pipes * 2].cast("h")
+        offset += pipes * 2
+        self.powerup_ys = buffer[offset:offset + powerups * 2].cast("h")
+        offset += powerups * 2
+        self.kinds = buffer[offset:offset + pipes]
+        offset += pipes
+        self.powerup_kinds = buffer[offset:offset + powerups]
+        return buffer
+
+    def pipes(self, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+        按顺序惰性产出管道，用完后从头循环
+
+        :param start: 起始序号
+        :return: (间隙y坐标, 管道类型) 的迭代器
+        """
+        gaps, kinds = self.gaps, self.kinds
+        i = start % len(gaps)
+        while True:
+            yield gaps[i], kinds[i]
+            i += 1
+            if i == len(gaps):
+                i = 0
+
+    def powerups(self, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+        按顺序惰性产出每次道具生成机会的结果，用完后从头循环
+
+        :param start: 起始序号
+        :return: (道具类型, 道具y坐标) 的迭代器，类型为 NO_POWERUP 时不生成道具
+        """
+        kinds, ys = self.powerup_kinds, self.powerup_ys
+        i = start % len(kinds)
+        while True:
+            yield kinds[i], ys[i]
+            i += 1
+            if i == len(kinds):
+                i = 0
+
+
+def random_pipe_stream(viewport_height: float, pipe_gap: int) -> Iterator[Tuple[int, int]]:
+    """
+    不使用种子时的管道序列，每次从全局随机数生成器取值
+    """
+    while True:
+        gap_y = random.randrange(0, int(viewport_height * 0.6 - pipe_gap)) + int(viewport_height * 0.2)
+        kind = PIPE_NORMAL
+        if random.random() < 0.2:  # 20% 概率生成特殊管道
+            kind = random.choice((PIPE_SPEED_UP, PIPE_SPEED_DOWN))
+        yield gap_y, kind
+
+
+def random_powerup_stream(window_height: int, spawn_chance: float) -> Iterator[Tuple[int, int]]:
+    """
+    不使用种子时的道具序列，每次从全局随机数生成器取值
+    """
+    min_y = int(window_height * 0.2)
+    max_y = int(window_height * 0.7)
+    while True:
+        if random.random() < spawn_chance:
+            yield random.randrange(POWERUP_KINDS) + 1, random.randint(min_y, max_y)
+        else:
+            yield NO_POWERUP, 0
+
+
+def main() -> None:
+    """
+    预先生成关卡缓存：make levels SEEDS="daily 42"
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="预生成关卡缓存")
+    parser.add_argument("seeds", nargs="+", help='种子，或 "daily" 表示今天的每日挑战')
+    parser.add_argument("--cache-dir", default=None, help="缓存目录")
+    args = parser.parse_args()
+    for value in args.seeds:
+        # 与默认 288x512 窗口的生成参数一致
+        level = LevelStream(parse_seed(value), 512 * 0.79, 512, 120, cache_dir=args.cache_dir)
+        print(f"{value}: {level.path}")
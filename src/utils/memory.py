@@ -0,0 +1,201 @@
+"""
+内存诊断
+
+长时间无人值守运行（展台、浸泡测试）时跟踪内存增长。设置环境变量 FLAPPY_MEMORY=1（只在游戏结束
+界面显示）或 FLAPPY_MEMORY=<文件>（每局追加一行JSON）启用：tracemalloc 在每局结束时拍快照，与
+第一局结束时的基线和上一局比较，列出增长最多的代码行；同时统计各实体类的存活实例数、它们引用的
+表面数量和字节数、碰撞掩码等缓存的大小，以及进程的常驻内存（RSS）。
+"""
+import gc
+import json
+import os
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+_IGNORED = (  # 不计入增长的分配：诊断本身和导入机制
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> Optional[int]:
+    """进程当前的常驻内存；没有 /proc 的平台返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    """表面自身占用的像素内存；子表面与父表面共用像素，记为 0"""
+    if surface.get_parent() is not None:
+        return 0
+    return surface.get_pitch() * surface.get_height()
+
+
+def _surfaces(value, depth: int = 2):
+    """属性值中的表面：表面本身，或列表、元组、字典（键和值）中往下 depth 层的表面"""
+    if isinstance(value, pygame.Surface):
+        yield value
+    elif depth > 0 and isinstance(value, (list, tuple, dict)):
+        items = list(value.items()) if isinstance(value, dict) else value
+        for item in items:
+            yield from _surfaces(item, depth - 1)
+
+
+def _kb(size: int) -> str:
+    return f"{size / 1024:+.0f}KB"
+
+
+class MemoryMonitor:
+    """
+    每局结束时采样一次内存使用，报告相对基线（第一局结束时）和上一局的增长
+    """
+
+    def __init__(self, report_path: Optional[str] = None, frames: int = 1, top: int = 10,
+                 tracked: Tuple[type, ...] = (), caches: Optional[Dict[str, object]] = None) -> None:
+        """
+        :param report_path: 每局追加一行JSON的报告文件，None 时只保留最近的结果
+        :param frames: tracemalloc 记录的调用栈深度，越深开销越大
+        :param top: 报告中列出增长最多的代码行数
+        :param tracked: 统计存活实例和表面的基类（例如 Entity）
+        :param caches: 名称 -> 缓存对象（支持 len()，或 functools.lru_cache 包装的函数）
+        """
+        self.report_path = report_path
+        self.frames = frames
+        self.top = top
+        self.tracked = tracked
+        self.caches = caches or {}
+        self.round = 0
+        self.started = time.monotonic()
+        self._baseline: Optional[tracemalloc.Snapshot] = None  # 第一局结束时的快照
+        self._previous: Optional[tracemalloc.Snapshot] = None  # 上一局结束时的快照
+        self._baseline_sample: Optional[dict] = None
+        self.last: Optional[dict] = None  # 最近一次采样
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional["MemoryMonitor"]:
+        """
+        按环境变量 FLAPPY_MEMORY（1 或报告文件）和 FLAPPY_MEMORY_FRAMES（调用栈深度）创建，
+        未启用时返回 None
+        """
+        value = os.environ.get("FLAPPY_MEMORY", "")
+        if value.lower() in ("", "0", "off"):
+            return None
+        report_path = None if value.lower() in ("1", "on") else value
+        frames = int(os.environ.get("FLAPPY_MEMORY_FRAMES", "1"))
+        return cls(report_path, frames=frames, **kwargs)
+
+    def start(self) -> None:
+        """开始跟踪内存分配"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def _growth(self, snapshot: tracemalloc.Snapshot, reference: tracemalloc.Snapshot) -> List[dict]:
+        """与参考快照相比增长最多的代码行"""
+        growth = []
+        for stat in snapshot.compare_to(reference, "lineno")[:self.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            growth.append({
+                "where": f"{frame.filename}:{frame.lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size,
+            })
+        return growth
+
+    def _objects(self) -> Dict[str, dict]:
+        """各实体类的存活实例数，以及它们引用的表面数量和字节数（同一个表面在每个类中只计一次）"""
+        classes: Dict[str, dict] = {}
+        seen: Dict[str, set] = {}
+        for obj in gc.get_objects():
+            if not isinstance(obj, self.tracked):
+                continue
+            name = type(obj).__name__
+            entry = classes.setdefault(name, {"instances": 0, "surfaces": 0, "surface_bytes": 0})
+            entry["instances"] += 1
+            ids = seen.setdefault(name, set())
+            for value in vars(obj).values():
+                for surface in _surfaces(value):
+                    if id(surface) not in ids:
+                        ids.add(id(surface))
+                        entry["surfaces"] += 1
+                        entry["surface_bytes"] += surface_bytes(surface)
+        return classes
+
+    def _cache_sizes(self) -> Dict[str, int]:
+        sizes = {}
+        for name, cache in self.caches.items():
+            info = getattr(cache, "cache_info", None)
+            sizes[name] = info().currsize if info else len(cache)
+        return sizes
+
+    def round_end(self, **extra) -> dict:
+        """
+        一局结束时采样，写入报告
+
+        :param extra: 附加到本次记录中的字段（例如模式和得分）
+        :return: 本次记录
+        """
+        self.round += 1
+        gc.collect()  # 只统计真正存活的对象
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        sample = {
+            "round": self.round,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "uptime": round(time.monotonic() - self.started, 1),
+            "traced": current,
+            "traced_peak": peak,
+            "rss": rss_bytes(),
+            "gc_objects": len(gc.get_objects()),
+            "classes": self._objects(),
+            "caches": self._cache_sizes(),
+            **extra,
+        }
+        if self._baseline is None:
+            self._baseline, self._baseline_sample = snapshot, sample
+            sample["growth"] = []
+        else:
+            sample["growth"] = self._growth(snapshot, self._baseline)
+            sample["round_growth"] = self._growth(snapshot, self._previous)
+        sample["traced_delta"] = current - self._baseline_sample["traced"]
+        if sample["rss"] is not None and self._baseline_sample["rss"] is not None:
+            sample["rss_delta"] = sample["rss"] - self._baseline_sample["rss"]
+        self._previous = snapshot
+        self.last = sample
+
+        if self.report_path:
+            with open(self.report_path, "a") as f:
+                f.write(json.dumps(sample, sort_keys=True) + "\n")
+        return sample
+
+    def summary_lines(self) -> List[str]:
+        """最近一次采样的简短摘要，显示在游戏结束界面"""
+        sample = self.last
+        if sample is None:
+            return []
+        surfaces = sum(entry["surfaces"] for entry in sample["classes"].values())
+        surface_size = sum(entry["surface_bytes"] for entry in sample["classes"].values())
+        lines = [
+            f"Round {sample['round']}  heap {sample['traced'] / 1048576:.1f}MB ({_kb(sample['traced_delta'])})",
+            f"Surfaces {surfaces} / {surface_size / 1048576:.1f}MB",
+        ]
+        if sample["rss"] is not None:
+            lines.append(f"RSS {sample['rss'] / 1048576:.1f}MB ({_kb(sample.get('rss_delta', 0))})")
+        if sample["growth"]:
+            top = sample["growth"][0]
+            lines.append(f"{os.path.basename(top['where'])} {_kb(top['size_diff'])}")
+        return lines
@@ -0,0 +1,346 @@
+import sys
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .levels import LEVEL_LENGTH, LevelStream, parse_seed
+
+
+def _shift(row: int, offset: int) -> int:
+    """把位集中的每个y移动offset，越过顶部的状态停在顶部（与 clamp 一致）"""
+    if offset >= 0:
+        return row << offset
+    offset = -offset
+    return (row >> offset) | (1 if row & ((1 << offset) - 1) else 0)
+
+
+def _unshift(row: int, offset: int) -> int:
+    """_shift 的逆过程：返回移动offset后落在位集中的所有y"""
+    if offset >= 0:
+        return row >> offset
+    offset = -offset
+    # 停在顶部的状态可能来自顶部附近的任意位置
+    return (row << offset) | (((1 << (offset + 1)) - 1) if row & 1 else 0)
+
+
+class FlightModel:
+    """
+    离线分析使用的飞行和关卡几何参数
+
+    默认值与正常模式一致：NORMAL_PHYSICS（拍打速度-9、重力1、最大下落速度10）、
+    288x512 窗口、52像素宽的管道、管道间隙120、34x24 的小鸟。
+
+    y坐标用位集表示，第i位表示 y=min_y+i；每个速度对应一个位集。
+    """
+
+    def __init__(self, flap_acc: int = -9, acc_y: int = 1, max_vel_y: int = 10, min_vel_y: int = -8,
+                 y_scale: float = 1, pipe_vel_x: int = -5, pipe_gap: int = 120, pipe_w: int = 52,
+                 bird_w: int = 34, bird_h: int = 24, window_w: int = 288, window_h: int = 512,
+                 margin: int = 0) -> None:
+        """
+        :param flap_acc: 拍打后的速度
+        :param acc_y: 每帧的重力加速度，反向模式为负
+        :param max_vel_y: 最大下落速度
+        :param min_vel_y: 最大上升速度（重力为负时使用）
+        :param y_scale: 速度倍数（极速模式为2），每帧位移取整
+        :param pipe_vel_x: 管道水平速度（极速模式为-8）
+        :param pipe_gap: 管道间隙
+        :param margin: 碰撞判定的宽容像素（矩形判定比像素判定更严格，0为最保守，负数更严格）
+        """
+        self.flap_acc = flap_acc
+        self.acc_y = acc_y
+        self.max_vel_y = max_vel_y
+        self.min_vel_y = min_vel_y
+        self.y_scale = y_scale
+        self.pipe_vel_x = pipe_vel_x
+        self.pipe_gap = pipe_gap
+        self.pipe_w = pipe_w
+        self.bird_h = bird_h
+        self.margin = margin
+
+        # 以下与 Player、Pipes、Floor 中的计算方式一致
+        viewport_height = window_h * 0.79
+        self.bird_x = int(window_w * 0.2)
+        self.bird_w = bird_w
+        self.start_y = int((window_h - bird_h) / 2)
+        self.min_y = -2 * bird_h
+        self.floor_y = int(viewport_height - bird_h)  # 超过该值即碰到地面
+        self.window_w = window_w
+        self.window_h = window_h
+        self.spawn_x = window_w + 10  # 新管道的生成位置
+        self.spawn_before = window_w - pipe_w - pipe_w * 2.5  # 最后一根管道越过该位置时生成新管道
+        self.first_pipe_x = window_w + pipe_w * 3
+        self.second_pipe_x = self.first_pipe_x + pipe_w * 3.5
+        self.viewport_height = viewport_height
+        # 随机管道间隙上沿的取值范围（与 random_pipe_stream 一致）
+        gap_offset = int(viewport_height * 0.2)
+        self.gap_range = (gap_offset, gap_offset + int(viewport_height * 0.6 - pipe_gap) - 1)
+        self.low_edge = self.bird_x - pipe_w  # 管道x大于该值且小于小鸟右边缘时与小鸟重叠
+        self.high_edge = self.bird_x + bird_w
+
+        # 状态转移表：速度下标 i 对应速度 vel_lo+i
+        self.vel_lo = min(flap_acc, min_vel_y if acc_y < 0 else flap_acc)
+        vel_hi = max(flap_acc, max_vel_y if acc_y > 0 else flap_acc)
+        self.n_vels = vel_hi - self.vel_lo + 1
+        self.flap_idx = flap_acc - self.vel_lo
+        self.flap_offset = int(round(flap_acc * y_scale))
+        self.gravity = []  # 不拍打时 (速度下标, 下一帧速度下标, 位移)
+        for i in range(self.n_vels):
+            v = self.vel_lo + i
+            if acc_y > 0 and v < max_vel_y:
+                v = min(v + acc_y, max_vel_y)
+            elif acc_y < 0 and v > min_vel_y:
+                v = max(v + acc_y, min_vel_y)
+            self.gravity.append((i, v - self.vel_lo, int(round(v * y_scale))))
+        self.alive_mask = (1 << (self.floor_y - self.min_y + 1)) - 1  # 没有碰到地面的y坐标
+        # 向上拍打要求 y > min_y，向下拍打要求 y < max_y（超过地面的状态已经淘汰）
+        self.flap_mask = self.alive_mask & ~1 if flap_acc < 0 else self.alive_mask
+        self._gap_masks = {}
+
+    @property
+    def safe_span(self) -> int:
+        """小鸟在管道间隙中可取的y坐标个数"""
+        return self.pipe_gap - self.bird_h + 1 + 2 * self.margin
+
+    def gap_mask(self, gap: int) -> int:
+        """小鸟与间隙上沿为gap的管道重叠时可以存在的y坐标"""
+        mask = self._gap_masks.get(gap)
+        if mask is None:
+            lo = max(gap - self.margin - self.min_y, 0)
+            hi = gap + self.pipe_gap - self.bird_h + self.margin - self.min_y
+            mask = self._gap_masks[gap] = ((1 << (hi - lo + 1)) - 1) << lo if hi >= lo else 0
+        return mask
+
+    def frame_mask(self, pipes) -> int:
+        """
+        给定本帧（已移动后）的管道位置，返回小鸟可以存在的y坐标
+
+        :param pipes: (x, 间隙上沿y坐标) 序列
+        """
+        mask = self.alive_mask
+        for x, gap in pipes:
+            if self.low_edge < x < self.high_edge:
+                mask &= self.gap_mask(gap)
+        return mask
+
+    def step(self, rows: List[int], mask: int) -> List[int]:
+        """正向推进一帧：返回从 rows 出发、在 mask 中存活的所有状态"""
+        union = 0
+        for row in rows:
+            union |= row
+        new_rows = [0] * self.n_vels
+        new_rows[self.flap_idx] = _shift(union & self.flap_mask, self.flap_offset)
+        for i, ni, offset in self.gravity:
+            if rows[i]:
+                new_rows[ni] |= _shift(rows[i], offset)
+        return [row & mask for row in new_rows]
+
+    def step_back(self, viable: List[int], mask: int) -> List[int]:
+        """反向推进一帧：返回 mask 中、下一帧能进入 viable 的所有状态"""
+        flap_from = _unshift(viable[self.flap_idx], self.flap_offset) & self.flap_mask
+        return [(_unshift(viable[ni], offset) | flap_from) & mask for _, ni, offset in self.gravity]
+
+    def successors(self, y: int, vel: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """
+        单个状态的两个后继
+
+        :return: ((不拍打时的速度下标, y下标), (拍打时的速度下标, y下标))，y下标已按顶部截断
+        """
+        index = y - self.min_y
+        _, ni, offset = self.gravity[min(max(vel - self.vel_lo, 0), self.n_vels - 1)]
+        return (ni, max(index + offset, 0)), (self.flap_idx, max(index + self.flap_offset, 0))
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+def _viable_at_exit(m: FlightModel, segment_masks: List[int]) -> List[int]:
+    """
+    从当前帧反向推回上一根管道出口所在帧，得到之后能存活到当前帧的状态
+
+    :param segment_masks: 从上一根管道出口到当前帧每帧的可存在位置，最后一项为当前帧
+    """
+    # 能在当前帧存活的状态都视为可行
+    viable = [segment_masks[-1]] * m.n_vels
+    for frame_mask in reversed(segment_masks[:-1]):
+        viable = m.step_back(viable, frame_mask)
+    return m.step_back(viable, m.alive_mask)
+
+
+def _margin(exit_rows: List[int], viable: List[int]) -> float:
+    """
+    上一根管道出口处的可达状态中仍然可行的比例
+    """
+    reachable = ok = 0
+    for row, good in zip(exit_rows, viable):
+        if row:
+            reachable += _popcount(row)
+            ok += _popcount(row & good)
+    return ok / reachable
+
+
+class LevelReport:
+    """单个关卡的可达性分析结果"""
+
+    def __init__(self, seed: Optional[int], margins: List[float], near_threshold: float) -> None:
+        """
+        :param seed: 关卡种子
+        :param margins: 每根管道对应的比例：上一根管道出口（第一根为起点）的可达状态中能通过该管道的比例，0表示无解
+        :param near_threshold: 比例不超过该值的管道视为几乎不可能通过
+        """
+        self.seed = seed
+        self.margins = margins
+        self.unsolvable_at = margins.index(0) if 0 in margins else None  # 第一根无法通过的管道
+        self.near_impossible = [i for i, margin in enumerate(margins) if 0 < margin <= near_threshold]
+        # 每根管道的难度为可达状态中注定失败的比例
+        difficulties = [1 - margin for margin in margins] or [0.0]
+        self.hardest = max(difficulties)
+        self.difficulty = 1.0 if self.unsolvable_at is not None else sum(difficulties) / len(difficulties)
+
+    @property
+    def solvable(self) -> bool:
+        return self.unsolvable_at is None
+
+    def as_dict(self) -> dict:
+        return {
+            "seed": self.seed,
+            "pipes": len(self.margins),
+            "solvable": self.solvable,
+            "unsolvable_at": self.unsolvable_at,
+            "near_impossible": self.near_impossible,
+            "difficulty": round(self.difficulty, 4),
+            "hardest": round(self.hardest, 4),
+        }
+
+
+def analyze_gaps(gaps: Iterable[int], model: Optional[FlightModel] = None, near_threshold: float = 0.05,
+                 seed: Optional[int] = None) -> LevelReport:
+    """
+    对一串管道间隙做可达性分析
+
+    按帧正向推进所有可能的 (y, vel_y) 状态，得到每根管道出口处的可达集合；再从下一根管道出口
+    反向推回，得到其中仍能通过下一根管道的状态。两者之比越小，两根管道之间的操作要求越精确，
+    为0时正向可达集合在下一根管道处为空，即关卡无解。
+    每个速度对应一个Python整数位集，第i位表示 y=min_y+i，一帧的推进只需对每个速度做一次
+    移位和按位与，整个位集一次处理所有y坐标。物理规则与 Player.flap/tick_flight 一致，
+    y坐标按整数像素处理（忽略欢迎界面悬停留下的小数部分）。
+
+    :param gaps: 每根管道的间隙上沿y坐标（如 LevelStream.gaps）
+    :param model: 飞行参数，默认为正常模式
+    :param near_threshold: 比例不超过该值时标记为几乎不可能
+    :param seed: 关卡种子，仅用于报告
+    """
+    m = model or FlightModel()
+    gaps = iter(gaps)
+
+    # 管道：[x, 间隙y坐标]
+    pipes = []
+    for x in (m.first_pipe_x, m.second_pipe_x):
+        gap = next(gaps, None)
+        if gap is not None:
+            pipes.append([x, gap])
+    margins: List[float] = []
+
+    # 进入游戏时玩家状态等同于刚拍打过一次（set_mode 设置 vel_y=flap_acc）
+    rows = [0] * m.n_vels
+    rows[m.flap_idx] = 1 << (m.start_y - m.min_y)
+    exit_rows = rows  # 上一根管道出口处（第一根管道之前为起点）的可达状态
+    segment_masks = []  # 从上一根管道出口到现在每帧的可存在位置
+
+    while pipes:
+        # 与 Pipes.tick 相同：先生成和移除管道，再移动
+        if pipes[-1][0] < m.spawn_before:
+            gap = next(gaps, None)
+            if gap is not None:
+                pipes.append([m.spawn_x, gap])
+        if pipes[0][0] < -m.pipe_w:
+            pipes.pop(0)
+        for pipe in pipes:
+            pipe[0] += m.pipe_vel_x
+
+        # 本帧小鸟可以存在的位置，以及是否在下一帧离开某根管道
+        mask = m.frame_mask(pipes)
+        leaving = any(m.low_edge < x < m.high_edge and x + m.pipe_vel_x <= m.low_edge for x, _ in pipes)
+
+        # 正向推进一帧：拍打，或者按重力加速
+        rows = m.step(rows, mask)
+        segment_masks.append(mask)
+        if not any(rows):
+            margins.append(0.0)  # 无解
+            break
+        if not leaving:
+            continue
+
+        margins.append(_margin(exit_rows, _viable_at_exit(m, segment_masks)))
+        exit_rows = rows
+        segment_masks = []
+
+    return LevelReport(seed, margins, near_threshold)
+
+
+def analyze_level(seed: int, model: Optional[FlightModel] = None, pipes: int = LEVEL_LENGTH,
+                  near_threshold: float = 0.05, cache_dir: Optional[str] = None) -> LevelReport:
+    """
+    分析预生成关卡的前 pipes 根管道
+    """
+    m = model or FlightModel()
+    level = LevelStream(seed, m.viewport_height, m.window_h, m.pipe_gap, cache_dir=cache_dir)
+    return analyze_gaps(level.gaps[:pipes], m, near_threshold, seed)
+
+
+def _analyze_job(args) -> LevelReport:
+    return analyze_level(*args)
+
+
+def analyze_levels(seeds: Sequence[int], model: Optional[FlightModel] = None, pipes: int = LEVEL_LENGTH,
+                   near_threshold: float = 0.05, cache_dir: Optional[str] = None,
+                   workers: Optional[int] = None) -> List[LevelReport]:
+    """
+    批量分析关卡，多个关卡时分配到多个进程并行计算
+
+    :param workers: 进程数，默认为CPU核心数；为1时在当前进程中计算
+    """
+    jobs = [(seed, model, pipes, near_threshold, cache_dir) for seed in seeds]
+    if workers == 1 or len(jobs) <= 1 or sys.platform == "emscripten":
+        return [_analyze_job(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor  # 导入multiprocessing较慢，游戏内的自动玩家用不到
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_analyze_job, jobs))
+
+
+def main() -> None:
+    """
+    关卡可解性分析：make analyze SEEDS="daily 1 2 3"
+    """
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="关卡可解性和难度分析")
+    parser.add_argument("seeds", nargs="+", help='种子，或 "daily" 表示今天的每日挑战；"a-b" 表示一段种子')
+    parser.add_argument("--pipes", type=int, default=LEVEL_LENGTH, help="每个关卡分析的管道数")
+    parser.add_argument("--speed", action="store_true", help="按极速模式的速度分析")
+    parser.add_argument("--margin", type=int, default=0, help="碰撞判定的宽容像素")
+    parser.add_argument("--near", type=float, default=0.05, help="几乎不可能通过的可行状态比例阈值")
+    parser.add_argument("--workers", type=int, default=None, help="进程数")
+    parser.add_argument("--cache-dir", default=None, help="关卡缓存目录")
+    parser.add_argument("--json", action="store_true", help="每行输出一个JSON结果")
+    args = parser.parse_args()
+
+    seeds = []
+    for value in args.seeds:
+        if "-" in value[1:]:
+            start, end = value.split("-", 1)
+            seeds.extend(range(int(start), int(end) + 1))
+        else:
+            seeds.append(parse_seed(value))
+    model = FlightModel(y_scale=2, pipe_vel_x=-8, margin=args.margin) if args.speed \
+        else FlightModel(margin=args.margin)
+
+    reports = analyze_levels(seeds, model, args.pipes, args.near, args.cache_dir, args.workers)
+    for report in reports:
+        if args.json:
+            print(json.dumps(report.as_dict()))
+        else:
+            status = "ok" if report.solvable else f"unsolvable at pipe {report.unsolvable_at}"
+            print(f"{report.seed:>20}  difficulty {report.difficulty:.3f}  hardest {report.hardest:.3f}  "
+                  f"near-impossible {len(report.near_impossible):>4}  {status}")
@@ -0,0 +1,160 @@
+from bisect import insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pygame
+
+# 绘制层级，数值越大越靠上；与原先各实体的绘制顺序一致
+LAYER_BACKGROUND = 0  # 背景
+LAYER_FLOOR = 10  # 地面
+LAYER_PIPES = 20  # 管道
+LAYER_SCORE = 30  # 分数
+LAYER_PLAYER = 40  # 玩家
+LAYER_POWERUPS = 50  # 道具
+LAYER_EFFECTS = 60  # 粒子特效
+LAYER_OVERLAY = 70  # 全屏覆盖层（夜间模式等）
+LAYER_HUD = 80  # HUD
+LAYER_MESSAGE = 90  # 欢迎和游戏结束信息
+LAYER_DEBUG = 1000  # 调试信息
+
+STATIC_LAYERS = frozenset((LAYER_BACKGROUND,))  # 内容通常逐帧不变的层级，缩放输出时缓存
+
+
+class RenderQueue:
+    """
+    帧渲染队列
+
+    实体在一帧内把绘制请求提交到队列（提供与 pygame.Surface 相同的 blit/blits 接口），
+    去掉同一精灵在同一位置的重复绘制，帧末按层级顺序用一次 Surface.blits 输出。
+    """
+
+    def __init__(self, target: pygame.Surface) -> None:
+        """
+        :param target: 最终绘制的目标表面
+        """
+        self.target = target
+        self.layer = LAYER_BACKGROUND  # blit/blits 使用的当前层级
+        # 层级 -> 本帧该层的绘制 (精灵, 位置, 区域, 标志[, 角度, 透明度])；各层的列表每帧复用，
+        # 按层级顺序输出即为稳定排序的结果，不需要每帧排序和复制
+        self._layers: Dict[int, List[tuple]] = {}
+        self._order: List[int] = []  # 出现过的层级，从小到大
+        self._count = 0  # 本帧的绘制数
+        self._seen = set()  # 本帧已提交的 (精灵, 位置, 区域, 标志)
+        self.submitted = 0  # 本帧提交次数（含被去重的）
+        # 缩放输出（见 Display）需要知道哪些区域变了：开启后 flush 记录静态层的绘制和其余层覆盖的矩形
+        self.track_damage = False
+        self.static_items: Tuple[tuple, ...] = ()  # 上一次 flush 的静态层绘制 (精灵, x, y, 区域, 标志)
+        self.dirty: List[pygame.Rect] = []  # 上一次 flush 中非静态层绘制覆盖的矩形
+        # 目标支持带旋转和透明度的绘制（纹理后端）时为 True，此时可以使用 submit_transformed
+        self.transforms = False
+
+    def submit(self, source: pygame.Surface, dest, layer: Optional[int] = None,
+               area: Optional[pygame.Rect] = None, flags: int = 0) -> None:
+        """
+        提交一次绘制
+
+        :param source: 要绘制的表面
+        :param dest: 位置，坐标或矩形
+        :param layer: 层级，默认为当前层级
+        :param area: 源表面上的区域
+        :param flags: 混合标志
+        """
+        self.submitted += 1
+        key = (source, dest[0], dest[1], tuple(area) if area else None, flags)
+        if key in self._seen:
+            return  # 同一精灵在同一位置已经绘制过
+        self._seen.add(key)
+        self._bucket(self.layer if layer is None else layer).append((source, dest, area, flags))
+        self._count += 1
+
+    def submit_transformed(self, source: pygame.Surface, dest: pygame.Rect, angle: float = 0.0,
+                           alpha: Optional[int] = None, layer: Optional[int] = None) -> None:
+        """
+        提交一次由目标完成旋转和透明度的绘制，只在 transforms 为 True 时可用
+
+        :param source: 要绘制的表面（未旋转）
+        :param dest: 未旋转时的矩形，绕它的中心旋转
+        :param angle: 逆时针旋转的角度，与 pygame.transform.rotate 相同
+        :param alpha: 透明度，None 表示使用表面自身的透明度
+        :param layer: 层级，默认为当前层级
+        """
+        self.submitted += 1
+        key = (source, dest[0], dest[1], angle, alpha)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self._bucket(self.layer if layer is None else layer).append((source, dest, None, 0, angle, alpha))
+        self._count += 1
+
+    def _bucket(self, layer: int) -> List[tuple]:
+        """某个层级本帧的绘制列表"""
+        items = self._layers.get(layer)
+        if items is None:
+            items = self._layers[layer] = []
+            insort(self._order, layer)
+        return items
+
+    def changed(self, surface: pygame.Surface) -> None:
+        """
+        表面的内容被原地修改过；纹理后端据此重新上传纹理，直接绘制到表面时不需要
+        """
+        notify = getattr(self.target, "changed", None)
+        if notify is not None:
+            notify(surface)
+
+    def blit(self, source: pygame.Surface, dest, area: Optional[pygame.Rect] = None,
+             special_flags: int = 0) -> None:
+        """
+        与 Surface.blit 兼容的接口，提交到当前层级
+        """
+        self.submit(source, dest, None, area, special_flags)
+
+    def blits(self, blit_sequence: Iterable[tuple], doreturn: bool = True) -> None:
+        """
+        与 Surface.blits 兼容的接口，提交到当前层级
+        """
+        for item in blit_sequence:
+            self.submit(item[0], item[1], None, *item[2:])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self) -> Iterator[tuple]:
+        """按层级顺序（同层保持提交顺序）产出本帧的绘制 (精灵, 位置, 区域, 标志[, 角度, 透明度])"""
+        layers = self._layers
+        for layer in self._order:
+            yield from layers[layer]
+
+    def clear(self) -> None:
+        """丢弃本帧所有绘制请求"""
+        if self._count:
+            for items in self._layers.values():
+                items.clear()
+            self._count = 0
+        self._seen.clear()
+        self.submitted = 0
+
+    def flush(self) -> None:
+        """
+        按层级顺序把本帧所有绘制请求输出到目标表面
+        """
+        if self._count:
+            if self.track_damage:
+                self._record_damage()
+            self.target.blits(self.items(), False)
+        elif self.track_damage:
+            self.static_items, self.dirty = (), []
+        self.clear()
+
+    def _record_damage(self) -> None:
+        """记录本帧静态层的绘制，以及其余层绘制覆盖的矩形（按像素取整向外扩1像素）"""
+        static_items = []
+        dirty = []
+        for layer in self._order:
+            for source, dest, area, flags in self._layers[layer]:
+                if layer in STATIC_LAYERS:
+                    static_items.append((source, dest[0], dest[1], tuple(area) if area else None, flags))
+                else:
+                    w, h = (area[2], area[3]) if area else source.get_size()
+                    dirty.append(pygame.Rect(int(dest[0]) - 1, int(dest[1]) - 1, w + 2, h + 2))
+        self.static_items = tuple(static_items)
+        self.dirty = dirty
@@ -0,0 +1,185 @@
+"""
+SDL2 渲染器后端
+
+设置 FLAPPY_RENDERER=texture 时使用 pygame._sdl2.video 的 Renderer/Texture 输出画面：每个表面
+第一次绘制时上传为纹理并缓存（图集的精灵共用整张图集的纹理），旋转、透明度和缩放到窗口都由
+渲染器完成，不再逐帧调用 pygame.transform。SDL_RENDER_DRIVER=software 时使用SDL的软件渲染器，
+没有GPU的机器上也能运行。
+"""
+import weakref
+from typing import Iterable, Optional, Tuple
+
+import pygame
+
+from .render_queue import RenderQueue
+from .window import Window
+
+try:
+    from pygame._sdl2 import video
+except ImportError:  # 没有SDL2的pygame
+    video = None
+
+# SDL 混合模式的枚举值
+_BLENDFACTOR_ONE = 2
+_BLENDFACTOR_ONE_MINUS_SRC_ALPHA = 6
+_BLENDOPERATION_ADD = 1
+
+
+class TextureCanvas:
+    """
+    纹理画布：渲染队列的绘制目标，提供与 pygame.Surface 相同的 blit/blits 接口
+
+    blits 由渲染队列每帧调用一次，给出整帧的绘制；blit 在当前帧上追加绘制（例如暂停提示）。
+    画面在 present 时才真正绘制，最近一帧的绘制保留下来，只追加内容时也能完整重画。
+    """
+
+    def __init__(self, renderer, size: Tuple[int, int]) -> None:
+        """
+        :param renderer: pygame._sdl2.video.Renderer
+        :param size: 逻辑尺寸
+        """
+        self.renderer = renderer
+        self.size = size
+        self._textures = weakref.WeakKeyDictionary()  # 表面 -> 纹理，表面被释放时纹理随之释放
+        self._frame = []  # 当前帧的绘制 (表面, 位置, 区域, 标志[, 角度, 透明度])
+        self._premultiplied = None  # 预乘透明度的混合模式，渲染器不支持时为 0
+        self.uploads = 0  # 上传纹理的次数
+
+    def get_size(self) -> Tuple[int, int]:
+        return self.size
+
+    def get_width(self) -> int:
+        return self.size[0]
+
+    def get_height(self) -> int:
+        return self.size[1]
+
+    def get_rect(self, **kwargs) -> pygame.Rect:
+        rect = pygame.Rect((0, 0), self.size)
+        for name, value in kwargs.items():
+            setattr(rect, name, value)
+        return rect
+
+    def blit(self, source: pygame.Surface, dest, area: Optional[pygame.Rect] = None,
+             special_flags: int = 0) -> None:
+        """在当前帧上追加一次绘制"""
+        self._frame.append((source, dest, area, special_flags))
+
+    def blits(self, blit_sequence: Iterable[tuple], doreturn: bool = True) -> None:
+        """开始新的一帧"""
+        self._frame = list(blit_sequence)
+
+    def changed(self, surface: pygame.Surface) -> None:
+        """表面的内容被原地修改过，重新上传它的纹理"""
+        texture = self._textures.get(surface)
+        if texture is not None:
+            texture.update(surface)
+            self.uploads += 1
+
+    def _texture(self, source: pygame.Surface):
+        """
+        表面对应的纹理和它在纹理中的偏移；子表面（如图集中的精灵）使用父表面的纹理
+        """
+        parent = source.get_parent()
+        if parent is not None and source.get_alpha() == parent.get_alpha():
+            texture, (x, y) = self._texture(parent)
+            dx, dy = source.get_offset()
+            return texture, (x + dx, y + dy)
+        texture = self._textures.get(source)
+        if texture is None:
+            texture = video.Texture.from_surface(self.renderer, source)
+            self._textures[source] = texture
+            self.uploads += 1
+        return texture, (0, 0)
+
+    def _set_premultiplied(self, texture) -> Optional[int]:
+        """
+        把纹理切换为预乘透明度的混合模式，返回原来的混合模式；软件渲染器等不支持自定义混合模式
+        时不切换，返回 None（预乘的像素按普通混合绘制，只有半透明像素略暗）
+        """
+        if self._premultiplied == 0:
+            return None
+        previous = texture.blend_mode
+        try:
+            if self._premultiplied is None:
+                # (源系数, 目标系数, 运算)：SDL_BLENDFACTOR_ONE, SDL_BLENDFACTOR_ONE_MINUS_SRC_ALPHA, SDL_BLENDOPERATION_ADD
+                mode = (_BLENDFACTOR_ONE, _BLENDFACTOR_ONE_MINUS_SRC_ALPHA, _BLENDOPERATION_ADD)
+                self._premultiplied = video.Renderer.compose_custom_blend_mode(mode, mode)
+            texture.blend_mode = self._premultiplied
+        except (pygame.error, RuntimeError, AttributeError):  # pygame._sdl2 的错误类型继承自 RuntimeError
+            self._premultiplied = 0
+            return None
+        return previous
+
+    def draw(self) -> None:
+        """按顺序绘制当前帧"""
+        for item in self._frame:
+            source, dest, area, flags = item[:4]
+            texture, (ox, oy) = self._texture(source)
+            if area:
+                srcrect = pygame.Rect(area).move(ox, oy)
+                w, h = area[2], area[3]
+            else:
+                w, h = source.get_size()
+                srcrect = pygame.Rect(ox, oy, w, h)
+            dstrect = pygame.Rect(int(dest[0]), int(dest[1]), w, h)
+
+            blend_mode = self._set_premultiplied(texture) if flags == pygame.BLEND_PREMULTIPLIED else None
+            if len(item) > 4:  # 带变换的绘制：角度（pygame.transform.rotate 的方向）和透明度
+                angle, alpha = item[4], item[5]
+                if alpha is None:
+                    texture.draw(srcrect, dstrect, -angle)
+                else:
+                    previous, texture.alpha = texture.alpha, alpha
+                    texture.draw(srcrect, dstrect, -angle)
+                    texture.alpha = previous
+            else:
+                texture.draw(srcrect, dstrect)
+            if blend_mode is not None:
+                texture.blend_mode = blend_mode
+
+
+class TextureDisplay:
+    """
+    使用SDL2渲染器的显示输出，接口与 Display 相同
+
+    pygame 的显示模块只保留一个隐藏的 1x1 窗口，供 convert/convert_alpha 使用；画面输出到
+    单独的 SDL 窗口，渲染器按逻辑尺寸缩放并留黑边。
+    """
+
+    scaled = False  # 渲染队列不需要记录变化的区域
+
+    def __init__(self, window: Window, size: Optional[Tuple[int, int]] = None, fullscreen: bool = False) -> None:
+        """
+        :param window: 逻辑尺寸
+        :param size: 窗口尺寸，默认为逻辑尺寸
+        :param fullscreen: 是否全屏（桌面分辨率）
+        :raises RuntimeError: pygame 没有 _sdl2 模块
+        """
+        if video is None:
+            raise RuntimeError("FLAPPY_RENDERER=texture 需要支持 pygame._sdl2 的 pygame")
+        self.logical_size = (window.width, window.height)
+        title = pygame.display.get_caption()[0] if pygame.display.get_caption() else ""
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        self.window = video.Window(title, size or self.logical_size)
+        if fullscreen:
+            self.window.set_fullscreen(True)
+        self.renderer = video.Renderer(self.window)
+        self.renderer.logical_size = self.logical_size
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.target = TextureCanvas(self.renderer, self.logical_size)
+        self.viewport = pygame.Rect((0, 0), self.logical_size)
+
+    def bind(self, queue: RenderQueue) -> None:
+        """旋转和透明度交给渲染器"""
+        queue.transforms = True
+
+    def present(self, queue: Optional[RenderQueue] = None) -> None:
+        """
+        绘制当前帧并显示
+
+        :param queue: 未使用，接口与 Display 相同
+        """
+        self.renderer.clear()
+        self.target.draw()
+        self.renderer.present()
@@ -0,0 +1,125 @@
+import heapq
+from itertools import count
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+# 效果再次激活时的规则
+REFRESH = "refresh"  # 重新计时
+STACK = "stack"  # 剩余时间累加
+KEEP = "keep"  # 保持原到期时间
+
+
+class EffectScheduler:
+    """
+    限时效果调度器
+
+    效果按到期时间保存在最小堆中，每次推进时间只需查看堆顶，没有效果到期时开销为O(1)。
+    apply/expire 回调在效果开始和结束时各调用一次。调度器使用自己的游戏时间，
+    只随 advance 传入的帧间隔前进，暂停期间效果不会过期。
+    """
+
+    def __init__(self, on_apply: Optional[Callable[[Hashable], None]] = None,
+                 on_expire: Optional[Callable[[Hashable], None]] = None) -> None:
+        """
+        :param on_apply: 效果开始时的回调
+        :param on_expire: 效果结束时的回调
+        """
+        self.on_apply = on_apply
+        self.on_expire = on_expire
+        self.now = 0  # 游戏时间（毫秒）
+        self.paused = False
+        self._heap = []  # (到期时间, 序号, 效果)，重新计时后旧条目会失效
+        self._expiry: Dict[Hashable, int] = {}  # 激活中的效果 -> 到期时间
+        self._seq = count()
+
+    def advance(self, delta_ms: int) -> None:
+        """
+        推进游戏时间并触发到期的效果
+
+        :param delta_ms: 帧间隔（毫秒）
+        """
+        if self.paused:
+            return
+        self.now += delta_ms
+        heap = self._heap
+        while heap and heap[0][0] <= self.now:
+            expires_at, _, effect = heapq.heappop(heap)
+            if self._expiry.get(effect) == expires_at:  # 跳过已失效的旧条目
+                del self._expiry[effect]
+                if self.on_expire:
+                    self.on_expire(effect)
+
+    def activate(self, effect: Hashable, duration: int, rule: str = REFRESH,
+                 replaces: Iterable[Hashable] = ()) -> None:
+        """
+        激活效果
+
+        :param effect: 效果
+        :param duration: 持续时间（毫秒）
+        :param rule: 效果已激活时的规则，REFRESH、STACK 或 KEEP
+        :param replaces: 与该效果互斥、需要先结束的效果
+        """
+        for other in replaces:
+            if other != effect:
+                self.cancel(other)
+
+        current = self._expiry.get(effect)
+        if current is None:
+            expires_at = self.now + duration
+        elif rule == STACK:
+            expires_at = current + duration
+        elif rule == KEEP:
+            return
+        else:
+            expires_at = self.now + duration
+
+        self._expiry[effect] = expires_at
+        heapq.heappush(self._heap, (expires_at, next(self._seq), effect))
+        if len(self._heap) > 2 * len(self._expiry) + 16:
+            self._compact()
+        if current is None and self.on_apply:
+            self.on_apply(effect)
+
+    def cancel(self, effect: Hashable) -> None:
+        """
+        立即结束效果（会触发 on_expire）
+        """
+        if self._expiry.pop(effect, None) is not None and self.on_expire:
+            self.on_expire(effect)
+
+    def clear(self) -> None:
+        """
+        移除所有效果，不触发回调
+        """
+        self._heap.clear()
+        self._expiry.clear()
+
+    def _compact(self) -> None:
+        """重建堆，去掉失效的旧条目"""
+        self._heap = [entry for entry in self._heap if self._expiry.get(entry[2]) == entry[0]]
+        heapq.heapify(self._heap)
+
+    def pause(self) -> None:
+        """暂停计时"""
+        self.paused = True
+
+    def resume(self) -> None:
+        """恢复计时"""
+        self.paused = False
+
+    def is_active(self, effect: Hashable) -> bool:
+        """效果是否激活"""
+        return effect in self._expiry
+
+    def remaining(self, effect: Hashable) -> Optional[int]:
+        """
+        获取效果剩余时间
+
+        :return: 剩余毫秒数，效果未激活时为 None
+        """
+        expires_at = self._expiry.get(effect)
+        if expires_at is None:
+            return None
+        return max(0, expires_at - self.now)
+
+    def __len__(self) -> int:
+        return len(self._expiry)
@@ -1,26 +1,182 @@
+import os
 import sys
+import time
+from typing import Dict, List, Optional
 
 import pygame
 
+from ..startup import timeline
+
+# 默认的解码缓存目录，可通过环境变量 FLAPPY_AUDIO_CACHE 覆盖
+DEFAULT_AUDIO_CACHE = os.path.join(os.path.expanduser("~"), ".flappybird", "audio")
+
+# 音效分组：每组使用预留的声道，组内声道用完时打断最早开始的声音，不会占满整个混音器
+CHANNEL_GROUPS = {
+    "player": (("wing",), 2),  # 拍打
+    "score": (("point",), 2),  # 得分、道具、摧毁管道
+    "crash": (("hit", "die"), 2),  # 撞击和死亡
+    "ui": (("swoosh",), 1),  # 界面切换
+}
+
+# 同一音效两次播放之间的最短间隔（秒），更密集的请求被丢弃
+MIN_INTERVALS = {
+    "wing": 0.05,
+    "point": 0.03,
+}
+
+
+def audio_extension() -> str:
+    """
+    按平台选择音频格式：Web版本（pygbag）使用专门转码的ogg，Windows使用wav，其他平台使用ogg
+    """
+    if sys.platform == "emscripten":
+        return "-pygbag.ogg"
+    if sys.platform in ("win32", "cygwin"):  # 注意 "darwin" 也包含 "win"
+        return ".wav"
+    return ".ogg"
+
+
+class SoundEffect:
+    """
+    单个音效，play() 经由 Sounds 统一调度
+    """
+
+    def __init__(self, sounds: "Sounds", name: str, sound: Optional[pygame.mixer.Sound]) -> None:
+        """
+        :param sounds: 所属的音频管理器
+        :param name: 音效名
+        :param sound: 解码后的声音，空后端时为 None
+        """
+        self.sounds = sounds
+        self.name = name
+        self.sound = sound
+
+    def play(self) -> bool:
+        """播放音效，返回是否真正播放（被限流、去重或空后端时为 False）"""
+        return self.sounds.play(self.name)
+
 
 class Sounds:
-    die: pygame.mixer.Sound  # 死亡音效
-    hit: pygame.mixer.Sound  # 撞击音效
-    point: pygame.mixer.Sound  # 得分音效
-    swoosh: pygame.mixer.Sound  # 翅膀音效
-    wing: pygame.mixer.Sound  # 拍打音效
+    """
+    音频管理器
+
+    音效按类别分配预留声道，播放前做同帧去重和按音效限流。音效第一次加载后把解码得到的
+    PCM数据保存在缓存目录中，之后直接从PCM创建，不再解码ogg。混音器和音效在第一次播放或
+    preload() 时才初始化和加载，不占用启动时间。没有可用的混音器、SDL使用dummy音频驱动
+    或设置 FLAPPY_AUDIO=off 时使用空后端，所有播放都是空操作。
+    """
 
-    def __init__(self) -> None:
+    die: SoundEffect  # 死亡音效
+    hit: SoundEffect  # 撞击音效
+    point: SoundEffect  # 得分音效
+    swoosh: SoundEffect  # 界面切换音效
+    wing: SoundEffect  # 拍打音效
+
+    def __init__(self, enabled: Optional[bool] = None, cache_dir: Optional[str] = None) -> None:
         """
         初始化音效
+
+        :param enabled: 是否使用混音器，默认按环境自动判断
+        :param cache_dir: PCM缓存目录，默认为 ~/.flappybird/audio
         """
-        if "win" in sys.platform:
-            ext = "wav"  # Windows平台使用wav格式
-        else:
-            ext = "ogg"  # 其他平台使用ogg格式
-
-        self.die = pygame.mixer.Sound(f"assets/audio/die.{ext}")  # 加载死亡音效
-        self.hit = pygame.mixer.Sound(f"assets/audio/hit.{ext}")  # 加载撞击音效
-        self.point = pygame.mixer.Sound(f"assets/audio/point.{ext}")  # 加载得分音效
-        self.swoosh = pygame.mixer.Sound(f"assets/audio/swoosh.{ext}")  # 加载翅膀音效
-        self.wing = pygame.mixer.Sound(f"assets/audio/wing.{ext}")  # 加载拍打音效
+        if enabled is None:
+            enabled = os.environ.get("FLAPPY_AUDIO", "").lower() not in ("0", "off", "null") \
+                and os.environ.get("SDL_AUDIODRIVER") != "dummy"
+        self.enabled = enabled
+        self._loaded = False  # 混音器和音效在第一次播放或 preload 时才初始化和加载
+        self.cache_dir = cache_dir or os.environ.get("FLAPPY_AUDIO_CACHE", DEFAULT_AUDIO_CACHE)
+
+        self._groups: Dict[str, List[pygame.mixer.Channel]] = {}  # 类别 -> 预留声道
+        self._group_of: Dict[str, str] = {}  # 音效名 -> 类别
+        self._started: Dict[pygame.mixer.Channel, float] = {}  # 声道 -> 当前声音的开始时间
+        self._last_played: Dict[str, float] = {}  # 音效名 -> 上次播放时间
+        self._frame_played = set()  # 本帧已播放的音效
+        self.played = 0  # 播放次数
+        self.dropped = 0  # 被限流或去重丢弃的次数
+
+        for group, (group_names, _) in CHANNEL_GROUPS.items():
+            for name in group_names:
+                self._group_of[name] = group
+                setattr(self, name, SoundEffect(self, name, None))
+
+    def preload(self) -> None:
+        """初始化混音器、预留声道并加载所有音效；重复调用不做任何事"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.enabled and not pygame.mixer.get_init():
+            try:
+                pygame.mixer.init()
+            except pygame.error:  # 没有音频设备
+                self.enabled = False
+        if not self.enabled:
+            return
+        self._reserve_channels()
+        ext = audio_extension()
+        for name in self._group_of:
+            getattr(self, name).sound = self._load(name, f"assets/audio/{name}{ext}")
+
+    def _reserve_channels(self) -> None:
+        """为每个类别预留声道，自动分配的 Sound.play 不会占用这些声道"""
+        total = sum(count for _, count in CHANNEL_GROUPS.values())
+        if pygame.mixer.get_num_channels() < total + 4:
+            pygame.mixer.set_num_channels(total + 4)
+        pygame.mixer.set_reserved(total)
+        index = 0
+        for group, (_, count) in CHANNEL_GROUPS.items():
+            self._groups[group] = [pygame.mixer.Channel(index + i) for i in range(count)]
+            index += count
+
+    def _load(self, name: str, path: str) -> pygame.mixer.Sound:
+        """从PCM缓存创建声音，缓存不存在时解码音频文件并写入缓存"""
+        frequency, size, channels = pygame.mixer.get_init()
+        cache_path = os.path.join(self.cache_dir, f"{name}-{frequency}-{size}-{channels}.pcm")
+        try:
+            if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+                with open(cache_path, "rb") as f:
+                    return pygame.mixer.Sound(buffer=f.read())
+        except OSError:
+            pass
+        started = time.perf_counter()
+        sound = pygame.mixer.Sound(path)
+        timeline.asset(path, time.perf_counter() - started)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(sound.get_raw())
+            os.replace(tmp_path, cache_path)
+        except OSError:  # 缓存目录不可写时每次解码
+            pass
+        return sound
+
+    def play(self, name: str) -> bool:
+        """
+        播放音效：同一帧内重复的请求和间隔小于 MIN_INTERVALS 的请求被丢弃
+
+        :param name: 音效名
+        :return: 是否真正播放
+        """
+        now = time.perf_counter()
+        if name in self._frame_played or now - self._last_played.get(name, float("-inf")) < MIN_INTERVALS.get(name, 0):
+            self.dropped += 1
+            return False
+        self._frame_played.add(name)
+        self._last_played[name] = now
+        if not self._loaded:
+            self.preload()
+        if not self.enabled:
+            return False
+
+        channels = self._groups[self._group_of[name]]
+        channel = next((c for c in channels if not c.get_busy()), None)
+        if channel is None:  # 组内声道都在播放，打断最早开始的
+            channel = min(channels, key=lambda c: self._started.get(c, 0.0))
+        channel.play(getattr(self, name).sound)
+        self._started[channel] = now
+        self.played += 1
+        return True
+
+    def begin_frame(self) -> None:
+        """新的一帧开始，清空同帧去重记录"""
+        self._frame_played.clear()
@@ -0,0 +1,321 @@
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import sqlite3
+except ImportError:  # 部分Web构建没有sqlite3
+    sqlite3 = None
+
+# 默认数据库位置，可通过环境变量 FLAPPY_STATS_DB 覆盖
+DEFAULT_STATS_PATH = os.path.join(os.path.expanduser("~"), ".flappybird", "stats.db")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        mode TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        duration_ms INTEGER NOT NULL DEFAULT 0,
+        played_at REAL NOT NULL,
+        source TEXT NOT NULL DEFAULT 'player'
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_runs_mode_source_score ON runs (mode, source, score DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_mode_played ON runs (mode, played_at DESC)",
+    # 分数直方图：排名和百分位只需扫描不同分数的个数，而不是全部记录
+    """
+    CREATE TABLE IF NOT EXISTS score_counts (
+        mode TEXT NOT NULL,
+        source TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (mode, source, score)
+    ) WITHOUT ROWID
+    """,
+    # 每种模式和来源的汇总数据
+    """
+    CREATE TABLE IF NOT EXISTS mode_totals (
+        mode TEXT NOT NULL,
+        source TEXT NOT NULL,
+        runs INTEGER NOT NULL,
+        total_score INTEGER NOT NULL,
+        total_ms INTEGER NOT NULL,
+        best INTEGER NOT NULL,
+        PRIMARY KEY (mode, source)
+    )
+    """,
+)
+
+# 数据库结构版本（PRAGMA user_version）。版本1起直方图和汇总按来源（玩家、自动游戏、机器人）分开，
+# 玩家的最高分和排名不包含自动游戏的成绩
+_SCHEMA_VERSION = 1
+# 从版本0升级：删除不分来源的直方图和汇总，建表后从 runs 重新计算
+_MIGRATE_DROP = (
+    "DROP INDEX IF EXISTS idx_runs_mode_score",
+    "DROP TABLE IF EXISTS score_counts",
+    "DROP TABLE IF EXISTS mode_totals",
+)
+_MIGRATE_FILL = (
+    "INSERT INTO score_counts (mode, source, score, count) "
+    "SELECT mode, source, score, COUNT(*) FROM runs GROUP BY mode, source, score",
+    "INSERT INTO mode_totals (mode, source, runs, total_score, total_ms, best) "
+    "SELECT mode, source, COUNT(*), SUM(score), SUM(duration_ms), MAX(score) FROM runs GROUP BY mode, source",
+)
+
+# 固定的SQL语句，sqlite3 模块会缓存其预编译结果
+_INSERT_RUN = "INSERT INTO runs (mode, score, duration_ms, played_at, source) VALUES (?, ?, ?, ?, ?)"
+_UPSERT_COUNT = (
+    "INSERT INTO score_counts (mode, source, score, count) VALUES (?, ?, ?, 1) "
+    "ON CONFLICT (mode, source, score) DO UPDATE SET count = count + 1"
+)
+_UPSERT_TOTALS = (
+    "INSERT INTO mode_totals (mode, source, runs, total_score, total_ms, best) VALUES (?, ?, 1, ?, ?, ?) "
+    "ON CONFLICT (mode, source) DO UPDATE SET runs = runs + 1, total_score = total_score + excluded.total_score, "
+    "total_ms = total_ms + excluded.total_ms, best = MAX(best, excluded.best)"
+)
+_SELECT_BEST = "SELECT best FROM mode_totals WHERE mode = ? AND source = ?"
+_SELECT_TOTALS = "SELECT runs, total_score, total_ms, best FROM mode_totals WHERE mode = ? AND source = ?"
+_SELECT_ABOVE = "SELECT COALESCE(SUM(count), 0) FROM score_counts WHERE mode = ? AND source = ? AND score > ?"
+_SELECT_BELOW = "SELECT COALESCE(SUM(count), 0) FROM score_counts WHERE mode = ? AND source = ? AND score < ?"
+_SELECT_TOP = (
+    "SELECT id, score, duration_ms, played_at, source FROM runs WHERE mode = ? AND source = ? "
+    "ORDER BY score DESC LIMIT ?"
+)
+_SELECT_HISTORY = (
+    "SELECT id, score, duration_ms, played_at, source FROM runs WHERE mode = ? "
+    "ORDER BY played_at DESC LIMIT ?"
+)
+
+RunRow = Tuple[int, int, int, float, str]  # (id, score, duration_ms, played_at, source)
+
+
+class StatsStore:
+    """
+    本地最高分和统计数据存储（SQLite + WAL）
+
+    写入通过后台线程批量提交（write-behind），游戏循环中调用 record 不会阻塞帧。
+    查询使用独立的只读连接，排名和百分位基于分数直方图，记录数再多也不会变慢。
+    最高分、排名等查询按记录来源分开，默认只统计玩家自己的成绩。
+    """
+
+    def __init__(self, path: Optional[str] = None, write_behind: Optional[bool] = None) -> None:
+        """
+        打开或创建统计数据库
+
+        :param path: 数据库文件路径，默认为 ~/.flappybird/stats.db
+        :param write_behind: 是否使用后台线程写入，默认在支持线程的平台上开启
+        """
+        self.path = path or os.environ.get("FLAPPY_STATS_DB", DEFAULT_STATS_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if write_behind is None:
+            write_behind = sys.platform != "emscripten"  # Web版本没有线程
+        # 内存数据库无法跨连接共享，只能同步写入
+        self.write_behind = write_behind and self.path != ":memory:"
+
+        self._writer = self._connect()
+        with self._writer:
+            version = self._writer.execute("PRAGMA user_version").fetchone()[0]
+            if version < _SCHEMA_VERSION:
+                for statement in _MIGRATE_DROP:
+                    self._writer.execute(statement)
+            for statement in _SCHEMA:
+                self._writer.execute(statement)
+            if version < _SCHEMA_VERSION:
+                for statement in _MIGRATE_FILL:
+                    self._writer.execute(statement)
+                self._writer.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._reader = self._writer if not self.write_behind else self._connect()
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._write_failed = False  # 已报告过写入失败，之后的失败不再重复输出
+        self._thread = None
+        if self.write_behind:
+            # 写连接交由后台线程独占使用
+            self._thread = threading.Thread(target=self._write_loop, name="stats-writer", daemon=True)
+            self._thread.start()
+
+    def _connect(self) -> "sqlite3.Connection":
+        """创建连接并开启WAL"""
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=32)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, mode: str, score: int, duration_ms: int = 0, source: str = "player") -> None:
+        """
+        记录一局游戏结果（非阻塞）
+
+        :param mode: 游戏模式名称
+        :param score: 得分
+        :param duration_ms: 本局时长（毫秒）
+        :param source: 记录来源，如 player、autoplay、bot
+        """
+        self.record_many([(mode, score, duration_ms, time.time(), source)])
+
+    def record_many(self, rows: Iterable[Tuple[str, int, int, float, str]]) -> None:
+        """
+        批量记录游戏结果，供机器人批量评测使用
+
+        :param rows: (mode, score, duration_ms, played_at, source) 元组序列
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        if self.write_behind:
+            self._queue.put(rows)
+        else:
+            self._commit(rows)
+
+    def _commit(self, rows: List[Tuple[str, int, int, float, str]]) -> None:
+        """在一个事务中写入记录并更新直方图和汇总"""
+        with self._writer:
+            self._writer.executemany(_INSERT_RUN, rows)
+            self._writer.executemany(_UPSERT_COUNT, ((row[0], row[4], row[1]) for row in rows))
+            self._writer.executemany(_UPSERT_TOTALS, ((row[0], row[4], row[1], row[2], row[1]) for row in rows))
+
+    def _write_loop(self) -> None:
+        """后台写入线程：合并队列中积压的记录后一次提交"""
+        stop = False
+        while not stop:
+            stop = self._flush_batch(self._queue.get())
+
+    def _flush_batch(self, batch: Optional[List[Tuple[str, int, int, float, str]]]) -> bool:
+        """
+        合并 batch 和队列中积压的写入请求，在一个事务中提交
+
+        :param batch: 刚从队列取出的一批记录，None 表示关闭
+        :return: 是否收到了关闭请求
+        """
+        done = 1
+        stop = batch is None
+        rows = [] if stop else list(batch)
+        # 合并积压的写入请求，减少事务次数
+        while not stop:
+            try:
+                more = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            done += 1
+            if more is None:
+                stop = True
+            else:
+                rows.extend(more)
+        try:
+            if rows:
+                self._commit(rows)
+        except sqlite3.Error as e:
+            # 磁盘已满、数据库被另一个进程锁定等：丢弃这一批记录，线程继续处理之后的写入
+            if not self._write_failed:
+                self._write_failed = True
+                print(f"无法写入统计数据库: {e}")
+        finally:
+            for _ in range(done):
+                self._queue.task_done()
+        return stop
+
+    def flush(self) -> None:
+        """等待所有待写入的记录提交完成"""
+        if self.write_behind:
+            self._queue.join()
+
+    def close(self) -> None:
+        """提交剩余记录并关闭数据库"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._reader.close()
+        self._writer.close()
+
+    def best(self, mode: str, source: str = "player") -> int:
+        """
+        获取指定模式的最高分
+
+        :param mode: 游戏模式名称
+        :param source: 记录来源
+        :return: 最高分，没有记录时为0
+        """
+        row = self._reader.execute(_SELECT_BEST, (mode, source)).fetchone()
+        return row[0] if row else 0
+
+    def rank(self, mode: str, score: int, source: str = "player") -> int:
+        """
+        获取分数在指定模式中的排名（从1开始）
+
+        :param mode: 游戏模式名称
+        :param score: 分数
+        :param source: 与哪个来源的记录比较
+        :return: 排名
+        """
+        return self._reader.execute(_SELECT_ABOVE, (mode, source, score)).fetchone()[0] + 1
+
+    def percentile(self, mode: str, score: int, source: str = "player") -> float:
+        """
+        获取分数在指定模式中的百分位（0-100，低于该分数的记录占比）
+
+        :param mode: 游戏模式名称
+        :param score: 分数
+        :param source: 与哪个来源的记录比较
+        :return: 百分位
+        """
+        total = self.aggregates(mode, source)["runs"]
+        if not total:
+            return 100.0
+        below = self._reader.execute(_SELECT_BELOW, (mode, source, score)).fetchone()[0]
+        return 100.0 * below / total
+
+    def top(self, mode: str, n: int = 10, source: str = "player") -> List[RunRow]:
+        """
+        获取指定模式的前N名记录
+
+        :param mode: 游戏模式名称
+        :param n: 数量
+        :param source: 记录来源
+        :return: (id, score, duration_ms, played_at, source) 列表
+        """
+        return self._reader.execute(_SELECT_TOP, (mode, source, n)).fetchall()
+
+    def history(self, mode: str, limit: int = 20) -> List[RunRow]:
+        """
+        获取指定模式最近的游戏记录（所有来源）
+
+        :param mode: 游戏模式名称
+        :param limit: 数量
+        :return: (id, score, duration_ms, played_at, source) 列表
+        """
+        return self._reader.execute(_SELECT_HISTORY, (mode, limit)).fetchall()
+
+    def aggregates(self, mode: str, source: str = "player") -> Dict[str, float]:
+        """
+        获取指定模式的汇总数据
+
+        :param mode: 游戏模式名称
+        :param source: 记录来源
+        :return: 包含 runs、best、mean_score、total_ms 的字典
+        """
+        row = self._reader.execute(_SELECT_TOTALS, (mode, source)).fetchone()
+        if not row:
+            return {"runs": 0, "best": 0, "mean_score": 0.0, "total_ms": 0}
+        runs, total_score, total_ms, best = row
+        return {"runs": runs, "best": best, "mean_score": total_score / runs, "total_ms": total_ms}
+
+
+def open_stats_store(path: Optional[str] = None) -> Optional[StatsStore]:
+    """
+    打开统计数据库，失败时返回None（例如没有sqlite3或目录不可写）
+
+    :param path: 数据库文件路径
+    :return: StatsStore 或 None
+    """
+    if sqlite3 is None:
+        return None
+    try:
+        return StatsStore(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"无法打开统计数据库: {e}")
+        return None
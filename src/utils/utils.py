@@ -1,3 +1,4 @@
+import weakref
 from functools import wraps
 from typing import List
 
@@ -26,10 +27,31 @@ def memoize(func):
             cache[key] = func(*args, **kwargs)  # 缓存函数结果
         return cache[key]  # 返回缓存结果
 
+    wrapper.cache = cache  # 供内存诊断查看缓存大小
     return wrapper
 
 
-@memoize
+def weak_memoize(func):
+    """
+    按第一个参数（如表面）缓存函数结果，参数对象被释放时缓存项随之删除，长时间运行时缓存不会无限增长
+    """
+    cache = weakref.WeakKeyDictionary()  # 第一个参数 -> {其余参数: 结果}
+
+    @wraps(func)
+    def wrapper(first, *args, **kwargs):
+        results = cache.get(first)
+        if results is None:
+            results = cache[first] = {}
+        key = (args, frozenset(kwargs.items()))
+        if key not in results:
+            results[key] = func(first, *args, **kwargs)
+        return results[key]
+
+    wrapper.cache = cache  # 供内存诊断查看缓存大小
+    return wrapper
+
+
+@weak_memoize
 def get_hit_mask(image: pygame.Surface) -> HitMaskType:
     """
     根据图像的透明度返回碰撞掩码
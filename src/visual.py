@@ -0,0 +1,293 @@
+"""
+视觉回归测试
+
+make visual 在SDL的dummy驱动下运行一组固定的场景（欢迎菜单、各游戏模式、夜间遮罩、速度线、穿越模式
+的半透明、无敌光环、爆炸等），逐帧与基准图像比较，证明渲染优化（缓存、合批、局部刷新）没有改变画面。
+make visual-golden 把当前画面保存为基准图像。
+
+画面完全确定：
+- 游戏时间按帧推进（GameConfig.fixed_step），不读取系统时钟
+- 关卡使用固定种子，背景、小鸟、管道的随机选择和粒子使用固定种子的 random
+- 自动玩家的时间预算足够大，规划总能完成，决策与机器速度无关
+- 每个场景在单独的进程中运行，使用空的成绩数据库和轨迹目录，不受其他场景的缓存、成绩和轨迹影响
+
+场景分配到多个进程并行运行。比较时先比较像素是否完全相同，不同时逐像素比较：任一通道的差超过
+容差的像素计为不同，不同的像素数超过允许值时失败，并在差异目录中写出标出不同像素的图像。
+基准图像与 pygame/SDL 的版本和是否使用图集有关，版本不同时会给出提示。
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .bench import _environment, _Finished
+
+DEFAULT_GOLDEN = "visual-golden"  # 基准图像目录
+DEFAULT_DIFF = "visual-diff"  # 失败时写出差异图像的目录
+VISUAL_SEED = 20240607  # 关卡和 random 的种子
+FRAME_STEP = 1000 / 30  # 每帧推进的游戏时间（毫秒）
+PLANNING_BUDGET_MS = 1000  # 自动玩家每帧的时间预算，远大于实际耗时
+CHANNEL_TOLERANCE = 2  # 每个通道允许的差
+PIXEL_TOLERANCE = 0  # 允许超出通道容差的像素数
+
+
+def _post_key(name: str) -> Callable:
+    """场景动作：模拟按下一个键（如 "K_m"），经过游戏正常的输入处理"""
+    def action(game) -> None:
+        import pygame
+
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=getattr(pygame, name), mod=0, unicode=""))
+    return action
+
+
+def _activate(name: str) -> Callable:
+    """场景动作：激活一个道具效果"""
+    def action(game) -> None:
+        from .entities.powerup import PowerUpType
+
+        game.powerup_manager.activate_effect(PowerUpType[name])
+    return action
+
+
+def _time_running_out(game) -> None:
+    """场景动作：限时模式只剩9秒"""
+    game.time_remaining = 9000
+
+
+class Scene:
+    """
+    一个视觉回归场景：以固定种子运行一个游戏模式，在指定的帧截取画面
+    """
+
+    def __init__(self, name: str, mode: str, frames: Sequence[int], autoplay: bool = True,
+                 actions: Optional[Dict[int, Callable]] = None) -> None:
+        """
+        :param name: 场景名，也是基准图像的子目录名
+        :param mode: 游戏模式名
+        :param frames: 截取画面的帧号（从第一帧开始计数）
+        :param autoplay: 是否由自动玩家直接开始游戏；False 时停留在欢迎菜单
+        :param actions: 帧号 -> 在该帧输出之后执行的动作（例如按键、激活道具）
+        """
+        self.name = name
+        self.mode = mode
+        self.frames = tuple(sorted(frames))
+        self.autoplay = autoplay
+        self.actions = actions or {}
+
+
+SCENES = [
+    Scene("menu", "CLASSIC", (0, 10, 30, 60), autoplay=False),
+    Scene("classic", "CLASSIC", range(20, 301, 20)),
+    Scene("timed", "TIMED", range(20, 121, 20)),
+    Scene("timed-warning", "TIMED", range(31, 62, 3), actions={30: _time_running_out}),
+    Scene("reverse", "REVERSE", range(20, 301, 20)),
+    Scene("ghost", "GHOST", range(20, 301, 20)),
+    Scene("ghost-explosion", "GHOST", range(61, 91, 2), actions={60: _post_key("K_m")}),  # 主动穿越
+    Scene("night", "NIGHT", range(10, 301, 10)),
+    Scene("speed", "SPEED", range(10, 151, 5)),
+    Scene("invincible", "CLASSIC", range(31, 91, 2), actions={30: _activate("INVINCIBLE")}),
+    Scene("small", "CLASSIC", range(31, 61, 5), actions={30: _activate("SMALL_SIZE")}),
+]
+
+
+def get_scene(name: str) -> Scene:
+    """
+    :raises KeyError: 没有这个场景
+    """
+    for scene in SCENES:
+        if scene.name == name:
+            return scene
+    raise KeyError(name)
+
+
+def render_scene(name: str) -> Tuple[Tuple[int, int], Dict[int, bytes]]:
+    """
+    运行一个场景，返回 (画面尺寸, 帧号 -> RGB像素)
+
+    会初始化显示，应在单独的进程中调用。
+    """
+    _environment()
+    scratch = tempfile.mkdtemp(prefix="flappy-visual-")
+    os.environ["FLAPPY_STATS_DB"] = os.path.join(scratch, "stats.db")
+    os.environ["FLAPPY_GHOST_DIR"] = os.path.join(scratch, "ghosts")
+    import pygame
+
+    from .agents import AutoPlayer
+    from .flappy import Flappy
+
+    scene = get_scene(name)
+    random.seed(VISUAL_SEED)
+    game = Flappy(seed=VISUAL_SEED, autoplay=scene.mode if scene.autoplay else None)
+    config = game.config
+    config.fps = 0  # 不限帧率
+    config.fixed_step = FRAME_STEP
+    game.last_frame_time = config.ticks()
+    game.run_warmup(everything=True)
+    if game.autoplayer is not None:
+        game.autoplayer = AutoPlayer(budget_ms=PLANNING_BUDGET_MS)
+
+    frames: Dict[int, bytes] = {}
+    wanted = set(scene.frames)
+    last = scene.frames[-1]
+    present = config.present
+
+    def captured_present():
+        frame = config.frame
+        present()
+        if frame in wanted:
+            frames[frame] = pygame.image.tobytes(config.screen, "RGB")
+        if frame >= last:
+            raise _Finished
+        action = scene.actions.get(frame)
+        if action is not None:
+            action(game)
+
+    config.present = captured_present
+    try:
+        asyncio.run(game.start())
+    except _Finished:
+        pass
+    size = config.screen.get_size()
+    pygame.quit()
+    return size, frames
+
+
+def compare_pixels(actual: bytes, golden: bytes, tolerance: int) -> Tuple[int, int, List[int]]:
+    """
+    逐像素比较两帧RGB像素
+
+    :return: (超出容差的像素数, 最大的通道差, 超出容差的像素下标)
+    """
+    different = []
+    worst = 0
+    for i in range(0, len(actual), 3):
+        if actual[i:i + 3] == golden[i:i + 3]:
+            continue
+        delta = max(abs(actual[i] - golden[i]), abs(actual[i + 1] - golden[i + 1]), abs(actual[i + 2] - golden[i + 2]))
+        worst = max(worst, delta)
+        if delta > tolerance:
+            different.append(i // 3)
+    return len(different), worst, different
+
+
+def _diff_image(golden: bytes, different: List[int]) -> bytearray:
+    """变暗的基准图像上用红色标出不同的像素"""
+    image = bytearray(value // 3 for value in golden)
+    for pixel in different:
+        image[pixel * 3:pixel * 3 + 3] = b"\xff\x00\x00"
+    return image
+
+
+def _golden_path(golden_dir: str, scene: str, frame: int) -> str:
+    return os.path.join(golden_dir, scene, f"{frame:04d}.png")
+
+
+def check_scene(args: Tuple[str, str, str, bool, int, int]) -> List[Tuple[str, int, str, str]]:
+    """
+    运行一个场景并与基准图像比较（或保存为基准图像），在进程池中调用
+
+    :param args: (场景名, 基准目录, 差异目录, 是否更新基准, 通道容差, 允许的像素数)
+    :return: [(场景名, 帧号, 状态, 说明)]，状态为 ok / updated / missing / FAIL
+    """
+    name, golden_dir, diff_dir, update, tolerance, max_pixels = args
+    import pygame
+
+    size, frames = render_scene(name)
+    results = []
+    for frame, pixels in sorted(frames.items()):
+        path = _golden_path(golden_dir, name, frame)
+        if update:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pygame.image.save(pygame.image.frombytes(pixels, size, "RGB"), path)
+            results.append((name, frame, "updated", ""))
+            continue
+        if not os.path.exists(path):
+            results.append((name, frame, "missing", path))
+            continue
+        golden_image = pygame.image.load(path)
+        golden = pygame.image.tobytes(golden_image, "RGB")
+        if golden == pixels:
+            results.append((name, frame, "ok", ""))
+            continue
+        if golden_image.get_size() != size:
+            results.append((name, frame, "FAIL", f"size {golden_image.get_size()} != {size}"))
+            continue
+        count, worst, different = compare_pixels(pixels, golden, tolerance)
+        if count <= max_pixels:
+            results.append((name, frame, "ok", f"max channel delta {worst}"))
+            continue
+        os.makedirs(diff_dir, exist_ok=True)
+        diff_path = os.path.join(diff_dir, f"{name}-{frame:04d}.png")
+        pygame.image.save(pygame.image.frombytes(bytes(_diff_image(golden, different)), size, "RGB"), diff_path)
+        pygame.image.save(pygame.image.frombytes(pixels, size, "RGB"),
+                          os.path.join(diff_dir, f"{name}-{frame:04d}-actual.png"))
+        results.append((name, frame, "FAIL", f"{count} pixels differ (max delta {worst}), see {diff_path}"))
+    return results
+
+
+def _meta() -> Dict[str, str]:
+    """影响像素的环境：pygame/SDL 版本和是否使用图集"""
+    import pygame
+
+    from .utils.atlas import DEFAULT_ATLAS
+
+    atlas = os.environ.get("FLAPPY_ATLAS", DEFAULT_ATLAS)
+    return {
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(map(str, pygame.get_sdl_version())),
+        "atlas": "off" if atlas == "off" or not os.path.exists(atlas) else "on",
+    }
+
+
+def main() -> None:
+    """
+    make visual / make visual-golden
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="视觉回归测试：逐帧与基准图像比较")
+    parser.add_argument("--update", action="store_true", help="把当前画面保存为基准图像")
+    parser.add_argument("--golden", default=DEFAULT_GOLDEN, help="基准图像目录")
+    parser.add_argument("--diff", default=DEFAULT_DIFF, help="失败时写出差异图像的目录")
+    parser.add_argument("--only", default=None, help="只运行名称包含该字符串的场景")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="并行的进程数")
+    parser.add_argument("--tolerance", type=int, default=CHANNEL_TOLERANCE, help="每个通道允许的差")
+    parser.add_argument("--pixels", type=int, default=PIXEL_TOLERANCE, help="每帧允许超出通道容差的像素数")
+    args = parser.parse_args()
+
+    scenes = [scene.name for scene in SCENES if not args.only or args.only in scene.name]
+    meta_path = os.path.join(args.golden, "meta.json")
+    meta = _meta()
+    if not args.update and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            golden_meta = json.load(f)
+        if golden_meta != meta:
+            print(f"warning: golden images were made with {golden_meta}, running with {meta}")
+
+    tasks = [(name, args.golden, args.diff, args.update, args.tolerance, args.pixels) for name in scenes]
+    # 每个场景使用新的进程，互不影响
+    with multiprocessing.Pool(max(1, min(args.jobs, len(tasks))), maxtasksperchild=1) as pool:
+        results = [result for scene_results in pool.imap(check_scene, tasks) for result in scene_results]
+
+    if args.update:
+        os.makedirs(args.golden, exist_ok=True)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2, sort_keys=True)
+        print(f"saved {len(results)} golden frames from {len(scenes)} scenes to {args.golden}")
+        return
+
+    failures = [result for result in results if result[2] != "ok"]
+    for name in scenes:
+        scene_results = [result for result in results if result[0] == name]
+        bad = sum(1 for result in scene_results if result[2] != "ok")
+        print(f"{name:16} {len(scene_results) - bad:4d}/{len(scene_results):<4d} {'FAIL' if bad else 'ok'}")
+    for name, frame, status, detail in failures:
+        print(f"    {name} frame {frame}: {status} {detail}")
+    if any(status == "missing" for _, _, status, _ in failures):
+        print("missing golden images, run make visual-golden first")
+    if failures:
+        sys.exit(1)